@@ -1,20 +1,29 @@
 import ctypes
 import importlib.resources as res
+import os
 import sys
+import threading
+import time
 import tkinter as tk
 import tkinter.filedialog as fd
 import tkinter.messagebox as mb
 import tkinter.ttk as ttk
 from tkinter import font, scrolledtext
 import traceback
+from pathlib import Path, PurePath
 
 import ttkbootstrap
+from ttkbootstrap.widgets import InteractiveNotebook
 
 from . import __version__
 from . import windowsHighDpiPatch
 from .progressDialog import ProgressDialog
 from .style import padding
-from .table import WrappedLabel
+
+# Time budget for drawing the quick start menu, which is checked in dev mode.
+FIRST_FRAME_BUDGET = 1.0  # s
+
+startupTimes = {"start": time.perf_counter()}
 
 try:
     appId = "daniilS.musketeer"
@@ -25,6 +34,9 @@ except Exception:
 
 class ErrorDialog(tk.Toplevel):
     def __init__(self, root, excType, excValue, tb, *args, **kwargs):
+        # Imported here, as an error can occur before the other modules are loaded.
+        from .table import WrappedLabel
+
         super().__init__(root, *args, **kwargs)
         self.withdraw()
 
@@ -243,305 +255,404 @@ except Exception:
     # the future, we can survive without an icon.
     pass
 
-frame = ttk.Frame(root, padding=padding)
-frame.pack(expand=True, fill="both")
+
+# Override the matplotlib confic and cache dir. Pyinstaller will set it to a temporary
+# folder by default, which means matplotlib has to rebuild the font cache every time. We
+# also don't want to use the user's default matplotlib config, in case it contains
+# incompatible settings.
+try:
+    if sys.platform.startswith(("linux", "freebsd")):
+        cachedir = (
+            Path(os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache"))
+            / "musketeer"
+            / ".matplotlib"
+        )
+    else:
+        cachedir = Path.home() / ".musketeer" / ".matplotlib"
+    os.environ["MPLCONFIGDIR"] = str(cachedir)
+except RuntimeError:  # raised if Path.home() is not available
+    pass
 
 
 # Especially on the first startup, when matplotlib needs to build the font cache,
-# importing everything may take a while. So we defer all other imports until now.
-with ProgressDialog(
-    root,
-    title="Starting Musketeer",
-    labelText="Loading modules",
-    abortCallback=sys.exit,
-) as progressDialog:
-    import os
-
-    progressDialog.callback()
-    from pathlib import Path, PurePath
-
-    progressDialog.callback()
-
-    import numpy as np
-
-    progressDialog.callback()
-    from ttkbootstrap.widgets import InteractiveNotebook
-
-    progressDialog.callback()
-    # Override the matplotlib confic and cache dir. Pyinstaller will set it to a
-    # temporary folder by default, which means matplotlib has to rebuild the font cache
-    # every time. We also don't want to use the user's default matplotlib config, in
-    # case it contains incompatible settings.
+# importing everything may take a while. So only the quick start menu is created
+# straight away, and all other modules are imported in a background thread once it has
+# been drawn.
+modulesLoaded = threading.Event()
+loaderError = None
+patchApplied = False
+
+
+def loadModules():
+    global np, patchMatplotlib, defaultFigureParams, figureParams, ButtonFrame
+    global Titration, TitrationFrame, readFitFile
+    global ImportFolderPopup, applyTemplate, readFolder
+    global loaderError
+
     try:
-        if sys.platform.startswith(("linux", "freebsd")):
-            cachedir = (
-                Path(os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache"))
-                / "musketeer"
-                / ".matplotlib"
-            )
-        else:
-            cachedir = Path.home() / ".musketeer" / ".matplotlib"
-        os.environ["MPLCONFIGDIR"] = str(cachedir)
-    except RuntimeError:  # raised if Path.home() is not available
+        import numpy as np
+
+        from . import patchMatplotlib
+        from .style import defaultFigureParams, figureParams
+        from .table import ButtonFrame
+        from .core.titration import Titration
+        from .core.fitFile import readFitFile
+        from .titrationFrame import TitrationFrame
+        from .folderImport import ImportFolderPopup, applyTemplate, readFolder
+    except BaseException as e:
+        loaderError = e
+    finally:
+        startupTimes["modulesLoaded"] = time.perf_counter()
+        modulesLoaded.set()
+
+    # scipy is only needed once the first fit is run, so the interface doesn't wait for
+    # it, but importing it now avoids a delay when fitting.
+    try:
+        import scipy.linalg  # noqa: F401
+        import scipy.ndimage  # noqa: F401
+        import scipy.optimize  # noqa: F401
+        import scipy.signal  # noqa: F401
+    except Exception:
+        # Will be raised again, and reported, when the module is used.
         pass
 
-    from . import patchMatplotlib
 
-    progressDialog.callback()
-    from .style import defaultFigureParams, figureParams
+def finishLoading():
+    # Has to run in the main thread, once the modules have been imported.
+    global patchApplied
+    if loaderError is not None:
+        raise loaderError
+    if patchApplied:
+        return
 
-    progressDialog.callback()
-    from .table import ButtonFrame
+    patchMatplotlib.applyPatch()
+    patchApplied = True
+    startupTimes["ready"] = time.perf_counter()
+
+    if __debug__ and sys.flags.dev_mode:
+        firstFrame = startupTimes["firstFrame"] - startupTimes["start"]
+        ready = startupTimes["ready"] - startupTimes["start"]
+        print(
+            f"Startup: first frame after {firstFrame:.3f} s, ready after {ready:.3f} s"
+        )
+        if firstFrame > FIRST_FRAME_BUDGET:
+            print(f"Startup: first frame exceeded budget of {FIRST_FRAME_BUDGET:.3f} s")
 
-    progressDialog.callback()
-    from .titration import Titration
 
-    progressDialog.callback()
-    from .titrationFrame import TitrationFrame
+def pollModules():
+    if modulesLoaded.is_set():
+        finishLoading()
+    else:
+        root.after(50, pollModules)
+
+
+def waitForModules(master):
+    # Returns False if the user aborted while waiting.
+    if not modulesLoaded.is_set():
+        with ProgressDialog(
+            master, title="Starting Musketeer", labelText="Loading modules"
+        ) as progressDialog:
+            while not modulesLoaded.wait(0.05):
+                progressDialog.callback()
+        if not modulesLoaded.is_set():
+            return False
+    finishLoading()
+    return True
+
+
+class DpiPopup(tk.Toplevel):
+    def __init__(self, master, saveCallback, *args, **kwargs):
+        super().__init__(
+            master,
+            padx=padding,
+            pady=padding,
+            *args,
+            **kwargs,
+        )
+        self.title("Change figure DPI")
+        self.resizable(False, False)
+        self.saveCallback = saveCallback
 
-    progressDialog.callback()
+        scaleLabel = ttk.Label(self, text="Scale:", justify="left", state="normal")
+        scaleLabel.grid(row=0, column=0, sticky="ew")
 
-    patchMatplotlib.applyPatch()
-    progressDialog.callback()
-
-    progressDialog.setLabelText("Loading interface")
-
-    class DpiPopup(tk.Toplevel):
-        def __init__(self, master, saveCallback, *args, **kwargs):
-            super().__init__(
-                master,
-                padx=padding,
-                pady=padding,
-                *args,
-                **kwargs,
-            )
-            self.title("Change figure DPI")
-            self.resizable(False, False)
-            self.saveCallback = saveCallback
-
-            scaleLabel = ttk.Label(self, text="Scale:", justify="left", state="normal")
-            scaleLabel.grid(row=0, column=0, sticky="ew")
-
-            self.scaleDropdown = ttk.Combobox(
-                self,
-                values=[f"{i}%" for i in [60, 80, 100, 125, 150, 200]],
-                justify="right",
-                width=5,
-            )
-            self.scaleDropdown.grid(row=0, column=2, sticky="ew")
+        self.scaleDropdown = ttk.Combobox(
+            self,
+            values=[f"{i}%" for i in [60, 80, 100, 125, 150, 200]],
+            justify="right",
+            width=5,
+        )
+        self.scaleDropdown.grid(row=0, column=2, sticky="ew")
 
-            resLabel = ttk.Label(self, text="Resolution:", justify="left")
-            resLabel.grid(row=1, column=0, sticky="ew")
+        resLabel = ttk.Label(self, text="Resolution:", justify="left")
+        resLabel.grid(row=1, column=0, sticky="ew")
 
-            self.resDropdown = ttk.Combobox(
-                self,
-                values=[
-                    f"{int(y * 4 / 3)} x {y}"
-                    for y in [240, 360, 480, 600, 960, 1200, 1440]
-                ],
-                justify="right",
-                width=10,
-                state="readonly",
-            )
-            self.resDropdown.grid(row=1, column=2, sticky="ew")
+        self.resDropdown = ttk.Combobox(
+            self,
+            values=[
+                f"{int(y * 4 / 3)} x {y}" for y in [240, 360, 480, 600, 960, 1200, 1440]
+            ],
+            justify="right",
+            width=10,
+            state="readonly",
+        )
+        self.resDropdown.grid(row=1, column=2, sticky="ew")
 
-            self.rowconfigure(0, pad=10)
-            self.rowconfigure(1, pad=10)
+        self.rowconfigure(0, pad=10)
+        self.rowconfigure(1, pad=10)
 
-            self.columnconfigure(0, pad=10)
-            self.columnconfigure(1, weight=1)
+        self.columnconfigure(0, pad=10)
+        self.columnconfigure(1, weight=1)
 
-            self.initValues()
+        self.initValues()
 
-            buttonFrame = ButtonFrame(self, self.reset, self.save, self.destroy)
-            buttonFrame.saveButton.configure(text="Save")
+        buttonFrame = ButtonFrame(self, self.reset, self.save, self.destroy)
+        buttonFrame.saveButton.configure(text="Save")
 
-            buttonFrame.applyButton = ttk.Button(
-                buttonFrame, text="Apply", command=self.apply, style="success.TButton"
-            )
-            buttonFrame.applyButton.pack(
-                side="right", after=buttonFrame.saveButton, padx=padding
-            )
+        buttonFrame.applyButton = ttk.Button(
+            buttonFrame, text="Apply", command=self.apply, style="success.TButton"
+        )
+        buttonFrame.applyButton.pack(
+            side="right", after=buttonFrame.saveButton, padx=padding
+        )
 
-            buttonFrame.grid(row=2, column=0, columnspan=3, sticky="esw")
+        buttonFrame.grid(row=2, column=0, columnspan=3, sticky="esw")
+
+    def reset(self):
+        self.scaleDropdown.set(f"{defaultFigureParams['scale']}%")
+        self.resDropdown.set(f"{defaultFigureParams['x']} x {defaultFigureParams['y']}")
+
+    def initValues(self):
+        self.scaleDropdown.set(f"{figureParams['scale']}%")
+        self.resDropdown.set(f"{figureParams['x']} x {figureParams['y']}")
+
+    def save(self):
+        if self.apply():  # returns False if failed to apply
+            self.destroy()
+
+    def apply(self):
+        scale = int(self.scaleDropdown.get().strip("%"))
+        x, y = [int(i) for i in self.resDropdown.get().split(" x ")]
+        figureParams.update(scale=scale, x=x, y=y)
+        self.saveCallback()
+        return True
+
+
+class TitrationsNotebook(InteractiveNotebook):
+    def __init__(self, master, *args, **kwargs):
+        super().__init__(
+            master,
+            padding=padding,
+            newtab=self.newFile,
+            style="Flat.Interactive.TNotebook",
+            *args,
+            **kwargs,
+        )
+        self.createMenuBar()
+        self.createQuickStartMenu()
+        self.select(str(self._newtab_frame))
+
+    def forget(self, index, *args, **kwargs):
+        # Manually change to a different tab before a tab is closed, to prevent the
+        # quickstart menu from appearing briefly right after a tab is closed but before
+        # the next tab has been selected
+        next_tab = index + 1
+        if (
+            self._has_newtab_button and next_tab == self._last_tab
+        ) or index == self._last_tab:
+            next_tab = index - 1
+        if 0 <= next_tab <= self._last_tab:
+            self.select(next_tab)
+        return super().forget(index, *args, **kwargs)
+
+    def createQuickStartMenu(self):
+        self.quickStartFrame = ttk.Frame(self)
+        self.quickStartFrame.pack(expand=True, fill="none")
+
+        self.quickStartFont = font.nametofont("TkTextFont").copy()
+        self.quickStartFont["size"] = round(self.quickStartFont["size"] * 1.33)
+        root.ttkStyle.configure("large.success.TButton", font=self.quickStartFont)
+        root.ttkStyle.configure("large.TButton", font=self.quickStartFont)
+
+        self.newFileButton = ttk.Button(
+            self.quickStartFrame,
+            text="Create a new fit file",
+            command=self.newFile,
+            style="large.success.TButton",
+        )
+        self.newFileButton.pack(fill="x")
+        self.orLabel = ttk.Label(
+            self.quickStartFrame, text="or", font=self.quickStartFont
+        )
+        self.orLabel.pack(pady=5)
+        self.OpenFileButton = ttk.Button(
+            self.quickStartFrame,
+            text="Open an existing file",
+            command=self.openFile,
+            style="large.TButton",
+        )
+        self.OpenFileButton.pack(fill="x")
 
-        def reset(self):
-            self.scaleDropdown.set(f"{defaultFigureParams['scale']}%")
-            self.resDropdown.set(
-                f"{defaultFigureParams['x']} x {defaultFigureParams['y']}"
-            )
+    def createMenuBar(self):
+        self.menuBar = tk.Menu(self, tearoff=False)
 
-        def initValues(self):
-            self.scaleDropdown.set(f"{figureParams['scale']}%")
-            self.resDropdown.set(f"{figureParams['x']} x {figureParams['y']}")
-
-        def save(self):
-            if self.apply():  # returns False if failed to apply
-                self.destroy()
-
-        def apply(self):
-            scale = int(self.scaleDropdown.get().strip("%"))
-            x, y = [int(i) for i in self.resDropdown.get().split(" x ")]
-            figureParams.update(scale=scale, x=x, y=y)
-            self.saveCallback()
-            return True
-
-    class TitrationsNotebook(InteractiveNotebook):
-        def __init__(self, master, *args, **kwargs):
-            super().__init__(
-                master,
-                padding=padding,
-                newtab=self.newFile,
-                style="Flat.Interactive.TNotebook",
-                *args,
-                **kwargs,
-            )
-            self.createMenuBar()
-            self.createQuickStartMenu()
-            self.select(str(self._newtab_frame))
-
-        def forget(self, index, *args, **kwargs):
-            # Manually change to a different tab before a tab is closed, to prevent the
-            # quickstart menu from appearing briefly right after a tab is closed but before
-            # the next tab has been selected
-            next_tab = index + 1
-            if (
-                self._has_newtab_button and next_tab == self._last_tab
-            ) or index == self._last_tab:
-                next_tab = index - 1
-            if 0 <= next_tab <= self._last_tab:
-                self.select(next_tab)
-            return super().forget(index, *args, **kwargs)
-
-        def createQuickStartMenu(self):
-            self.quickStartFrame = ttk.Frame(self)
-            self.quickStartFrame.pack(expand=True, fill="none")
-
-            self.quickStartFont = font.nametofont("TkTextFont").copy()
-            self.quickStartFont["size"] = round(self.quickStartFont["size"] * 1.33)
-            root.ttkStyle.configure("large.success.TButton", font=self.quickStartFont)
-            root.ttkStyle.configure("large.TButton", font=self.quickStartFont)
-
-            self.newFileButton = ttk.Button(
-                self.quickStartFrame,
-                text="Create a new fit file",
-                command=self.newFile,
-                style="large.success.TButton",
-            )
-            self.newFileButton.pack(fill="x")
-            self.orLabel = ttk.Label(
-                self.quickStartFrame, text="or", font=self.quickStartFont
-            )
-            self.orLabel.pack(pady=5)
-            self.OpenFileButton = ttk.Button(
-                self.quickStartFrame,
-                text="Open an existing file",
-                command=self.openFile,
-                style="large.TButton",
-            )
-            self.OpenFileButton.pack(fill="x")
+        fileMenu = tk.Menu(self.menuBar, tearoff=False)
+        self.menuBar.add_cascade(label="File", menu=fileMenu, underline=0)
 
-        def createMenuBar(self):
-            self.menuBar = tk.Menu(self, tearoff=False)
+        self.addMenuCommand(fileMenu, "New", self.newFile)
+        self.addMenuCommand(fileMenu, "Open", self.openFile)
+        self.addMenuCommand(fileMenu, "Import folder", self.importFolder)
+        self.addMenuCommand(fileMenu, "Save", self.saveFile)
+        self.addMenuCommand(
+            fileMenu, "Save As", self.saveFileAs, keys=("Shift", "s"), underline=5
+        )
 
-            fileMenu = tk.Menu(self.menuBar, tearoff=False)
-            self.menuBar.add_cascade(label="File", menu=fileMenu, underline=0)
+        editMenu = tk.Menu(self.menuBar, tearoff=False)
+        self.menuBar.add_cascade(label="Edit", menu=editMenu, underline=0)
+        editMenu.add_command(
+            label="Change figure DPI", command=self.editDpi, underline=0
+        )
 
-            self.addMenuCommand(fileMenu, "New", self.newFile)
-            self.addMenuCommand(fileMenu, "Open", self.openFile)
-            self.addMenuCommand(fileMenu, "Save", self.saveFile)
-            self.addMenuCommand(
-                fileMenu, "Save As", self.saveFileAs, keys=("Shift", "s"), underline=5
-            )
+        self.winfo_toplevel().config(menu=self.menuBar)
 
-            editMenu = tk.Menu(self.menuBar, tearoff=False)
-            self.menuBar.add_cascade(label="Edit", menu=editMenu, underline=0)
-            editMenu.add_command(
-                label="Change figure DPI", command=self.editDpi, underline=0
-            )
+    def addMenuCommand(self, fileMenu, label, command, keys=None, underline=0):
+        if self._windowingsystem == "aqua":
+            accelerator = "Command"
+            key = accelerator
+        else:
+            accelerator = "Ctrl"
+            key = "Control"
 
-            self.winfo_toplevel().config(menu=self.menuBar)
+        if keys is None:
+            keys = (label[0].lower(),)
 
-        def addMenuCommand(self, fileMenu, label, command, keys=None, underline=0):
-            if self._windowingsystem == "aqua":
-                accelerator = "Command"
-                key = accelerator
-            else:
-                accelerator = "Ctrl"
-                key = "Control"
+        fileMenu.add_command(
+            label=label,
+            command=command,
+            accelerator=f"{accelerator}+{'+'.join(keys).title()}",
+            underline=underline,
+        )
+        self.winfo_toplevel().bind(f"<{key}-{'-'.join(keys)}>", command)
+
+    def newFile(self, *args):
+        if not waitForModules(self):
+            return
+        titration = Titration("Fit 1")
+        titration.rawData = np.empty((0, 0))
+
+        titrationFrame = TitrationFrame(self, padding=padding)
+        self.add(titrationFrame, text="New Titration", sticky="nesw")
+        self.select(str(titrationFrame))
+        titrationFrame.loadTitration(titration)
 
-            if keys is None:
-                keys = (label[0].lower(),)
+    def saveFile(self, *args):
+        self.nametowidget(self.select()).saveFile()
 
-            fileMenu.add_command(
-                label=label,
-                command=command,
-                accelerator=f"{accelerator}+{'+'.join(keys).title()}",
-                underline=underline,
+    def saveFileAs(self, *args):
+        self.nametowidget(self.select()).saveFile(saveAs=True)
+
+    def openFile(self, *args):
+        if not waitForModules(self):
+            return
+        with ProgressDialog(
+            self,
+            title="Loading titration",
+            labelText="Waiting for filename",
+        ) as progressDialog:
+            filePath = fd.askopenfilename(
+                title="Open file",
+                filetypes=[("Musketeer files", "*.fit"), ("All files", "*.*")],
             )
-            self.winfo_toplevel().bind(f"<{key}-{'-'.join(keys)}>", command)
+            if filePath == "":
+                return
 
-        def newFile(self, *args):
-            titration = Titration("Fit 1")
-            titration.rawData = np.empty((0, 0))
+            progressDialog.setLabelText(f"Loading {PurePath(filePath).name}")
 
-            titrationFrame = TitrationFrame(self, padding=padding)
-            self.add(titrationFrame, text="New Titration", sticky="nesw")
+            titration = np.load(filePath, allow_pickle=False)
+
+            titrationFrame = TitrationFrame(self, filePath, padding=padding)
+            self.add(titrationFrame, text=PurePath(filePath).name, sticky="nesw")
             self.select(str(titrationFrame))
-            titrationFrame.loadTitration(titration)
-
-        def saveFile(self, *args):
-            self.nametowidget(self.select()).saveFile()
-
-        def saveFileAs(self, *args):
-            self.nametowidget(self.select()).saveFile(saveAs=True)
-
-        def openFile(self, *args):
-            with ProgressDialog(
-                self,
-                title="Loading titration",
-                labelText="Waiting for filename",
-            ) as progressDialog:
-                filePath = fd.askopenfilename(
-                    title="Open file",
-                    filetypes=[("Musketeer files", "*.fit"), ("All files", "*.*")],
+            titrationFrame.loadTitration(titration, progressDialog.callback)
+
+    def importFolder(self, *args):
+        if not waitForModules(self):
+            return
+        popup = ImportFolderPopup(self)
+        root = self.winfo_toplevel()
+        popup.geometry(f"+{root.winfo_x() + 100}+{root.winfo_y() + 100}")
+        if not popup.show():
+            return
+
+        with ProgressDialog(
+            self,
+            title="Importing folder",
+            labelText=f"Reading files from {PurePath(popup.folderPath).name}",
+        ) as progressDialog:
+            fits = readFolder(
+                popup.folderPath, popup.fileReader, self, progressDialog.callback
+            )
+            if len(fits) == 0:
+                return
+
+            if popup.templatePath is not None:
+                progressDialog.setLabelText(
+                    f"Applying template {PurePath(popup.templatePath).name}"
                 )
-                if filePath == "":
-                    return
-
-                progressDialog.setLabelText(f"Loading {PurePath(filePath).name}")
-
-                titration = np.load(filePath, allow_pickle=False)
-
-                titrationFrame = TitrationFrame(self, filePath, padding=padding)
-                self.add(titrationFrame, text=PurePath(filePath).name, sticky="nesw")
-                self.select(str(titrationFrame))
-                titrationFrame.loadTitration(titration, progressDialog.callback)
-
-        def editDpi(self, *args):
-            popup = DpiPopup(self, self.updateDpi)
-            popup.withdraw()
-            self.update()
-            root = self.winfo_toplevel()
-            x = root.winfo_x() + root.winfo_width() / 2 - popup.winfo_width() / 2
-            y = root.winfo_y() + root.winfo_height() / 2 - popup.winfo_height() / 2
-            popup.geometry(f"+{int(x)}+{int(y)}")
-            popup.transient(self)
-            popup.grab_set()
-            popup.deiconify()
-            popup.wait_window()
-
-        def updateDpi(self):
-            for tab in self.tabs():
-                try:
-                    self.nametowidget(tab).updateDpi()
-                except AttributeError:
-                    pass
-
-            self.update()
-
-    notebook = TitrationsNotebook(frame)
-    progressDialog.callback()
-    notebook.pack(expand=True, fill="both")
+                with np.load(popup.templatePath, allow_pickle=False) as file:
+                    _, templateFits = readFitFile(file)
+                # The first fit in the file is used as the template.
+                _, template = templateFits[0]
+                fits = [(name, applyTemplate(template, fit)) for name, fit in fits]
+
+            progressDialog.setLabelText("Loading titrations")
+            titrationFrame = TitrationFrame(self, padding=padding)
+            self.add(
+                titrationFrame,
+                text=PurePath(popup.folderPath).name,
+                sticky="nesw",
+            )
+            self.select(str(titrationFrame))
+            titrationFrame.loadTitration(
+                fits,
+                progressDialog.callback,
+                setDefault=popup.templatePath is None,
+            )
+
+    def editDpi(self, *args):
+        if not waitForModules(self):
+            return
+        popup = DpiPopup(self, self.updateDpi)
+        popup.withdraw()
+        self.update()
+        root = self.winfo_toplevel()
+        x = root.winfo_x() + root.winfo_width() / 2 - popup.winfo_width() / 2
+        y = root.winfo_y() + root.winfo_height() / 2 - popup.winfo_height() / 2
+        popup.geometry(f"+{int(x)}+{int(y)}")
+        popup.transient(self)
+        popup.grab_set()
+        popup.deiconify()
+        popup.wait_window()
+
+    def updateDpi(self):
+        for tab in self.tabs():
+            try:
+                self.nametowidget(tab).updateDpi()
+            except AttributeError:
+                pass
+
+        self.update()
+
+
+frame = ttk.Frame(root, padding=padding)
+frame.pack(expand=True, fill="both")
+
+notebook = TitrationsNotebook(frame)
+notebook.pack(expand=True, fill="both")
+root.update()
+startupTimes["firstFrame"] = time.perf_counter()
+
+threading.Thread(target=loadModules, name="loadModules", daemon=True).start()
+root.after(50, pollModules)
 
 root.mainloop()
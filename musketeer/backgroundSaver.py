@@ -0,0 +1,92 @@
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# How often open files are saved automatically, if they have unsaved changes.
+AUTOSAVE_INTERVAL = 5 * 60 * 1000  # ms
+
+
+def serialiseArray(data):
+    # Same format that np.savez uses for each member of the archive.
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, np.asanyarray(data), allow_pickle=True)
+    return buffer.getvalue()
+
+
+class BackgroundSaver:
+    # Writes .fit files from a worker thread, so that the interface stays responsive
+    # while large files are being saved. Each group of entries (the original titration,
+    # and each fit) is only re-serialised if its revision has changed since the last
+    # save. The archive is written to a temporary file in the same directory, which
+    # then atomically replaces the destination.
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # key: (revision, {suffix: serialised array})
+        self.cache = {}
+
+    def isCached(self, key, revision):
+        try:
+            cachedRevision, _ = self.cache[key]
+        except KeyError:
+            return False
+        return cachedRevision == revision
+
+    def save(self, filePath, groups, header):
+        """
+        `groups` is a list of (key, revision, prefix, options) tuples, where `options`
+        is a dict mapping each suffix to the data to save, or None if the group is
+        already cached at that revision. Each entry is stored as f"{prefix}{suffix}".
+        `header` is a dict of entries that are always saved.
+        """
+        return self.executor.submit(self.write, filePath, groups, header)
+
+    def serialiseGroup(self, key, revision, options):
+        if options is None:
+            _, entries = self.cache[key]
+            return entries
+
+        entries = {suffix: serialiseArray(data) for suffix, data in options.items()}
+        self.cache[key] = (revision, entries)
+        return entries
+
+    def write(self, filePath, groups, header):
+        members = {key: serialiseArray(data) for key, data in header.items()}
+        for key, revision, prefix, options in groups:
+            entries = self.serialiseGroup(key, revision, options)
+            members.update(
+                {f"{prefix}{suffix}": entry for suffix, entry in entries.items()}
+            )
+
+        directory = os.path.dirname(os.path.abspath(filePath))
+        fd, tempPath = tempfile.mkstemp(dir=directory, prefix=".", suffix=".fit.tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                with zipfile.ZipFile(
+                    file, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True
+                ) as archive:
+                    for name, entry in members.items():
+                        archive.writestr(name + ".npy", entry)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tempPath, filePath)
+        except BaseException:
+            try:
+                os.remove(tempPath)
+            except OSError:
+                pass
+            raise
+
+        # Drop cached entries for groups that no longer exist.
+        keys = [key for key, *_ in groups]
+        for key in list(self.cache.keys()):
+            if key not in keys:
+                del self.cache[key]
+
+    def shutdown(self):
+        # Any pending save is still completed.
+        self.executor.shutdown(wait=False)
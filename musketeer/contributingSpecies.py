@@ -5,51 +5,20 @@ import numpy as np
 
 from . import moduleFrame
 from . import style
+from .core.contributingSpecies import (  # noqa: F401
+    ContributingSpecies,
+    GetContributingSpeciesSingle,
+    GetContributingSpeciesHost,
+    GetContributingSpeciesAll,
+    GetContributingSpeciesCustom,
+    GetContributingSpeciesPerSignal,
+    strategies,
+)
 from .scrolledFrame import ScrolledFrame
 from .style import padding
 from .table import ButtonFrame, WrappedLabel
 
 
-class ContributingSpecies(moduleFrame.Strategy):
-    requiredAttributes = ("filter",)
-
-    # If set by a subclass to an index, then contributors.py will determine the default
-    # number of contributing states in each species from the stoichiometry of that
-    # molecule.
-    singleMoleculeIndex = None
-
-    def mapContributorsToSignals(self, contributorConcs):
-        if contributorConcs.ndim == 2:
-            return contributorConcs
-        elif contributorConcs.ndim == 3:
-            return contributorConcs[self.signalToMoleculeMap, :, :]
-
-    def run(self):
-        return self.filter
-
-
-class GetContributingSpeciesSingle(ContributingSpecies):
-    requiredAttributes = ContributingSpecies.requiredAttributes + (
-        "singleMoleculeIndex",
-    )
-
-    @property
-    def filter(self):
-        return self.titration.speciation.outputStoichiometries[
-            :, self.singleMoleculeIndex
-        ].astype(bool)
-
-
-class GetContributingSpeciesHost(GetContributingSpeciesSingle):
-    singleMoleculeIndex = 0
-
-
-class GetContributingSpeciesAll(ContributingSpecies):
-    @property
-    def filter(self):
-        return np.ones(self.titration.speciation.outputCount, dtype=bool)
-
-
 class ContributingSpeciesCustomPopup(moduleFrame.Popup):
     def __init__(self, titration, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -108,11 +77,6 @@ class ContributingSpeciesCustomPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetContributingSpeciesCustom(ContributingSpecies):
-    Popup = ContributingSpeciesCustomPopup
-    popupAttributes = ("filter",)
-
-
 class ContributorsPerSignalNotebook(ttk.Notebook):
     def __init__(self, master, titration, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
@@ -201,34 +165,12 @@ class ContributorsPerSignalPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetContributingSpeciesPerSignal(ContributingSpecies):
-    Popup = ContributorsPerSignalPopup
-    popupAttributes = ("signalToMoleculeMap",)
-
-    @property
-    def singleMoleculeIndex(self):
-        return np.arange(self.titration.speciation.freeCount)
-
-    @property
-    def filter(self):
-        # rows are all contributing molecules, columns are the corresponding
-        # contributing species
-        return (
-            self.titration.speciation.outputStoichiometries[
-                :, range(self.titration.speciation.freeCount)
-            ]
-            .astype(bool)
-            .T
-        )
+GetContributingSpeciesCustom.Popup = ContributingSpeciesCustomPopup
+GetContributingSpeciesPerSignal.Popup = ContributorsPerSignalPopup
 
 
 class ModuleFrame(moduleFrame.ModuleFrame):
     group = "Spectra"
     dropdownLabelText = "Which species contribute to the spectra?"
-    dropdownOptions = {
-        "Only species containing Host": GetContributingSpeciesHost,
-        "All species": GetContributingSpeciesAll,
-        "Custom": GetContributingSpeciesCustom,
-        "Custom, different per signal": GetContributingSpeciesPerSignal,
-    }
+    dropdownOptions = strategies
     attributeName = "contributingSpecies"
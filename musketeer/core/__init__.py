@@ -0,0 +1,39 @@
+# The numerical part of Musketeer, which doesn't import tkinter, so that models can be
+# built and fitted from scripts. The GUI modules in the parent package import the
+# strategies from here, and add the popups used to set their options.
+from .builder import (
+    fitModel,
+    newTitration,
+    setConcentrations,
+    setContributors,
+    setKs,
+    setStoichiometries,
+    setStrategy,
+    setVolumes,
+)
+from .fitFile import loadFitFile, readFitFile
+from .strategy import Strategy
+from .titration import (
+    EvaluationResult,
+    Titration,
+    strategyModules,
+    titrationAttributes,
+)
+
+__all__ = [
+    "EvaluationResult",
+    "Strategy",
+    "Titration",
+    "fitModel",
+    "loadFitFile",
+    "newTitration",
+    "readFitFile",
+    "setConcentrations",
+    "setContributors",
+    "setKs",
+    "setStoichiometries",
+    "setStrategy",
+    "setVolumes",
+    "strategyModules",
+    "titrationAttributes",
+]
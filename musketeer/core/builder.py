@@ -0,0 +1,174 @@
+import numpy as np
+from numpy import ma
+
+from . import contributors, equilibriumConstants, speciation
+from .titration import Titration, strategyModules
+
+# Functions for building a model from a script, instead of entering the options in the
+# popups. Strategies are selected by the names shown in the dropdown menus, and all
+# concentrations are in M and volumes in L. Unknown values are given as nan.
+
+
+def setStrategy(titration, attributeName, name, **options):
+    # Sets the titration's strategy for attributeName, with the options that would
+    # otherwise be entered in its popup.
+    try:
+        module = strategyModules[attributeName]
+    except KeyError:
+        raise ValueError(f"Titrations have no strategy called {attributeName}.")
+    try:
+        SelectedStrategy = module.strategies[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown option {name} for {attributeName}, must be one of:"
+            f" {', '.join(module.strategies)}"
+        )
+
+    strategy = SelectedStrategy(titration)
+    missingOptions = set(strategy.popupAttributes) - set(options)
+    if missingOptions:
+        raise ValueError(
+            f"Missing options for {name}: {', '.join(sorted(missingOptions))}"
+        )
+    for option, value in options.items():
+        if option not in strategy.popupAttributes:
+            raise ValueError(f"{name} has no option {option}")
+        setattr(strategy, option, value)
+    strategy.checkAttributes()
+
+    setattr(titration, attributeName, strategy)
+    return strategy
+
+
+def newTitration(rawData, title="Titration", additionTitles=None, signalTitles=None):
+    # Each strategy that doesn't need any options is set to the first one in its
+    # dropdown menu. The total concentrations always need to be set afterwards.
+    titration = Titration(title)
+    titration.rawData = ma.masked_invalid(np.asarray(rawData, dtype=float))
+    if additionTitles is not None:
+        titration.additionTitles = np.asarray(additionTitles)
+    if signalTitles is not None:
+        titration.signalTitles = np.asarray(signalTitles)
+
+    for attributeName, module in strategyModules.items():
+        name, Default = next(iter(module.strategies.items()))
+        if Default.popupAttributes:
+            setattr(titration, attributeName, None)
+        else:
+            setStrategy(titration, attributeName, name)
+    return titration
+
+
+def unknownsMasked(values):
+    return ma.masked_invalid(np.asarray(values, dtype=float))
+
+
+def initialGuessesMasked(initialGuesses, shape):
+    if initialGuesses is None:
+        return ma.masked_all(shape)
+    return unknownsMasked(initialGuesses)
+
+
+def setConcentrations(
+    titration,
+    freeNames,
+    totalConcs,
+    initialGuesses=None,
+    linkUnknowns=True,
+    concsUnit="M",
+):
+    # totalConcs has a row for each addition, and a column for each component.
+    # concsUnit is only used to display the concentrations.
+    totalConcs = unknownsMasked(totalConcs)
+    return setStrategy(
+        titration,
+        "totalConcentrations",
+        "Concentrations",
+        unknownTotalConcsLinked=linkUnknowns,
+        concsUnit=concsUnit,
+        totalConcs=totalConcs,
+        totalConcsGuesses=initialGuessesMasked(initialGuesses, totalConcs.shape),
+        freeNames=np.asarray(freeNames),
+    )
+
+
+def setVolumes(
+    titration,
+    freeNames,
+    stockConcs,
+    volumes,
+    stockTitles=None,
+    initialGuesses=None,
+    linkUnknowns=True,
+    concsUnit="M",
+    volumesUnit="L",
+):
+    # stockConcs has a row for each component and a column for each stock, and volumes
+    # has the cumulative volume of each stock added at each addition.
+    stockConcs = unknownsMasked(stockConcs)
+    if stockTitles is None:
+        stockTitles = [f"Stock {i + 1}" for i in range(stockConcs.shape[1])]
+    return setStrategy(
+        titration,
+        "totalConcentrations",
+        "Volumes",
+        stockTitles=np.asarray(stockTitles),
+        unknownTotalConcsLinked=linkUnknowns,
+        concsUnit=concsUnit,
+        stockConcs=stockConcs,
+        stockConcsGuesses=initialGuessesMasked(initialGuesses, stockConcs.shape),
+        volumesUnit=volumesUnit,
+        volumes=np.asarray(volumes, dtype=float),
+        freeNames=np.asarray(freeNames),
+    )
+
+
+def setStoichiometries(titration, stoichiometries):
+    # Each row is a complex, with the number of each component in it, or -1 for
+    # polymers.
+    strategy = speciation.SpeciationCustom(titration)
+    strategy.stoichiometries = np.asarray(stoichiometries, dtype=int)
+    strategy.checkAttributes()
+    titration.speciation = strategy
+    return strategy
+
+
+def setKs(titration, known={}, initial={}):
+    # known and initial map the names of the Ks, as in speciation.variableNames, to
+    # their fixed values and initial guesses. Ks that aren't known are optimised.
+    kNames = list(titration.speciation.variableNames)
+    for name in list(known) + list(initial):
+        if name not in kNames:
+            raise ValueError(f"Unknown K {name}, must be one of: {', '.join(kNames)}")
+    strategy = equilibriumConstants.GetKsKnown(titration)
+    strategy.knownKs = unknownsMasked([known.get(name, np.nan) for name in kNames])
+    strategy.initialKs = unknownsMasked([initial.get(name, np.nan) for name in kNames])
+    strategy.checkAttributes()
+    titration.equilibriumConstants = strategy
+    return strategy
+
+
+def setContributors(
+    titration, contributorsMatrix, outputNames, contributorsCountPerMolecule=None
+):
+    # Each row of contributorsMatrix is a state with its own spectrum, with the number
+    # of that state in each species.
+    contributorsMatrix = np.atleast_2d(np.asarray(contributorsMatrix, dtype=int))
+    if contributorsCountPerMolecule is None:
+        contributorsCountPerMolecule = [contributorsMatrix.shape[0]]
+    strategy = contributors.ContributorConcsCustom(titration)
+    strategy.contributorsMatrix = contributorsMatrix
+    strategy.outputNames = np.asarray(outputNames)
+    strategy.contributorsCountPerMolecule = np.asarray(contributorsCountPerMolecule)
+    strategy.checkAttributes()
+    titration.contributors = strategy
+    return strategy
+
+
+def fitModel(titration):
+    # Fits the model and returns the fitted variables, in the same order as
+    # equilibriumConstants.variableNames followed by totalConcentrations.variableNames.
+    if titration.totalConcentrations is None:
+        raise ValueError("The total concentrations must be set before fitting.")
+    titration.fitData()
+    return titration.fitResult
@@ -0,0 +1,75 @@
+import numpy as np
+
+from .strategy import Strategy
+
+
+class ContributingSpecies(Strategy):
+    requiredAttributes = ("filter",)
+
+    # If set by a subclass to an index, then contributors.py will determine the default
+    # number of contributing states in each species from the stoichiometry of that
+    # molecule.
+    singleMoleculeIndex = None
+
+    def mapContributorsToSignals(self, contributorConcs):
+        if contributorConcs.ndim == 2:
+            return contributorConcs
+        elif contributorConcs.ndim == 3:
+            return contributorConcs[self.signalToMoleculeMap, :, :]
+
+    def run(self):
+        return self.filter
+
+
+class GetContributingSpeciesSingle(ContributingSpecies):
+    requiredAttributes = ContributingSpecies.requiredAttributes + (
+        "singleMoleculeIndex",
+    )
+
+    @property
+    def filter(self):
+        return self.titration.speciation.outputStoichiometries[
+            :, self.singleMoleculeIndex
+        ].astype(bool)
+
+
+class GetContributingSpeciesHost(GetContributingSpeciesSingle):
+    singleMoleculeIndex = 0
+
+
+class GetContributingSpeciesAll(ContributingSpecies):
+    @property
+    def filter(self):
+        return np.ones(self.titration.speciation.outputCount, dtype=bool)
+
+
+class GetContributingSpeciesCustom(ContributingSpecies):
+    popupAttributes = ("filter",)
+
+
+class GetContributingSpeciesPerSignal(ContributingSpecies):
+    popupAttributes = ("signalToMoleculeMap",)
+
+    @property
+    def singleMoleculeIndex(self):
+        return np.arange(self.titration.speciation.freeCount)
+
+    @property
+    def filter(self):
+        # rows are all contributing molecules, columns are the corresponding
+        # contributing species
+        return (
+            self.titration.speciation.outputStoichiometries[
+                :, range(self.titration.speciation.freeCount)
+            ]
+            .astype(bool)
+            .T
+        )
+
+
+strategies = {
+    "Only species containing Host": GetContributingSpeciesHost,
+    "All species": GetContributingSpeciesAll,
+    "Custom": GetContributingSpeciesCustom,
+    "Custom, different per signal": GetContributingSpeciesPerSignal,
+}
@@ -0,0 +1,275 @@
+import math
+
+import numpy as np
+
+from .strategy import Strategy
+
+
+class Contributors:
+    requiredAttributes = ()
+
+
+class ContributorConcs(Strategy):
+    requiredAttributes = (
+        "contributorsMatrix",
+        "outputNames",
+        "contributorsCountPerMolecule",
+    )
+
+    def run(self, speciesConcs):
+        return (
+            speciesConcs @ self.contributorsMatrix.T,
+            self.contributorsCountPerMolecule,
+        )
+
+
+class ContributorConcsAll(ContributorConcs):
+    @property
+    def outputNames(self):
+        singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+        filter = self.titration.contributingSpecies.filter
+        if singleMoleculeIndex is None or type(singleMoleculeIndex) is int:
+            return self.titration.speciation.outputNames[filter]
+        elif type(singleMoleculeIndex) is np.ndarray:
+            names = []
+            for i in singleMoleculeIndex:
+                moleculeName = self.titration.speciation.freeNames[i]
+                allNames = np.array(
+                    [
+                        f"{moleculeName} in {complex}"
+                        for complex in self.titration.speciation.outputNames
+                    ]
+                )
+                allNames[i] = f"Free {moleculeName}"
+                names.extend(allNames[filter[i]])
+            return np.array(names)
+
+    @property
+    def contributorsMatrix(self):
+        singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+        filter = self.titration.contributingSpecies.filter
+        if singleMoleculeIndex is None:
+            return np.diag(filter).astype(int)[filter]
+        elif type(singleMoleculeIndex) is int:
+            return self.matrixFromSingleMolecule(singleMoleculeIndex, filter)
+        elif type(singleMoleculeIndex) is np.ndarray:
+            # The index will currently always be equal to np.arange(freeCount), so a
+            # matrix will be returned for each molecule. It may at some point become
+            # more useful to instead only return matrices for the molecules that have
+            # at least one signal mapped to them.
+            return np.vstack(
+                [
+                    self.matrixFromSingleMolecule(i, filter[i])
+                    for i in singleMoleculeIndex
+                ]
+            )
+
+    @property
+    def contributorsCountPerMolecule(self):
+        singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+        filter = self.titration.contributingSpecies.filter
+        if type(singleMoleculeIndex) is np.ndarray:
+            return np.array(
+                [
+                    self.matrixFromSingleMolecule(i, filter[i]).shape[0]
+                    for i in singleMoleculeIndex
+                ]
+            )
+        else:
+            return np.array([self.contributorsMatrix.shape[0]])
+
+    def matrixFromSingleMolecule(self, index, filter):
+        diagonal = abs(self.titration.speciation.outputStoichiometries[:, index])
+        return np.diag(diagonal)[filter]
+
+
+# TODO: fix for homodimers
+class ContributorConcsIdentical(ContributorConcs):
+    def calculateStates(self):
+        moleculeCount = self.titration.speciation.freeCount
+        freeStates = np.zeros(
+            [self.titration.speciation.outputCount, moleculeCount], dtype=int
+        )
+        boundStates = np.zeros(
+            [self.titration.speciation.outputCount, moleculeCount], dtype=int
+        )
+
+        # for each molecule, the maximum number of bonds it is known to form to each
+        # other molecule
+        # rows are the host molecules, columns are the guest molecules
+        maximumValencyPerGuest = np.zeros([moleculeCount, moleculeCount], dtype=int)
+        # maximum total number of bonds each molecule can form
+        maximumTotalValency = np.zeros(moleculeCount, dtype=int)
+
+        stoichiometries = self.titration.speciation.outputStoichiometries.copy()[
+            self.titration.speciation.freeCount :
+        ]
+        # n-mer means host has n-1 binding sites for binding itself
+        # 1 becomes 0, because that's the host molecule itself
+        # -1 becomes -2 becomes 2, as polymers imply 2 binding sites
+        guestStoichiometries = np.repeat(
+            stoichiometries[np.newaxis, :, :], moleculeCount, axis=0
+        )
+        guestStoichiometries[range(moleculeCount), :, range(moleculeCount)] -= 1
+        guestStoichiometries = np.abs(guestStoichiometries)
+
+        # calculate maximum valency per guest and maximum total valency
+        for host in range(moleculeCount):
+            singleHost = np.abs(stoichiometries)[:, host] == 1
+            maximumValencyPerGuest[host] = np.max(
+                guestStoichiometries[host][singleHost, :], axis=0, initial=0
+            )
+
+            # We only consider guests that form binary complexes with the host
+            formsBinaryComplex = np.zeros(moleculeCount, dtype=bool)
+            for guest in range(moleculeCount):
+                binaryComplex = np.zeros(moleculeCount, dtype=int)
+                binaryComplex[host] += 1
+                binaryComplex[guest] += 1
+                formsBinaryComplex[guest] = np.any(
+                    np.all(
+                        # want to match -1 iff host == guest
+                        np.abs(stoichiometries) == binaryComplex,
+                        axis=1,
+                    )
+                )
+            maximumValencyPerGuest[host, ~formsBinaryComplex] = 0
+
+            # Find the maximum number of guests that can bind to one host molecule at
+            # the same time, counting only those guests which can also form binary
+            # complexes with the host.
+            maximumTotalValency[host] = np.max(
+                np.sum(
+                    guestStoichiometries[host][singleHost, :][:, formsBinaryComplex],
+                    axis=1,
+                ),
+                initial=0,
+            )
+
+        # calculate number of free and bound states for each molecule in each complex
+        for host in range(moleculeCount):
+            freeStates[host, host] = maximumTotalValency[host]
+            for index, complex in enumerate(guestStoichiometries[host]):
+                if stoichiometries[index, host] < 1:
+                    # complexes handled separately below
+                    continue
+                else:
+                    hostStoichiometry = stoichiometries[index, host]
+                    maximumTotalValencyHost = (
+                        maximumTotalValency[host] * hostStoichiometry
+                    )
+                valencyPerGuest = np.minimum(
+                    complex * maximumValencyPerGuest[:, host],
+                    maximumValencyPerGuest[host, :] * hostStoichiometry,
+                )
+                totalValency = np.minimum(
+                    np.sum(valencyPerGuest),
+                    maximumTotalValencyHost,
+                )
+                freeStates[moleculeCount + index, host] = (
+                    maximumTotalValencyHost - totalValency
+                )
+                boundStates[moleculeCount + index, host] = totalValency
+
+            complexIndices = np.where(stoichiometries[:, host] < 0)[0]
+            terminal = complexIndices[0::2]
+            internal = complexIndices[1::2]
+            # Crude assumption for polymers with odd numbers of binding sites - users
+            # are really expected to manually enter a contributors table in such cases.
+            freeStates[moleculeCount + terminal, host] = math.ceil(
+                maximumTotalValency[host] / 2
+            )
+            boundStates[moleculeCount + terminal, host] = math.floor(
+                maximumTotalValency[host] / 2
+            )
+            freeStates[moleculeCount + internal, host] = 0
+            boundStates[moleculeCount + internal, host] = maximumTotalValency[host]
+
+        return freeStates, boundStates
+
+    def calculateContributorsMatrixAndNames(self):
+        freeStates, boundStates = self.calculateStates()
+        allStates = np.empty(
+            [
+                2 * self.titration.speciation.freeCount,
+                self.titration.speciation.outputCount,
+            ],
+            dtype=int,
+        )
+        allStates[0::2] = freeStates.T
+        allStates[1::2] = boundStates.T
+
+        allNames = np.concatenate(
+            [
+                [f"Free {molecule} site", f"Bound {molecule} site"]
+                for molecule in self.titration.speciation.freeNames
+            ]
+        )
+
+        singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+        if singleMoleculeIndex is None:
+            relevantStates = allStates[:, self.titration.contributingSpecies.filter]
+            rowFilter = np.any(relevantStates, axis=1)
+        elif type(singleMoleculeIndex) is int:
+            rowFilter = np.array([2 * singleMoleculeIndex, 2 * singleMoleculeIndex + 1])
+        elif type(singleMoleculeIndex) is np.ndarray:
+            rowFilter = np.empty(2 * len(singleMoleculeIndex), dtype=int)
+            rowFilter[0::2] = 2 * singleMoleculeIndex
+            rowFilter[1::2] = 2 * singleMoleculeIndex + 1
+        return allStates[rowFilter], allNames[rowFilter]
+
+    # Calculating the states is slow, and they only depend on the speciation, the
+    # components and the contributing species, so are kept until one of those changes.
+    _contributors = (None, None)
+
+    def getContributors(self):
+        key = self.revisionKey(
+            self.titration.speciation,
+            self.titration.totalConcentrations,
+            self.titration.contributingSpecies,
+        )
+        cachedKey, contributors = self._contributors
+        if cachedKey != key:
+            matrix, names = self.calculateContributorsMatrixAndNames()
+            singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+            if type(singleMoleculeIndex) is np.ndarray:
+                countPerMolecule = np.array([2] * len(singleMoleculeIndex))
+            else:
+                countPerMolecule = np.array([matrix.shape[0]])
+            contributors = (matrix, names, countPerMolecule)
+            self._contributors = (key, contributors)
+        return contributors
+
+    def run(self, speciesConcs):
+        matrix, _, countPerMolecule = self.getContributors()
+        return speciesConcs @ matrix.T, countPerMolecule
+
+    @property
+    def outputNames(self):
+        _, names, _ = self.getContributors()
+        return names
+
+    @property
+    def contributorsMatrix(self):
+        matrix, _, _ = self.getContributors()
+        return matrix
+
+    @property
+    def contributorsCountPerMolecule(self):
+        _, _, countPerMolecule = self.getContributors()
+        return countPerMolecule
+
+
+class ContributorConcsCustom(ContributorConcs):
+    popupAttributes = (
+        "contributorsMatrix",
+        "outputNames",
+        "contributorsCountPerMolecule",
+    )
+
+
+strategies = {
+    "All species have different spectra": ContributorConcsAll,
+    "All binding sites have identical spectra": ContributorConcsIdentical,
+    "Custom": ContributorConcsCustom,
+}
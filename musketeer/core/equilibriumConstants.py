@@ -0,0 +1,153 @@
+import numpy as np
+from numpy import ma
+
+from .strategy import Strategy
+
+DEFAULT_INITIAL_GUESS = 1000
+
+
+class EquilibriumConstants(Strategy):
+    requiredAttributes = (
+        "kNames",
+        "knownKs",
+        "initialKs",
+    )
+
+    @property
+    def initialKs(self):
+        return self._initialKs
+
+    @initialKs.setter
+    def initialKs(self, value):
+        if not isinstance(value, ma.MaskedArray):
+            value = ma.masked_invalid(value)
+        self._initialKs = value
+
+    @property
+    def outputNames(self):
+        return self.titration.speciation.variableNames
+
+    @property
+    def knownMask(self):
+        return ma.getmaskarray(self.knownKs)
+
+    @property
+    def variableNames(self):
+        return self.kNames[self.knownMask]
+
+    @property
+    def variableInitialGuesses(self):
+        return self.initialKs[self.knownMask].filled(DEFAULT_INITIAL_GUESS)
+
+    def filledKs(self, kVars):
+        # The known Ks with the unknown ones set to the variables, as a plain array so
+        # that the speciation isn't calculated with masked arrays.
+        knownKs = self.knownKs
+        ks = np.array(ma.getdata(knownKs), dtype=float)
+        ks[ma.getmaskarray(knownKs)] = kVars
+        return ks
+
+    def run(self, kVars):
+        return self.filledKs(kVars)
+
+
+class GetKsAll(EquilibriumConstants):
+    # when every equilibrium constant is unknown and independent
+    @property
+    def kNames(self):
+        return self.titration.speciation.variableNames
+
+    @property
+    def knownKs(self):
+        return ma.array(np.empty(self.outputCount), mask=True)
+
+    @property
+    def initialKs(self):
+        return ma.array(np.empty(self.outputCount), mask=True)
+
+
+# TODO: make trimerIndices work with polymers
+class GetKsNonspecific(EquilibriumConstants):
+    @property
+    def kNames(self):
+        return self.titration.speciation.variableNames
+
+    @property
+    def knownKs(self):
+        knownKs = ma.masked_array(np.empty(self.outputCount))
+        knownKs[self.trimerIndices] = 0.001
+        knownKs[~self.trimerIndices] = ma.masked
+        return knownKs
+
+    @property
+    def initialKs(self):
+        return ma.array(np.empty(self.outputCount), mask=True)
+
+
+class GetKsCustom(EquilibriumConstants):
+    popupAttributes = (
+        "ksMatrix",
+        "statisticalFactors",
+        "kNames",
+        "knownKs",
+        "initialKs",
+    )
+
+    def run(self, kVars):
+        # microKs as a column vector, with the unknown values filled in
+        microKs = self.filledKs(kVars)[:, np.newaxis]
+
+        # perform the calculation as previewed in the popup, where blank cells in the
+        # table are masked and mean a microK isn't involved
+        ksMatrix = ma.filled(self.ksMatrix, 0)
+        statisticalFactors = ma.getdata(self.statisticalFactors)
+        globalKs = statisticalFactors * np.prod(microKs**ksMatrix, 0)
+        return globalKs
+
+
+class GetKsNoCooperativity(GetKsCustom):
+    Popup = None
+    popupAttributes = ()
+    requiredAttributes = tuple(
+        set(EquilibriumConstants.requiredAttributes) | set(GetKsCustom.popupAttributes)
+    )
+
+    @property
+    def statisticalFactors(self):
+        statisticalFactors, _, _ = self.titration.speciation.noCooperativityValues
+        return statisticalFactors
+
+    @property
+    def ksMatrix(self):
+        _, ksMatrix, _ = self.titration.speciation.noCooperativityValues
+        return ksMatrix
+
+    @property
+    def kNames(self):
+        _, _, kNames = self.titration.speciation.noCooperativityValues
+        return kNames
+
+    @property
+    def knownKs(self):
+        return ma.array(np.empty(len(self.kNames)), mask=True)
+
+    @property
+    def initialKs(self):
+        return ma.array(np.empty(len(self.kNames)), mask=True)
+
+
+class GetKsKnown(EquilibriumConstants):
+    popupAttributes = ("knownKs", "initialKs")
+
+    @property
+    def kNames(self):
+        return self.titration.speciation.variableNames
+
+
+strategies = {
+    "No, optimise all Ks": GetKsAll,
+    "Assume no cooperativity": GetKsNoCooperativity,
+    # "Assume second binding weak": GetKsNonspecific,
+    "Fix some known Ks": GetKsKnown,
+    "Custom": GetKsCustom,
+}
@@ -0,0 +1,201 @@
+import warnings
+from copy import deepcopy
+
+import numpy as np
+import packaging.version
+from numpy import ma
+
+from .titration import Titration, strategyModules, titrationAttributes
+
+# Magic value indicating that the data in a .fit file should be copied from the original
+# titration
+COPY_ORIGINAL_ARRAY = "COPY_OGIRINAL_ARRAY"
+
+
+def readFitFile(titration):
+    # Returns the original titration and a list of (name, fit) tuples from an opened
+    # .fit file.
+    originalTitration = Titration()
+    fileVersion = packaging.version.parse(titration[".version"].item())
+    for attribute in titrationAttributes:
+        try:
+            data = titration[f".original.{attribute}"]
+        except KeyError:
+            continue
+        else:
+            if data.shape == ():
+                data = data.item()
+
+        try:
+            mask = titration[f".original.{attribute}.mask"]
+        except KeyError:
+            pass
+        else:
+            if mask.shape == ():
+                mask = mask.item()
+            data = ma.masked_array(data, mask)
+        setattr(originalTitration, attribute, data)
+
+    fits = []
+    for name in titration[".fits"]:
+        fit = Titration()
+
+        for attribute in titrationAttributes:
+            try:
+                data = titration[f"{name}.{attribute}"]
+            except KeyError:
+                # Backwards compatibility:
+                # Before version 1.4.0, last free and bound concs were stored
+                # separately.
+                if (
+                    fileVersion < packaging.version.parse("1.4.0")
+                    and attribute == "lastSpeciesConcs"
+                ):
+                    try:
+                        freeConcs = titration[f"{name}.lastFreeConcs"]
+                        boundConcs = titration[f"{name}.lastBoundConcs"]
+                    except KeyError:
+                        continue
+                    data = np.hstack([freeConcs, boundConcs])
+                else:
+                    continue
+            else:
+                if data.shape == ():
+                    data = data.item()
+
+            if type(data) is type(COPY_ORIGINAL_ARRAY) and data == COPY_ORIGINAL_ARRAY:
+                data = deepcopy(getattr(originalTitration, attribute))
+            else:
+                try:
+                    mask = titration[f"{name}.{attribute}.mask"]
+                except KeyError:
+                    pass
+                else:
+                    if mask.shape == ():
+                        mask = mask.item()
+                    data = ma.masked_array(data, mask)
+            setattr(fit, attribute, data)
+
+        for attributeName, module in strategyModules.items():
+            # in case no valid strategy is present in the loaded file
+            setattr(fit, attributeName, None)
+
+            try:
+                SelectedStrategy = module.strategies[
+                    titration[f"{name}.{attributeName}"].item()
+                ]
+            except KeyError:
+                # no stategy selected
+                continue
+
+            selectedStrategy = SelectedStrategy(fit)
+            for popupAttributeName in selectedStrategy.popupAttributes:
+                key = f"{name}.{attributeName}.{popupAttributeName}"
+                try:
+                    data = titration[key]
+                except KeyError:
+                    # backwards compatibility:
+                    # version 1.2.0 moved freeNames from speciation to
+                    # totalConcentrations
+                    if (
+                        fileVersion < packaging.version.parse("1.2.0")
+                        and attributeName == "totalConcentrations"
+                        and popupAttributeName == "freeNames"
+                    ):
+                        if (key := f"{name}.speciation.freeNames") in titration:
+                            # freeNames set in custom speciation
+                            data = titration[key]
+                        else:
+                            # could be ["Host"] or ["Host", "Guest"]
+                            if (
+                                key := f"{name}.totalConcentrations.stockConcs"
+                            ) in titration:
+                                freeCount = titration[key].shape[0]
+                            elif (
+                                key := f"{name}.totalConcentrations.totalConcs"
+                            ) in titration:
+                                freeCount = titration[key].shape[1]
+                            else:
+                                continue
+                            data = np.array(["Host", "Guest"][:freeCount])
+                    # 1.4.1 added unknown total concentrations without volumes
+                    elif (
+                        fileVersion < packaging.version.parse("1.4.1")
+                        and attributeName == "totalConcentrations"
+                        and popupAttributeName == "unknownTotalConcsLinked"
+                    ):
+                        data = True
+                    # 1.6.0 added initial guesses for unknown concentrations
+                    elif (
+                        fileVersion < packaging.version.parse("1.6.0")
+                        and attributeName == "totalConcentrations"
+                        and popupAttributeName == "stockConcsGuesses"
+                    ):
+                        if (
+                            key := f"{name}.totalConcentrations.stockConcs"
+                        ) in titration:
+                            data = ma.masked_all_like(titration[key])
+                    elif (
+                        fileVersion < packaging.version.parse("1.6.0")
+                        and attributeName == "totalConcentrations"
+                        and popupAttributeName == "totalConcsGuesses"
+                    ):
+                        if (
+                            key := f"{name}.totalConcentrations.totalConcs"
+                        ) in titration:
+                            data = ma.masked_all_like(titration[key])
+
+                    else:
+                        continue
+                else:
+                    if data.shape == ():
+                        data = data.item()
+
+                try:
+                    mask = titration[f"{key}.mask"]
+                except KeyError:
+                    pass
+                else:
+                    if mask.shape == ():
+                        mask = mask.item()
+                    data = ma.masked_array(data, mask)
+                setattr(selectedStrategy, popupAttributeName, data)
+
+            try:
+                selectedStrategy.checkAttributes()
+            except NotImplementedError:
+                # required attribute missing
+                continue
+            setattr(fit, attributeName, selectedStrategy)
+
+        # Backwards compatibility: from version 1.9.1 onwards, after a fit has
+        # been calculated, interpolated concentrations are also calculated and
+        # stored in the Titration object.
+        if fileVersion < packaging.version.parse("1.9.1") and hasattr(
+            fit, "lastFittedCurves"
+        ):
+            try:
+                fit.calculateInterpolatedConcsAndSpectra()
+            except Exception as e:
+                try:
+                    fit.interpolatedTotalConcs = fit.lastTotalConcs
+                    fit.interpolatedSpeciesConcs = fit.lastSpeciesConcs
+                    fit.interpolatedFittedCurves = fit.lastFittedCurves
+                except AttributeError:
+                    # Other required attributes missing, so the relevant output
+                    # tab will already show a warning.
+                    pass
+                else:
+                    warnings.warn(
+                        f"Could not calculate interpolated concentrations and spectra for fit '{name}'.\nTo show smooth curves, please manually press the 'Fit' button.\nCause: {str(e)}"
+                    )
+
+        fits.append((name, fit))
+
+    return originalTitration, fits
+
+
+def loadFitFile(filePath):
+    # Returns the original titration and a list of (name, fit) tuples from a .fit file.
+    with np.load(filePath, allow_pickle=False) as titration:
+        return readFitFile(titration)
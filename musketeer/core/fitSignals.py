@@ -0,0 +1,182 @@
+from abc import abstractmethod
+
+import numpy as np
+from numpy import ma
+
+from .strategy import Strategy
+
+
+def dotIgnoringNan(a, b):
+    # Matrix product that ignores nan values, like ma.dot does for masked values, so
+    # that the results can be kept as plain arrays: nan entries of a and b are treated
+    # as 0, and entries of the product with only nan terms are nan.
+    aValid = np.isfinite(a)
+    bValid = np.isfinite(b)
+    if aValid.all() and bValid.all():
+        return np.dot(a, b)
+    product = np.dot(np.where(aValid, a, 0), np.where(bValid, b, 0))
+    product[~np.dot(aValid, bValid)] = np.nan
+    return product
+
+
+class FitSignals(Strategy):
+    requiredAttributes = ()
+
+    @abstractmethod
+    def leastSquares(self, x, y):
+        pass
+
+    def run(self, contributorConcs, knownSpectra):
+        # Unknown spectra, and spectra that can't be fitted, are returned as nan.
+        processedData = self.titration.processedData
+        dataMask = ma.getmaskarray(processedData)
+        unknownSpectraMask = ma.getmaskarray(knownSpectra)
+        knownSpectra = np.where(unknownSpectraMask, np.nan, ma.getdata(knownSpectra))
+
+        hasMissingDatapoints = dataMask.any()
+        hasKnownSpectra = not unknownSpectraMask.all()
+        hasDifferentSignalsPerMolecule = hasattr(
+            self.titration.contributingSpecies, "signalToMoleculeMap"
+        )
+
+        if hasMissingDatapoints or hasKnownSpectra or hasDifferentSignalsPerMolecule:
+            # need to process each signal separately
+            explainedData = np.dot(
+                contributorConcs, np.where(unknownSpectraMask, 0, knownSpectra)
+            )
+            unexplainedData = ma.getdata(processedData) - explainedData
+
+            fittedSpectra = knownSpectra.copy()
+
+            signalsCount = unexplainedData.shape[1]
+            contributorsCount = self.titration.contributors.outputCount
+            residuals = np.empty(signalsCount)
+
+            if hasattr(self.titration.contributingSpecies, "signalToMoleculeMap"):
+                splitIndices = np.cumsum(
+                    self.titration.contributors.contributorsCountPerMolecule
+                )[:-1]
+
+                # For each signal, take only the relevant contributors' concentrations
+                contributorsSlicePerMolecule = np.split(
+                    np.arange(contributorsCount), splitIndices
+                )
+                contributorsSlicePerSignal = [
+                    contributorsSlicePerMolecule[molecule]
+                    for molecule in self.titration.contributingSpecies.signalToMoleculeMap
+                ]
+            else:
+                contributorsSlicePerSignal = [
+                    np.arange(contributorsCount)
+                ] * signalsCount
+
+            for index, (
+                signalData,
+                signalDataMask,
+                signalUnknownSpectraMask,
+                signalContributorsSlice,
+            ) in enumerate(
+                zip(
+                    unexplainedData.T,
+                    dataMask.T,
+                    unknownSpectraMask.T,
+                    contributorsSlicePerSignal,
+                )
+            ):
+                signalDataFilter = ~signalDataMask
+                unknownSpectraSlice = signalContributorsSlice[
+                    signalUnknownSpectraMask[signalContributorsSlice]
+                ]
+                relevantContributorConcs = contributorConcs[signalDataFilter, :][
+                    :, unknownSpectraSlice
+                ]
+
+                fittedSpectra[unknownSpectraSlice, index], residuals[index] = (
+                    self.leastSquares(
+                        relevantContributorConcs, signalData[signalDataFilter]
+                    )
+                )
+
+            # Make the smooth curves ignore unfitted spectra, rather than treating them
+            # as zeros.
+            fittedCurves = dotIgnoringNan(contributorConcs, fittedSpectra)
+        else:
+            # can process all signals at once
+            fittedSpectra, residuals = self.leastSquares(
+                contributorConcs, ma.getdata(processedData)
+            )
+            fittedCurves = dotIgnoringNan(contributorConcs, fittedSpectra)
+
+        return fittedSpectra, residuals, fittedCurves
+
+
+class FitSignalsUnconstrained(FitSignals):
+    def leastSquares(self, x, y):
+        # For almost-singular matrices, the default "gelsd" driver can sometimes return
+        # the correct residuals, but an incorrect value of b, which gives much worse
+        # residuals when calculating x @ b - y. So instead, use "gelsy", and calculate
+        # the residuals manually.
+        from scipy.linalg import lstsq
+
+        b, _, _, _ = lstsq(x, y, cond=None, lapack_driver="gelsy")
+        residuals = np.linalg.norm(x @ b - y, ord=2, axis=0) ** 2
+        return b, residuals
+
+
+class FitSignalsConstrained(FitSignals):
+    requiredAttributes = FitSignals.requiredAttributes + ("signalConstraints",)
+
+    def leastSquares(self, x, y):
+        if y.ndim == 1:
+            return self.leastSquaresSingle(x, y)
+        else:
+            b, residuals = zip(*[self.leastSquaresSingle(x, col) for col in y.T])
+            return np.array(b).T, np.array(residuals)
+
+    def leastSquaresSingle(self, x, y):
+        from scipy.optimize import lsq_linear
+
+        result = lsq_linear(
+            x,
+            y,
+            self.signalConstraints,
+            method="bvls",
+        )
+        # cost is 0.5 * ||A x - b||**2
+        return result.x, 2 * result.cost
+
+
+class FitSignalsNonnegative(FitSignalsConstrained):
+    signalConstraints = np.array([0, np.inf])
+
+
+class FitSignalsCustom(FitSignalsConstrained):
+    popupAttributes = ("signalConstraints",)
+
+
+class FitSignalsODR(FitSignals):
+    def run(self, contributorConcs, knownSpectra):
+        X = np.asarray(contributorConcs)
+        Y = np.asarray(self.titration.processedData)
+        relativeWeightYOverX = 100
+        scaling = (Y.mean() * Y.size) / (X.mean() * X.size) / relativeWeightYOverX
+        m, n = X.shape
+        XY = np.hstack([X, Y / scaling])
+        U, s, Vh = np.linalg.svd(XY)
+        V = Vh.T
+        Vxy = V[:n, n:]
+        Vyy = V[n:, n:]
+        B = scaling * -Vxy @ np.linalg.inv(Vyy)
+        EF = -XY @ V[:, n:] @ V[:, n:].T
+        E, F = EF[:, :n], EF[:, n:]
+        norm = np.linalg.norm(EF, ord="fro")
+        fittedCurves = X @ B
+        return B, norm**2, fittedCurves
+
+
+strategies = {
+    "No": FitSignalsUnconstrained,
+    "Nonnegative": FitSignalsNonnegative,
+    "Custom constraints": FitSignalsCustom,
+    # "USE ODR": FitSignalsODR,
+}
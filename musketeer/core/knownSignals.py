@@ -0,0 +1,58 @@
+import numpy as np
+from numpy import ma
+
+from .strategy import Strategy
+
+
+class KnownSignals(Strategy):
+    requiredAttributes = ("knownSpectra",)
+
+    def run(self):
+        return self.knownSpectra
+
+
+class GetKnownSpectra(KnownSignals):
+    popupAttributes = ("knownSpectra", "spectraTitles", "signalTitles")
+
+    @property
+    def knownSpectra(self):
+        currentContributors = self.titration.contributors.outputNames
+        lastContributors = self.spectraTitles
+        lastSignals = self.signalTitles
+        currentSignals = self.titration.processedSignalTitlesStrings
+
+        if not set(currentSignals).issubset(lastSignals):
+            return ma.masked_all((len(currentContributors), len(currentSignals)))
+        relevantSignalIndices = [
+            np.where(lastSignals == signal)[0][0] for signal in currentSignals
+        ]
+        relevantSignals = self._knownSpectra[:, relevantSignalIndices]
+
+        output = ma.masked_all((len(currentContributors), len(currentSignals)))
+        for spectrumTitle, spectrum in zip(lastContributors, relevantSignals):
+            if spectrumTitle in currentContributors:
+                output[np.where(currentContributors == spectrumTitle)[0][0], :] = (
+                    spectrum
+                )
+        return output
+
+    @knownSpectra.setter
+    def knownSpectra(self, value):
+        self._knownSpectra = value
+
+
+class GetAllSpectra(KnownSignals):
+    @property
+    def knownSpectra(self):
+        return ma.masked_all(
+            (
+                self.titration.contributors.outputCount,
+                self.titration.processedSignalCount,
+            )
+        )
+
+
+strategies = {
+    "Optimise all spectra": GetAllSpectra,
+    "Specify some known spectra": GetKnownSpectra,
+}
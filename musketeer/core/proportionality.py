@@ -0,0 +1,51 @@
+from abc import abstractmethod
+
+import numpy as np
+
+from .strategy import Strategy
+
+
+class Proportionality(Strategy):
+    requiredAttributes = ()
+
+    @abstractmethod
+    def run(self, contributorConcs, contributorsCountPerMolecule):
+        pass
+
+
+class GetConcs(Proportionality):
+    def run(self, contributorConcs, contributorsCountPerMolecule):
+        return contributorConcs
+
+
+class GetFraction(Proportionality):
+    # The first index and number of contributors of each molecule, which only change
+    # when the contributors do, so are kept for the last contributorsCountPerMolecule.
+    _segments = (None, None, None)
+
+    def segments(self, contributorsCountPerMolecule):
+        key = tuple(np.ravel(contributorsCountPerMolecule).tolist())
+        if self._segments[0] != key:
+            counts = np.array(key, dtype=int)
+            starts = np.cumsum(counts) - counts
+            # reduceat can't sum over empty segments, so leave out molecules without
+            # any contributors.
+            hasContributors = counts > 0
+            self._segments = (key, starts[hasContributors], counts[hasContributors])
+        _, starts, counts = self._segments
+        return starts, counts
+
+    def run(self, contributorConcs, contributorsCountPerMolecule):
+        # Works on stacked concentration matrices, with the contributors along the
+        # last axis.
+        starts, counts = self.segments(contributorsCountPerMolecule)
+        totalConcs = np.add.reduceat(contributorConcs, starts, axis=-1)
+        # Molecules with no total concentration have nan fractions, which are ignored
+        # when calculating the signals.
+        return contributorConcs / np.repeat(totalConcs, counts, axis=-1)
+
+
+strategies = {
+    "Concentration (slow exchange)": GetConcs,
+    "Mole fraction (fast exchange)": GetFraction,
+}
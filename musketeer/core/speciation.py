@@ -0,0 +1,1351 @@
+import math
+import warnings
+from abc import abstractmethod
+from functools import partial
+
+import numpy as np
+from numpy import ma
+
+from .strategy import Strategy
+
+LN_10 = np.log(10)
+
+
+def stoichiometriesToBoundNames(freeNames, stoichiometries):
+    trans = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
+
+    boundNames = []
+    for row in stoichiometries:
+        boundName = ""
+        for freeName, stoichiometry in zip(freeNames, row):
+            if stoichiometry == 0:
+                continue
+
+            if boundName != "":
+                boundName += "·"
+
+            if stoichiometry == 1:
+                boundName += freeName
+            elif stoichiometry == -1:
+                boundName += freeName + "ₙ"
+            else:
+                boundName += freeName + str(stoichiometry).translate(trans)
+
+        allNames = set(freeNames) | set(boundNames)
+        if boundName in allNames:
+            copyIndex = 2
+            while boundName + f" ({copyIndex})" in allNames:
+                copyIndex += 1
+            boundName += f" ({copyIndex})"
+
+        boundNames.append(boundName)
+    return np.array(boundNames)
+
+
+def smallestNonNegativeRoots(coefficients):
+    # Finds the smallest non-negative real root of each polynomial, with coefficients
+    # along the last axis in order of decreasing power, or nan if there is none. As in
+    # np.roots, leading zeros are dropped, and the roots are the eigenvalues of the
+    # companion matrices, which are found for all polynomials of a degree at once.
+    coefficients = np.asarray(coefficients, dtype=float)
+    maxDegree = coefficients.shape[-1] - 1
+    nonZero = coefficients != 0
+    leadingZeros = np.where(
+        np.any(nonZero, axis=-1), np.argmax(nonZero, axis=-1), maxDegree
+    )
+    output = np.full(coefficients.shape[:-1], np.nan)
+    for degree in range(1, maxDegree + 1):
+        select = leadingZeros == maxDegree - degree
+        if not np.any(select):
+            continue
+        polynomials = coefficients[select, maxDegree - degree :]
+
+        companion = np.zeros(polynomials.shape[:-1] + (degree, degree))
+        companion[..., 1:, :-1] = np.eye(degree - 1)
+        companion[..., 0, :] = -polynomials[..., 1:] / polynomials[..., :1]
+        roots = np.linalg.eigvals(companion)
+
+        real = (np.imag(roots) == 0) & (np.real(roots) >= 0)
+        smallest = np.where(real, np.real(roots), np.inf).min(axis=-1)
+        output[select] = np.where(np.isfinite(smallest), smallest, np.nan)
+    return output
+
+
+class ComplexSpeciationMixin:
+    @property
+    def complexIndices(self):
+        return ~np.any(self.stoichiometries < 0, 1)
+
+    @property
+    def complexCount(self):
+        return np.count_nonzero(self.complexIndices)
+
+    @property
+    def complexStoichiometries(self):
+        return self.stoichiometries[self.complexIndices]
+
+    @property
+    def complexBoundNames(self):
+        return stoichiometriesToBoundNames(self.freeNames, self.complexStoichiometries)
+
+    def complexFormsBinaryComplex(self, i, j):
+        if i == j:
+            desiredRow = [2 if index == i else 0 for index in range(self.freeCount)]
+        else:
+            desiredRow = [
+                1 if index in (i, j) else 0 for index in range(self.freeCount)
+            ]
+        return np.any(np.all(self.complexStoichiometries == desiredRow, axis=1))
+
+    @property
+    def complexMaxValencyPerGuest(self):
+        # output[i, j] = the max number of js that can bind to one i
+        output = np.zeros([self.freeCount, self.freeCount], dtype=int)
+        for row in self.complexStoichiometries:
+            if np.count_nonzero(row) == 1:
+                host = guest = np.where(row > 0)[0][0]
+                valency = 1 if row[host] == 1 else 2
+            elif np.count_nonzero(row) == 2 and np.count_nonzero(row == 1) == 1:
+                host = np.where(row == 1)[0][0]
+                guest = np.where(row > 1)[0][0]
+                valency = row[guest]
+            elif np.count_nonzero(row) == 2 and np.count_nonzero(row == 1) == 2:
+                host, guest = np.where(row == 1)[0]
+                valency = 1
+                output[host, guest] = max(output[host, guest], valency)
+                output[guest, host] = max(output[guest, host], valency)
+            else:
+                continue
+            output[host, guest] = max(output[host, guest], valency)
+
+        return output
+
+    def getComplexNoCooperativityValues(self):
+        # Decomposes global Ks into products of microscopic Ks
+
+        # Go through the complexes in order of increasing size, so that we can use
+        # statistical factors of sub-complexes.
+        sortedRowIndices = np.argsort(self.complexStoichiometries.sum(axis=1))
+        M = self.complexStoichiometries[sortedRowIndices]
+
+        statisticalFactors = np.ones(self.complexCount)
+        ksMatrix = np.zeros(
+            [self.complexCount, self.freeCount, self.freeCount], dtype=int
+        )
+        microKsNames = [
+            [f"microK_{i}·{j}" for j in self.freeNames] for i in self.freeNames
+        ]
+
+        for rowIndex, row in enumerate(M):
+            if np.count_nonzero(row) >= 1:
+                statisticalFactor = 1
+                for componentIndex in np.nonzero(row)[0]:
+                    componentStatisticalFactor = 1
+                    # find largest super-complex wrt this component, if it exists
+                    for superRow in M[rowIndex + 1 : :][::-1]:
+                        if (
+                            np.count_nonzero(superRow) == np.count_nonzero(row)
+                            and np.count_nonzero(superRow - row) == 1
+                            and np.nonzero(superRow - row)[0].item() == componentIndex
+                        ):
+                            componentStatisticalFactor = math.comb(
+                                superRow[componentIndex], row[componentIndex]
+                            )
+                            break
+                    # find sub-complex lacking this component
+                    targetSubRow = row.copy()
+                    targetSubRow[componentIndex] = 0
+                    for subRowIndex, subRow in enumerate(M[:rowIndex]):
+                        if np.array_equal(subRow, targetSubRow):
+                            componentStatisticalFactor *= statisticalFactors[
+                                subRowIndex
+                            ]
+                            break
+
+                    statisticalFactor = max(
+                        statisticalFactor, componentStatisticalFactor
+                    )
+                statisticalFactors[rowIndex] = statisticalFactor
+
+            # now calculate the exponents of the microscopic Ks
+            for index, i in enumerate(np.nonzero(row)[0]):
+                for j in np.nonzero(row)[0][index:]:
+                    if not self.complexFormsBinaryComplex(i, j):
+                        continue
+                    if i == j:
+                        # assume dimers form a single bond, while larger complexes are rings
+                        if row[i] == 1:
+                            continue
+                        elif row[i] == 2:
+                            ksMatrix[rowIndex, i, j] = 1
+                        else:
+                            ksMatrix[rowIndex, i, j] = row[i]
+                    else:
+                        maxIBonds = row[i] * self.complexMaxValencyPerGuest[i, j]
+                        maxJBonds = row[j] * self.complexMaxValencyPerGuest[j, i]
+                        maxTotalBonds = row[i] * row[j]
+                        ksMatrix[rowIndex, i, j] = min(
+                            maxIBonds, maxJBonds, maxTotalBonds
+                        )
+
+        # flatten i and j into a single index
+        ksMatrix = ksMatrix.reshape(self.complexCount, self.freeCount**2)
+        microKsNames = np.array(microKsNames).flatten()
+
+        # filter out zero columns
+        nonZeroColumns = np.any(ksMatrix != 0, axis=0)
+        ksMatrix = ksMatrix[:, nonZeroColumns]
+        microKsNames = microKsNames[nonZeroColumns]
+
+        # unsort rows, and transpose Ks matrix to format expected by equilibriumConstants
+        unsortedIndices = np.argsort(sortedRowIndices)
+        return (
+            statisticalFactors[unsortedIndices].copy(),
+            ksMatrix[unsortedIndices].T.copy(),
+            microKsNames,
+        )
+
+    complexVariableNames = complexOutputNames = complexBoundNames
+
+    complexOutputStoichiometries = complexStoichiometries
+
+    def complexFreeToBoundConcs(self, freeConcs, complexKs):
+        return complexKs * np.prod(
+            freeConcs[..., np.newaxis, :] ** self.complexStoichiometries, axis=-1
+        )
+
+    def complexObjective(self, free, complexKs, total, M):
+        return complexKs @ np.prod(free**M, 1)
+
+    # The Jacobians and bounds can be found for many points at once, with the points
+    # along the leading axes of free and total.
+    def complexJacobian(self, free, complexKs, total, M):
+        return (complexKs * np.prod(free[..., np.newaxis, :] ** M, axis=-1)) @ M
+
+    def complexHessian(self, free, complexKs, total, M):
+        return M.T @ (M * np.outer(complexKs * np.prod(free**M, 1), 1 / free))
+
+    def complexGetUpperBounds(self, complexKs, total, M):
+        return total
+
+
+class PolymerSpeciationMixin:
+    @property
+    def componentsThatFormPolymers(self):
+        return np.any(self.stoichiometries < 0, axis=0)
+
+    @property
+    def polymerIndices(self):
+        return np.any(self.stoichiometries < 0, axis=1)
+
+    @property
+    def polymerCount(self):
+        return np.count_nonzero(self.polymerIndices)
+
+    @property
+    def polymerStoichiometries(self):
+        return self.stoichiometries[self.polymerIndices]
+
+    @property
+    def polymerBoundNames(self):
+        return stoichiometriesToBoundNames(self.freeNames, self.polymerStoichiometries)
+
+    @property
+    def polymerVariableNames(self):
+        variableNames = []
+        for row, boundName in zip(self.polymerStoichiometries, self.polymerBoundNames):
+            if np.count_nonzero(row) == 1:
+                variableNames.append(boundName.replace("ₙ", "₂"))
+            variableNames.append(boundName)
+        return np.array(variableNames)
+
+    @property
+    def polymerVariableCount(self):
+        return len(self.polymerVariableNames)
+
+    @property
+    def polymerOutputNames(self):
+        return np.ravel(
+            [
+                [name + " terminal", name + " internal"]
+                for name in self.polymerBoundNames
+            ]
+        )
+
+    @property
+    def polymerOutputCount(self):
+        return len(self.polymerOutputNames)
+
+    @property
+    def polymerOutputStoichiometries(self):
+        # stoichiometries in terminal+internal mode: duplicate each polymer
+        outputStoichiometries = np.empty([self.polymerOutputCount, self.freeCount])
+        M = self.polymerStoichiometries
+        outputStoichiometries[::2] = np.where(M > 0, M / 2, abs(M))  # terminal rows
+        outputStoichiometries[1::2] = np.where(M > 0, 0, abs(M))  # internal rows
+        return outputStoichiometries
+
+    @property
+    def polymerMaxValencyPerGuest(self):
+        # output[i, j] = the max number of js that can bind to one i
+        output = np.zeros([self.freeCount, self.freeCount], dtype=int)
+        for row in self.polymerStoichiometries:
+            if np.count_nonzero(row) == 1:
+                host = guest = np.where(row < 0)[0][0]
+                valency = 2
+            else:
+                continue
+            output[host, guest] = max(output[host, guest], valency)
+
+        return output
+
+    def getPolymerNoCooperativityValues(self):
+        statisticalFactors = np.ones(self.polymerVariableCount)
+        ksMatrix = np.empty((0, self.polymerCount), dtype=int)
+        microKsNames = [f"microK_{name}" for name in self.polymerBoundNames]
+
+        for rowIndex, row in enumerate(self.polymerStoichiometries):
+            outputRow = np.zeros(self.polymerCount, dtype=int)
+            outputRow[rowIndex] = 1
+
+            if np.count_nonzero(row) == 1:
+                # K2 and Kn are identical, i.e. isodesmic polymerisation
+                ksMatrix = np.vstack([ksMatrix, outputRow, outputRow])
+            else:
+                # for end-capped polymers, do not attempt to decompose the Kab
+                ksMatrix = np.vstack([ksMatrix, outputRow])
+
+        return statisticalFactors, ksMatrix.T, np.array(microKsNames)
+
+    def splitPolymerKs(self, polymerKs):
+        k2s = np.zeros(self.freeCount)
+        kns = np.zeros(self.freeCount)
+        kabs = np.ones(self.polymerCount)
+        ks = list(polymerKs)
+        for polymerIndex, row in enumerate(self.polymerStoichiometries):
+            freeIndex = np.where(row < 0)[0][0]
+            if np.count_nonzero(row) == 1:
+                k2s[freeIndex], kns[freeIndex] = ks.pop(0), ks.pop(0)
+            else:
+                kabs[polymerIndex] = ks.pop(0)
+        return k2s, kns, kabs
+
+    def getTerminalInternalConcs(self, freeConcs, k2s, kns, kabs):
+        terminal = 2 * freeConcs**2 * k2s / (1 - freeConcs * kns)
+        internal = freeConcs**3 * k2s * kns / (1 - freeConcs * kns)
+        return terminal, internal
+
+    def polymerFreeToBoundConcs(self, freeConcs, k2s, kns, kabs):
+        # Treat the terminal and internal units as additional "free" components, so
+        # that end-capped polymers can be treated as if they're regular complexes.
+        terminal = 2 * freeConcs**2 * k2s / (1 - freeConcs * kns)
+        internal = freeConcs**3 * k2s * kns / (1 - freeConcs * kns) ** 2
+        componentConcs = np.concatenate([freeConcs, terminal, internal], axis=-1)
+
+        freeCount = self.freeCount
+        polymerCount = self.polymerCount
+
+        # split end group (pos) and polymer (neg) stoichiometries
+        pos = np.where(self.polymerStoichiometries < 0, 0, self.polymerStoichiometries)
+        neg = np.where(
+            self.polymerStoichiometries < 0, np.abs(self.polymerStoichiometries), 0
+        )
+
+        # each polymer gives two outputs: terminal and internal
+        fullStoichiometries = np.zeros([polymerCount * 2, freeCount * 3])
+
+        # terminal and internal states both require end cap concentrations
+        fullStoichiometries[::2, :freeCount] = pos
+        fullStoichiometries[1::2, :freeCount] = pos
+        fullStoichiometries[::2, freeCount : freeCount * 2] = neg
+        fullStoichiometries[1::2, freeCount * 2 :] = neg
+        return np.repeat(kabs, 2) * np.prod(
+            componentConcs[..., np.newaxis, :] ** fullStoichiometries, axis=-1
+        )
+
+    def polymerFreeExactSolutionSingle(self, k2, kn, totalSingle):
+        roots = np.roots(
+            [
+                k2 * kn - kn**2,
+                totalSingle * kn**2 + 2 * kn - 2 * k2,
+                -1 - 2 * totalSingle * kn,
+                totalSingle,
+            ]
+        )
+        real_roots = np.real(roots[np.isreal(roots)])
+        return np.min(real_roots[real_roots > 0])
+
+    @staticmethod
+    def polymerFreeExactSolutionBatch(k2, kn, total):
+        # Solves the same cubic as polymerFreeExactSolutionSingle, for an array of
+        # total concentrations at once, giving nan if there is no root.
+        k2, kn, total = np.broadcast_arrays(k2, kn, total)
+        return smallestNonNegativeRoots(
+            np.stack(
+                [
+                    k2 * kn - kn**2,
+                    total * kn**2 + 2 * kn - 2 * k2,
+                    -1 - 2 * total * kn,
+                    total,
+                ],
+                axis=-1,
+            )
+        )
+
+    def polymerObjective(self, free, k2s, kns, kabs, total, M):
+        if self.polymerCount == 0:
+            return 0.0
+        pos = np.where(M < 0, 0, M)
+        neg = np.where(M < 0, np.abs(M), 0)
+        polymerWithoutFactorOfN = free**2 * k2s / (1 - free * kns)
+
+        polymerIntegral = kabs @ np.prod(
+            free**pos * polymerWithoutFactorOfN**neg, axis=1
+        )
+        return np.sum(polymerIntegral)
+
+    def polymerJacobian(self, free, k2s, kns, kabs, total, M):
+        if self.polymerCount == 0:
+            return np.full(np.shape(free), 0.0)
+
+        pos = np.where(M < 0, 0, M)
+        neg = np.where(M < 0, np.abs(M), 0)
+        polymerWithFactorOfN = free**2 * k2s * (2 - free * kns) / (1 - free * kns) ** 2
+        polymerWithoutFactorOfN = free**2 * k2s / (1 - free * kns)
+        free = free[..., np.newaxis, :]
+        polymerConcentration = (
+            kabs
+            * np.prod(
+                free**pos * polymerWithFactorOfN[..., np.newaxis, :] ** neg, axis=-1
+            )
+        ) @ neg
+        endCapConcentration = (
+            kabs
+            * np.prod(
+                free**pos * polymerWithoutFactorOfN[..., np.newaxis, :] ** neg,
+                axis=-1,
+            )
+        ) @ pos
+        return polymerConcentration + endCapConcentration
+
+    def polymerGetUpperBounds(self, k2s, kns, kabs, total, M):
+        if not np.any(M < 0):
+            return np.full(np.shape(total), np.inf)
+        componentsThatFormPolymers = np.any(M < 0, axis=0)
+        return np.where(
+            componentsThatFormPolymers,
+            self.polymerFreeExactSolutionBatch(k2s, kns, total),
+            np.inf,
+        )
+
+
+class Speciation(ComplexSpeciationMixin, PolymerSpeciationMixin, Strategy):
+    requiredAttributes = ("stoichiometries",)
+
+    # Shown in the speciation tab.
+    solutionMethod = "Closed form"
+
+    @property
+    def stoichiometries(self):
+        return self._stoichiometries
+
+    @stoichiometries.setter
+    def stoichiometries(self, value):
+        self._stoichiometries = value
+        self._noCooperativityValues = self.getNoCooperativityValues()
+
+    @abstractmethod
+    def run(self, variables, totalConcs):
+        pass
+
+    def runBatch(self, variablesBatch, totalConcsBatch):
+        # Runs the speciation for each set of variables and total concentrations, with
+        # the sets along the first axis. Strategies with a closed form solution override
+        # this to evaluate all sets at once.
+        return np.stack(
+            [
+                self.run(variables, totalConcs)
+                for variables, totalConcs in zip(variablesBatch, totalConcsBatch)
+            ]
+        )
+
+    # Other modules need to access freeNames and freeCount, but totalConcentrations
+    # may not yet be loaded.
+    @property
+    def freeNames(self):
+        try:
+            return self.titration.totalConcentrations.freeNames
+        except AttributeError:
+            return np.array(["Host", "Guest"])
+
+    @property
+    def freeCount(self):
+        return len(self.freeNames)
+
+    @property
+    def boundNames(self):
+        return np.append(self.complexBoundNames, self.polymerBoundNames)
+
+    @property
+    def boundCount(self):
+        return len(self.boundNames)
+
+    @property
+    def variableNames(self):
+        return np.concatenate([self.complexVariableNames, self.polymerVariableNames])
+
+    @property
+    def outputNames(self):
+        return np.concatenate(
+            [self.freeNames, self.complexOutputNames, self.polymerOutputNames]
+        )
+
+    @property
+    def outputStoichiometries(self):
+        return np.vstack(
+            [
+                np.eye(self.freeCount),
+                self.complexOutputStoichiometries,
+                self.polymerOutputStoichiometries,
+            ]
+        )
+
+    @property
+    def maximumValencyPerGuest(self):
+        return np.maximum(
+            self.complexMaxValencyPerGuest, self.polymerMaxValencyPerGuest
+        )
+
+    @property
+    def noCooperativityValues(self):
+        try:
+            return self._noCooperativityValues
+        except AttributeError:
+            self._noCooperativityValues = self.getNoCooperativityValues()
+            return self._noCooperativityValues
+
+    def getNoCooperativityValues(self):
+        from scipy.linalg import block_diag
+
+        statisticalFactorsC, ksMatrixC, microKsNamesC = (
+            self.getComplexNoCooperativityValues()
+        )
+        statisticalFactorsP, ksMatrixP, microKsNamesP = (
+            self.getPolymerNoCooperativityValues()
+        )
+
+        statisticalFactors = np.concatenate([statisticalFactorsC, statisticalFactorsP])
+        ksMatrix = block_diag(ksMatrixC, ksMatrixP)
+        microKsNames = np.concatenate([microKsNamesC, microKsNamesP])
+
+        return statisticalFactors, ksMatrix, microKsNames
+
+    def variablesToKs(self, variables):
+        # Ks loaded from a file are a masked array, but are never blank.
+        variables = ma.getdata(variables)
+        complexKs = variables[: self.complexCount]
+        polymerKs = variables[self.complexCount :]
+        k2s, kns, kabs = self.splitPolymerKs(polymerKs)
+        return complexKs, k2s, kns, kabs
+
+    # TODO: rewrite all non-mixin functions to be agnostic to the components of
+    # polymerKs, by just working with complexKs and polymerKs, or possibly *polymerKs
+    def freeToBoundConcs(self, freeConcs, complexKs, k2s, kns, kabs):
+        # freeConcs can have leading axes, e.g. for all points at once.
+        return np.concatenate(
+            [
+                self.complexFreeToBoundConcs(freeConcs, complexKs),
+                self.polymerFreeToBoundConcs(freeConcs, k2s, kns, kabs),
+            ],
+            axis=-1,
+        )
+
+
+class SpeciationDimerisation(Speciation):
+    @property
+    def stoichiometries(self):
+        M = np.array([[2]])
+        M.resize([1, self.freeCount])
+        return M
+
+    noCooperativityValues = (np.array([1]), np.array([[1]]), np.array(["microK_Host₂"]))
+
+    @staticmethod
+    def solve(K, Htot):
+        H = (-1 + np.sqrt(1 + 8 * Htot * K)) / (4 * K)
+        H2 = (1 + 4 * Htot * K - np.sqrt(1 + 8 * Htot * K)) / (8 * K)
+        return H, H2
+
+    def run(self, variables, totalConcs):
+        K = variables[0]
+        Htot = totalConcs.T[0]
+        return np.array(self.solve(K, Htot)).T
+
+    def runBatch(self, variablesBatch, totalConcsBatch):
+        K = variablesBatch[:, [0]]
+        Htot = totalConcsBatch[..., 0]
+        return np.stack(self.solve(K, Htot), axis=-1)
+
+
+class SpeciationHG(Speciation):
+    @property
+    def stoichiometries(self):
+        M = np.array([[1, 1]])
+        M.resize([1, self.freeCount])
+        return M
+
+    noCooperativityValues = (
+        np.array([1]),
+        np.array([[1]]),
+        np.array(["microK_Host·Guest"]),
+    )
+
+    @staticmethod
+    def solve(K, Htot, Gtot):
+        H = (
+            np.sqrt(
+                Gtot**2 * K**2 - 2 * Gtot * K * (Htot * K - 1) + (Htot * K + 1) ** 2
+            )
+            - Gtot * K
+            + Htot * K
+            - 1
+        ) / (2 * K)
+        G = (
+            np.sqrt(
+                Htot**2 * K**2 - 2 * Htot * K * (Gtot * K - 1) + (Gtot * K + 1) ** 2
+            )
+            - Htot * K
+            + Gtot * K
+            - 1
+        ) / (2 * K)
+        # Rounding errors give tiny negative concentrations when a total
+        # concentration is 0.
+        H = np.maximum(H, 0)
+        G = np.maximum(G, 0)
+        HG = H * G * K
+        return H, G, HG
+
+    def run(self, variables, totalConcs):
+        K = variables[0]
+        Htot, Gtot = totalConcs.T
+        return np.array(self.solve(K, Htot, Gtot)).T
+
+    def runBatch(self, variablesBatch, totalConcsBatch):
+        K = variablesBatch[:, [0]]
+        Htot, Gtot = np.moveaxis(totalConcsBatch, -1, 0)
+        return np.stack(self.solve(K, Htot, Gtot), axis=-1)
+
+
+class SpeciationHG2(Speciation):
+    @property
+    def stoichiometries(self):
+        if self.freeCount < 2:
+            return np.array([[1] * self.freeCount])
+        else:
+            return np.pad(
+                array=[[1, 1], [1, 2]],
+                pad_width=[[0, 0], [0, self.freeCount - 2]],
+                mode="constant",
+                constant_values=0,
+            )
+
+    noCooperativityValues = (
+        np.array([2, 1]),
+        np.array([[1, 2]]),
+        np.array(["microK_Host·Guest"]),
+    )
+
+    def run(self, variables, totalConcs):
+        K1, K2 = variables
+        output = np.empty([totalConcs.shape[0], 4])
+
+        for i, (Htot, Gtot) in enumerate(totalConcs):
+            if Htot == 0 or Gtot == 0:
+                output[i] = [Htot, Gtot, 0, 0]
+                continue
+
+            # When K2 is very small, solving a cubic in [G] can be numerically unstable,
+            # finding an inaccurate root, or not finding any real positive roots at
+            # all. After some testing, it seems that solving a cubic in [G]/Gtot is more
+            # stable, but I have not fully investigated the exact conditions under which
+            # the eigenvalues algorithm used by LAPACK (used by np.roots) becomes
+            # unstable, so adding error handling just in case.
+
+            # Solve for a([G]/Gtot)^3 + b([G]/Gtot)^2 + c([G]/Gtot) + d == 0
+            a = K2 * Gtot**3
+            b = (K2 * (2 * Htot - Gtot) + K1) * Gtot**2
+            c = (K1 * (Htot - Gtot) + 1) * Gtot
+            d = -Gtot
+
+            polynomial = np.array([a, b, c, d])
+
+            roots = np.roots(polynomial)
+
+            # Find smallest positive real root:
+            select = np.all([np.imag(roots) == 0, np.real(roots) >= 0], axis=0)
+            if np.count_nonzero(select) == 0:
+                raise RuntimeError(
+                    "No positive real roots found for cubic in [G]/Gtot when solving "
+                    "speciation.\n\nThe most common cause is when some Ks and/or total "
+                    "concentrations become very small or very large, leading to "
+                    "precision errors. Please check that the initial guesses for all "
+                    "variables are of a realistic order of magnitude, and that the "
+                    "model isn't overdetermined. If the problem persists, try "
+                    "selecting the 'Custom' binding isotherm option, which uses a "
+                    f"slower but more robust algorithm.\n\nDetails: {K1=}, {K2=}, "
+                    f"{Htot=}, {Gtot=}"
+                )
+            G = float(np.real(roots[select].min())) * Gtot
+
+            H = Htot / (1 + K1 * G + K2 * (G**2))
+            HG = K1 * H * G
+            HG2 = K2 * H * G**2
+
+            output[i] = [H, G, HG, HG2]
+
+        return output
+
+    @staticmethod
+    def solve(K1, K2, Htot, Gtot):
+        # Solves the same cubic as run, for arrays of points at once, giving nan for
+        # points without a root.
+        K1, K2, Htot, Gtot = np.broadcast_arrays(K1, K2, Htot, Gtot)
+
+        a = K2 * Gtot**3
+        b = (K2 * (2 * Htot - Gtot) + K1) * Gtot**2
+        c = (K1 * (Htot - Gtot) + 1) * Gtot
+        d = -Gtot
+
+        # Points with a total concentration of 0 have no complexes.
+        empty = (Htot == 0) | (Gtot == 0)
+        G = np.array(Gtot, dtype=float)
+        G[~empty] *= smallestNonNegativeRoots(np.stack([a, b, c, d], axis=-1)[~empty])
+
+        # With G = Gtot, the points with a total concentration of 0 give
+        # [Htot, Gtot, 0, 0] below.
+        H = Htot / (1 + K1 * G + K2 * (G**2))
+        HG = K1 * H * G
+        HG2 = K2 * H * G**2
+        return H, G, HG, HG2
+
+    def runBatch(self, variablesBatch, totalConcsBatch):
+        K1 = variablesBatch[:, [0]]
+        K2 = variablesBatch[:, [1]]
+        Htot, Gtot = np.moveaxis(totalConcsBatch, -1, 0)
+        output = np.stack(self.solve(K1, K2, Htot, Gtot), axis=-1)
+
+        unsolved = np.any(~np.isfinite(output), axis=(-2, -1))
+        for i in np.flatnonzero(unsolved):
+            # Raises the same error as a single run if there is no root.
+            output[i] = self.run(variablesBatch[i], totalConcsBatch[i])
+        return output
+
+
+class SpeciationPolymerisation(Speciation):
+    @property
+    def stoichiometries(self):
+        M = np.array([[-1]])
+        M.resize([1, self.freeCount])
+        return M
+
+    noCooperativityValues = (
+        np.array([1]),
+        np.array([[1, 1]]),
+        np.array(["microK_Hostₙ"]),
+    )
+
+    def run(self, variables, totalConcs):
+        k2, kn = variables
+        return np.array(
+            [
+                [
+                    freeConc := self.polymerFreeExactSolutionSingle(k2, kn, totalConc),
+                    *self.getTerminalInternalConcs(freeConc, k2, kn, None),
+                ]
+                for totalConc in totalConcs[:, 0]
+            ]
+        )
+
+
+# Old, slower speciation algorithm, currently unused. Left in in case results need to
+# be compared against it.
+class SpeciationCOGS(Speciation):
+    def COGS(self, M, y, ks, polymerKs):
+        free = y.copy()
+        bound = np.empty(len(ks))
+        polymers = np.any(M < 0, 1)
+        # the index of the species making up each of the polymers
+        polymerParents = np.nonzero(M[polymers])[1]
+        complexes = ~polymers
+
+        P = np.empty(len(ks))
+        P[complexes] = np.sum(M[complexes, :], 1)
+        P[polymers] = 2 * ks[polymers] * y[polymerParents]
+        P = 1 / max(P)
+        tol = 1e-7
+        while True:
+            bound[complexes] = ks[complexes] * np.prod(free ** M[complexes, :], 1)
+            # cap the maximum guess to avoid divergence
+            bound[polymers] = np.where(
+                free[polymerParents] * polymerKs[polymers] >= 1,
+                free[polymerParents] ** 2 * polymerKs[polymers] / P,
+                (2 - polymerKs[polymers] * free[polymerParents])
+                * (ks[polymers] * free[polymerParents] ** 2)
+                / ((1 - polymerKs[polymers] * free[polymerParents]) ** 2),
+            )
+            total = free + abs(M.T) @ bound  # total concentrations of species
+            if all((total - y) <= tol * y):
+                break
+            # to handle 0 total concentration
+            invTotal = np.where(total == 0, 1, 1 / total)
+            free *= (y * invTotal) ** P
+
+        # For polymers, return separate entries for terminal and internal groups
+        bound = []
+        paddedPolymerParents = ma.array(np.empty(len(ks)), mask=True)
+        paddedPolymerParents[polymers] = polymerParents
+        for k, polymerK, stoichiometries, isPolymer, parent in zip(
+            ks, polymerKs, M, self.polymerIndices, paddedPolymerParents
+        ):
+            if not isPolymer:
+                bound.append(k * np.prod(free**stoichiometries))
+            else:
+                # terminal
+                bound.append(2 * free[parent] ** 2 * k / (1 - free[parent] * polymerK))
+                # internal
+                bound.append(
+                    (free[parent] ** 3 * k * polymerK)
+                    / (1 - free[parent] * polymerK) ** 2
+                )
+
+        return free, np.array(bound)
+
+    def run(self, variables, totalConcs):
+        ks, polymerKs = self.variablesToKs(variables)
+        numPoints = totalConcs.shape[0]
+        free = np.zeros((numPoints, self.titration.totalConcentrations.freeCount))
+        bound = np.zeros((numPoints, self.complexCount + 2 * self.polymerCount))
+        for i in range(numPoints):
+            free[i], bound[i] = self.COGS(
+                self.stoichiometries, totalConcs[i], ks, polymerKs
+            )
+        return free, bound
+
+
+class SpeciationSolver(Speciation):
+    # Optimise f(total * log10(free))
+    # This makes the derivative equal to ln(10) * (free + bound - total) / total
+    #
+    # So gtol in the minimisation algorithm can be set to the desired precision in
+    # the total concentrations.
+    def objective(
+        self, logFreeTimesTotal, complexKs, k2s, kns, kabs, total, complexM, polymerM
+    ):
+        free = 10 ** (logFreeTimesTotal / total)
+        return (
+            np.sum(free)
+            - np.sum(logFreeTimesTotal) * LN_10
+            + self.complexObjective(free, complexKs, total, complexM)
+            + self.polymerObjective(free, k2s, kns, kabs, total, polymerM)
+        )
+
+    def jacobian(
+        self, logFreeTimesTotal, complexKs, k2s, kns, kabs, total, complexM, polymerM
+    ):
+        free = 10 ** (logFreeTimesTotal / total)
+        return (
+            (
+                free
+                + self.complexJacobian(free, complexKs, total, complexM)
+                + self.polymerJacobian(free, k2s, kns, kabs, total, polymerM)
+                - total
+            )
+            * LN_10
+            / total
+        )
+
+    # The scaling factor is passed in rather than stored, so that run doesn't change
+    # any state and can be called from several threads at once.
+    def objectiveScaled(
+        self,
+        logFreeTimesTotal,
+        scalingFactor,
+        complexKs,
+        k2s,
+        kns,
+        kabs,
+        total,
+        complexM,
+        polymerM,
+    ):
+        free = 10 ** (logFreeTimesTotal / scalingFactor / total)
+        return (
+            np.sum(free)
+            - np.sum(logFreeTimesTotal / scalingFactor) * LN_10
+            + self.complexObjective(free, complexKs, total, complexM)
+            + self.polymerObjective(free, k2s, kns, kabs, total, polymerM)
+        ) * scalingFactor
+
+    def jacobianScaled(
+        self,
+        logFreeTimesTotal,
+        scalingFactor,
+        complexKs,
+        k2s,
+        kns,
+        kabs,
+        total,
+        complexM,
+        polymerM,
+    ):
+        free = 10 ** (logFreeTimesTotal / scalingFactor / total)
+        return (
+            (
+                free
+                + self.complexJacobian(free, complexKs, total, complexM)
+                + self.polymerJacobian(free, k2s, kns, kabs, total, polymerM)
+                - total
+            )
+            * LN_10
+            / total
+        )
+
+    def smoothObjective(self, logFreeTimesTotal, *args, **kwargs):
+        upperBounds = self.getDomainUpperBounds(*args, **kwargs)
+        if np.all(logFreeTimesTotal <= upperBounds):
+            return self.objective(logFreeTimesTotal, *args, **kwargs)
+        print("used truncation in objective")
+
+        truncatedX = np.clip(logFreeTimesTotal, None, upperBounds)
+        return self.objective(truncatedX, *args, **kwargs) + np.sum(
+            (logFreeTimesTotal - truncatedX)
+            * self.jacobian(truncatedX, *args, **kwargs)
+        )
+
+    def smoothJacobian(self, logFreeTimesTotal, *args, **kwargs):
+        upperBounds = self.getDomainUpperBounds(*args, **kwargs)
+        if np.all(logFreeTimesTotal <= upperBounds):
+            return self.jacobian(logFreeTimesTotal, *args, **kwargs)
+        print("used truncation in jacobian")
+
+        truncatedX = np.clip(logFreeTimesTotal, None, upperBounds)
+        return self.jacobian(truncatedX, *args, **kwargs)
+
+    def getDomainUpperBounds(
+        self, complexKs, k2s, kns, kabs, total, complexM, polymerM
+    ):
+        return total * np.log10(
+            self.polymerGetUpperBounds(k2s, kns, kabs, total, polymerM),
+        )
+
+    # Could be refined iteratively, by computing the LB using this method, then taking
+    # UB = self.freeToBoundConcs(free=LB), calculating a new LB using that UB, etc.
+    def getUpperBounds(self, complexKs, k2s, kns, kabs, total, complexM, polymerM):
+        return total * np.log10(
+            np.minimum(
+                self.complexGetUpperBounds(complexKs, total, complexM),
+                self.polymerGetUpperBounds(k2s, kns, kabs, total, polymerM),
+            )
+        )
+
+    def getLowerBounds(self, complexKs, k2s, kns, kabs, total, complexM, polymerM):
+        maxFree = np.minimum(
+            self.complexGetUpperBounds(complexKs, total, complexM),
+            self.polymerGetUpperBounds(k2s, kns, kabs, total, polymerM),
+        )
+        return total * np.log10(
+            (total * maxFree)
+            / (
+                maxFree
+                + self.complexJacobian(maxFree, complexKs, total, complexM)
+                + self.polymerJacobian(maxFree, k2s, kns, kabs, total, polymerM)
+            )
+        )
+
+    # Components that never share a complex can be solved separately, as smaller
+    # problems. The split is cached until the options change.
+    _subsystems = (None, None)
+
+    @property
+    def subsystems(self):
+        revision, subsystems = self._subsystems
+        if revision != self._revision:
+            subsystems = self.findSubsystems()
+            self._subsystems = (self._revision, subsystems)
+        return subsystems
+
+    def findSubsystems(self):
+        # Returns a list of the independent parts of the network, each as a tuple of
+        # a speciation strategy for that part, and the indices of its components,
+        # variables and outputs. Components that don't form any complexes are always
+        # free, so aren't part of any subsystem. Returns None if the network can't be
+        # split.
+        from scipy.sparse.csgraph import connected_components
+
+        M = self.stoichiometries
+        formsComplexes = M != 0
+        if not np.all(np.any(formsComplexes, axis=1)):
+            return None
+        # Components are connected if they're part of the same complex.
+        _, labels = connected_components(
+            formsComplexes.T.astype(int) @ formsComplexes, directed=False
+        )
+        involved = np.any(formsComplexes, axis=0)
+        if np.all(involved) and np.all(labels == 0):
+            return None
+
+        # The variables and outputs of each complex or polymer, in the same order as
+        # variableNames and outputNames.
+        complexCount = self.complexCount
+        polymerVariableCounts = [
+            2 if np.count_nonzero(row) == 1 else 1
+            for row in self.polymerStoichiometries
+        ]
+        polymerVariableStarts = complexCount + np.cumsum([0] + polymerVariableCounts)
+        rowVariables = [[i] for i in range(complexCount)] + [
+            list(range(start, start + count))
+            for start, count in zip(polymerVariableStarts, polymerVariableCounts)
+        ]
+        rowOutputs = [[self.freeCount + i] for i in range(complexCount)] + [
+            [self.freeCount + complexCount + 2 * i + j for j in range(2)]
+            for i in range(self.polymerCount)
+        ]
+        # The rows of M sorted into complexes followed by polymers, as above.
+        rows = np.concatenate(
+            [np.flatnonzero(self.complexIndices), np.flatnonzero(self.polymerIndices)]
+        )
+        rowLabels = labels[np.argmax(formsComplexes[rows], axis=1)]
+
+        subsystems = []
+        for label in np.unique(labels[involved]):
+            columns = np.flatnonzero(labels == label)
+            inSubsystem = np.flatnonzero(rowLabels == label)
+            subsystem = SpeciationSubsystem(
+                self.titration,
+                self.freeNames[columns],
+                M[rows[inSubsystem]][:, columns],
+            )
+            variableIndices = np.array(
+                [i for row in inSubsystem for i in rowVariables[row]], dtype=int
+            )
+            outputIndices = np.concatenate(
+                [columns, [i for row in inSubsystem for i in rowOutputs[row]]]
+            ).astype(int)
+            subsystems.append((subsystem, columns, variableIndices, outputIndices))
+        return subsystems
+
+    @property
+    def solutionMethod(self):
+        subsystems = self.subsystems
+        if subsystems is None:
+            return "Numerical solver"
+        # Counts the parts solved by each method, in order of first appearance.
+        methodCounts = {}
+        for subsystem, *_ in subsystems:
+            method = subsystem.solutionMethod
+            methodCounts[method] = methodCounts.get(method, 0) + 1
+        return "Independent parts: " + ", ".join(
+            method if count == 1 else f"{method} ×{count}"
+            for method, count in methodCounts.items()
+        )
+
+    def run(self, variables, totalConcs):
+        subsystems = self.subsystems
+        if subsystems is None:
+            return self.runCoupled(variables, totalConcs)
+
+        output = np.zeros((totalConcs.shape[0], self.outputCount))
+        output[:, : self.freeCount] = totalConcs
+        for subsystem, columns, variableIndices, outputIndices in subsystems:
+            output[:, outputIndices] = subsystem.run(
+                variables[variableIndices], totalConcs[:, columns]
+            )
+        return output
+
+    def filterZeroConcs(self, zeroFree, complexKs, k2s, kns, kabs):
+        # Returns the Ks and stoichiometries of the components and complexes that can
+        # be present when the components in zeroFree are absent, or None if no
+        # complexes can be formed.
+        zeroBound = np.any(self.stoichiometries[:, zeroFree], axis=1)
+        if all(zeroBound):
+            return None
+        zeroComplexes = zeroBound[~self.polymerIndices]
+        zeroPolymers = zeroBound[self.polymerIndices]
+
+        filteredKs = (
+            complexKs[~zeroComplexes],
+            k2s[~zeroFree],
+            kns[~zeroFree],
+            kabs[~zeroPolymers],
+        )
+        filteredM = (
+            self.complexStoichiometries[~zeroComplexes, :][:, ~zeroFree],
+            self.polymerStoichiometries[~zeroPolymers, :][:, ~zeroFree],
+        )
+        return filteredKs, filteredM
+
+    def runCoupled(self, variables, totalConcs):
+        # scipy is imported lazily, to keep it off the startup path.
+        from scipy.optimize import minimize
+
+        complexKs, k2s, kns, kabs = self.variablesToKs(variables)
+        numPoints = totalConcs.shape[0]
+
+        free = np.empty((numPoints, self.freeCount))
+
+        # Species and complexes that will have a concentration of 0 are filtered out.
+        # Usually only the first few additions have any components missing, so the
+        # filtered Ks and stoichiometries are found once for each set of additions
+        # with the same components missing.
+        zeroPatterns, patternIndices = np.unique(
+            totalConcs == 0, axis=0, return_inverse=True
+        )
+        filteredPatterns = [
+            self.filterZeroConcs(zeroFree, complexKs, k2s, kns, kabs)
+            for zeroFree in zeroPatterns
+        ]
+
+        # The bounds of all additions with the same components missing are found at
+        # once, and are nan for the missing components.
+        lowerBounds = np.full(totalConcs.shape, np.nan)
+        upperBounds = np.full(totalConcs.shape, np.nan)
+        for pattern, (zeroFree, filtered) in enumerate(
+            zip(zeroPatterns, filteredPatterns)
+        ):
+            if filtered is None:
+                continue
+            filteredKs, filteredM = filtered
+            indices = np.ix_(patternIndices == pattern, ~zeroFree)
+            args = (*filteredKs, totalConcs[indices], *filteredM)
+            lowerBounds[indices] = self.getLowerBounds(*args)
+            upperBounds[indices] = self.getUpperBounds(*args)
+
+        # Correct for rounding errors. Unsure if this is necessary, as the only obvious
+        # case when it should happen is if no complexes are formed, which should be
+        # caught by filterZeroConcs.
+        mask = (lowerBounds > upperBounds) & np.isclose(lowerBounds, upperBounds)
+        lowerBounds[mask], upperBounds[mask] = upperBounds[mask], lowerBounds[mask]
+
+        for i in range(numPoints):
+            additionTotalConcs = totalConcs[i]
+            zeroFree = zeroPatterns[patternIndices[i]]
+            filtered = filteredPatterns[patternIndices[i]]
+            if filtered is None:
+                free[i] = additionTotalConcs
+                continue
+            filteredKs, filteredM = filtered
+
+            filteredTotal = additionTotalConcs[~zeroFree]
+            args = (*filteredKs, filteredTotal, *filteredM)
+
+            lb = lowerBounds[i, ~zeroFree]
+            ub = upperBounds[i, ~zeroFree]
+
+            # TODO: deal with cases where lb and ub are very close together!
+            # scalingFactor = 1000 / min(ub - lb)
+            # scalingFactor = 1000 / np.min(
+            #     np.abs(filteredTotal * np.log10(filteredTotal))
+            # )
+            scalingFactor = 1
+
+            if i == 0:
+                # Initial guess: all species 100% free, only polymers are formed
+                x0 = ub
+            else:
+                # If the total concentration increased, the initial guess is that all
+                # the added molecules are free.
+                # If the total concentration decreased, the initial guess is that the
+                # free concentration decreases by the same fraction.
+                initialGuess = free[i - 1].copy()
+                difference = additionTotalConcs - totalConcs[i - 1]
+                concsIncreased = difference >= 0
+
+                initialGuess[concsIncreased] += difference[concsIncreased]
+                initialGuess[~concsIncreased] *= (
+                    totalConcs[i][~concsIncreased] / totalConcs[i - 1][~concsIncreased]
+                )
+                x0 = filteredTotal * np.log10(initialGuess[~zeroFree])
+                x0 = np.clip(x0, lb, ub)
+
+            result = minimize(
+                self.objectiveScaled,
+                jac=self.jacobianScaled,
+                args=(scalingFactor, *args),
+                x0=x0 * scalingFactor,
+                bounds=np.vstack([lb, ub]).T * scalingFactor,
+                method="L-BFGS-B",
+                options={
+                    "ftol": 0.0,
+                    "gtol": 1e-6 * LN_10,
+                },
+            )
+            if result.success and "jac" not in result.keys():
+                # Happens if all lower bounds are equal to upper bounds, and possibly
+                # also in other cases.
+                result.jac = self.jacobianScaled(result.x, scalingFactor, *args)
+            if max(abs(result.jac)) > 1e-6 * LN_10:
+                scalingFactor *= 10_000
+                improvedResult = minimize(
+                    self.objectiveScaled,
+                    jac=self.jacobianScaled,
+                    args=(scalingFactor, *args),
+                    x0=result.x,
+                    bounds=np.vstack([lb, ub]).T * scalingFactor,
+                    method="L-BFGS-B",
+                    options={
+                        "ftol": 0.0,
+                        "gtol": 1e-6 * LN_10,
+                    },
+                )
+                if improvedResult.success and "jac" not in improvedResult.keys():
+                    improvedResult.jac = self.jacobianScaled(
+                        improvedResult.x, scalingFactor, *args
+                    )
+
+                if max(abs(improvedResult.jac)) < max(abs(result.jac)):
+                    result = improvedResult
+                else:
+                    warnings.warn(
+                        "Desired accuracy not achieved in speciation",
+                        RuntimeWarning,
+                    )
+
+            logFree = result.x / scalingFactor / filteredTotal
+
+            free[i, ~zeroFree] = 10**logFree
+            free[i, zeroFree] = 0
+
+        # get the concentrations of the bound species from those of the free
+        bound = self.freeToBoundConcs(free, complexKs, k2s, kns, kabs)
+        return np.hstack([free, bound])
+
+
+class SpeciationCustom(SpeciationSolver):
+    popupAttributes = ("stoichiometries",)
+
+    # Stoichiometries matching one of the other binding isotherms are solved with its
+    # closed form solution instead, with the match cached until the options change.
+    _closedForm = (None, None, None, None)
+
+    @property
+    def closedForm(self):
+        revision, name, columns, solveSubsystem = self._closedForm
+        if revision != self._revision:
+            name, columns, solveSubsystem = self.findClosedForm(self.stoichiometries)
+            self._closedForm = (self._revision, name, columns, solveSubsystem)
+        return name, columns, solveSubsystem
+
+    @property
+    def solutionMethod(self):
+        name, _, _ = self.closedForm
+        if name is None:
+            return super().solutionMethod
+        return f"Closed form ({name})"
+
+    @classmethod
+    def findClosedForm(cls, M):
+        # Returns the name of the binding isotherm whose closed form solution applies
+        # to the stoichiometries M, the components that form complexes, and a
+        # function giving their free concentrations. Returns (None, None, None) if
+        # there is no closed form solution.
+        columns = np.flatnonzero(np.any(M != 0, axis=0))
+        subM = M[:, columns]
+        if subM.size == 0 or not np.all(np.any(subM != 0, axis=1)):
+            return None, None, None
+        rows = [tuple(row) for row in subM]
+
+        if rows == [(2,)]:
+            return "Dimerisation", columns, cls.solveDimerisation
+        elif rows == [(-1,)]:
+            return "Polymerisation", columns, cls.solvePolymerisation
+        elif rows == [(1, 1)]:
+            return "1:1 binding", columns, cls.solveHG
+        elif sorted(rows) in ([(1, 1), (1, 2)], [(1, 1), (2, 1)]):
+            # The host is the component with a stoichiometry of 1 in both complexes.
+            return (
+                "1:2 binding",
+                columns,
+                partial(
+                    cls.solveHG2,
+                    indexK1=rows.index((1, 1)),
+                    hostFirst=(1, 2) in rows,
+                ),
+            )
+        else:
+            return None, None, None
+
+    # The closed form solutions take the Ks and total concentrations of only the
+    # components that form complexes, and give nan for any points they can't solve.
+    @staticmethod
+    def solveDimerisation(complexKs, k2s, kns, Htot):
+        H, _ = SpeciationDimerisation.solve(complexKs[0], Htot)
+        return [H]
+
+    @staticmethod
+    def solvePolymerisation(complexKs, k2s, kns, Htot):
+        return [
+            SpeciationPolymerisation.polymerFreeExactSolutionBatch(k2s[0], kns[0], Htot)
+        ]
+
+    @staticmethod
+    def solveHG(complexKs, k2s, kns, Htot, Gtot):
+        H, G, _ = SpeciationHG.solve(complexKs[0], Htot, Gtot)
+        return [H, G]
+
+    @staticmethod
+    def solveHG2(complexKs, k2s, kns, *totals, indexK1, hostFirst):
+        Htot, Gtot = totals if hostFirst else totals[::-1]
+        H, G, _, _ = SpeciationHG2.solve(
+            complexKs[indexK1], complexKs[1 - indexK1], Htot, Gtot
+        )
+        return [H, G] if hostFirst else [G, H]
+
+    def run(self, variables, totalConcs):
+        _, columns, solveSubsystem = self.closedForm
+        if solveSubsystem is None:
+            return super().run(variables, totalConcs)
+
+        complexKs, k2s, kns, kabs = self.variablesToKs(variables)
+        # Components that don't form any complexes are always free.
+        free = np.array(totalConcs, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            free[:, columns] = np.stack(
+                solveSubsystem(
+                    complexKs, k2s[columns], kns[columns], *totalConcs[:, columns].T
+                ),
+                axis=-1,
+            )
+            # Avoid rounding errors giving tiny concentrations of absent components.
+            free[totalConcs == 0] = 0
+            output = np.hstack(
+                [free, self.freeToBoundConcs(free, complexKs, k2s, kns, kabs)]
+            )
+
+        # Points the closed form can't solve, e.g. because a K is 0, are left to the
+        # numerical solver.
+        unsolved = np.any(~np.isfinite(output), axis=1)
+        if np.any(unsolved):
+            output[unsolved] = self.runCoupled(variables, totalConcs[unsolved])
+        return output
+
+
+class SpeciationSubsystem(SpeciationCustom):
+    # An independent part of a speciation network, with its own components.
+    def __init__(self, titration, freeNames, stoichiometries):
+        super().__init__(titration)
+        self._freeNames = freeNames
+        self.stoichiometries = stoichiometries
+
+    @property
+    def freeNames(self):
+        return self._freeNames
+
+
+strategies = {
+    "1:1 binding": SpeciationHG,
+    "1:2 binding": SpeciationHG2,
+    "Dimerisation": SpeciationDimerisation,
+    "Polymerisation": SpeciationPolymerisation,
+    "Custom": SpeciationCustom,
+    # "Custom Grad": SpeciationCustomGrad,
+}
@@ -0,0 +1,59 @@
+from abc import ABC
+
+
+# all module strategies should be a subclass
+class Strategy(ABC):
+    Popup = None
+
+    # List of attributes that are set through the popup window, and can be
+    # loaded from / saved to a file.
+    popupAttributes = ()
+
+    # List of attributes that each base Strategy class should define, for all concrete
+    # strategies to set either in __init__ or from the popup. Compliance by the concrete
+    # strategies is checked in ModuleFrame.callback().
+    requiredAttributes = NotImplemented
+
+    # Incremented whenever an option is set, so that values derived from the options
+    # can be cached until they change. Private attributes, which are used for the
+    # caches themselves, don't count as options.
+    _revision = 0
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            super().__setattr__("_revision", self._revision + 1)
+
+    @staticmethod
+    def revisionKey(*strategies):
+        # Changes whenever any of the strategies is replaced, or has an option changed.
+        return tuple(
+            (strategy, getattr(strategy, "_revision", None)) for strategy in strategies
+        )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.requiredAttributes is NotImplemented:
+            raise NotImplementedError(
+                f"Can't define class {cls.__name__} without implementing the abstract"
+                " class attribute requiredAttributes"
+            )
+
+    def checkAttributes(self):
+        for attr in self.requiredAttributes:
+            if not hasattr(self, attr):
+                raise NotImplementedError(
+                    f"Can't set strategy {type(self).__name__} without"
+                    f" implementing the required attribute {attr}"
+                )
+
+    def __init__(self, titration):
+        self.titration = titration
+
+    @property
+    def outputCount(self):
+        return len(self.outputNames)
+
+    @property
+    def variableCount(self):
+        return len(self.variableNames)
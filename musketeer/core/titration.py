@@ -1,8 +1,18 @@
+from collections import namedtuple
+
 import numpy as np
 from numpy import ma
-from scipy import ndimage
-from scipy.optimize import minimize
-from scipy.signal import find_peaks
+
+from . import (
+    contributingSpecies,
+    contributors,
+    equilibriumConstants,
+    fitSignals,
+    knownSignals,
+    proportionality,
+    speciation,
+    totalConcentrations,
+)
 
 titrationAttributes = (
     "title",
@@ -32,8 +42,47 @@ titrationAttributes = (
     "_selectedSignalTitles",
 )
 
+# The module with the strategies for each of the titration's strategy attributes, in the
+# order that they are applied.
+strategyModules = {
+    "totalConcentrations": totalConcentrations,
+    "proportionality": proportionality,
+    "speciation": speciation,
+    "equilibriumConstants": equilibriumConstants,
+    "contributingSpecies": contributingSpecies,
+    "contributors": contributors,
+    "knownSignals": knownSignals,
+    "fitSignals": fitSignals,
+}
+
+# Everything calculated for one set of variables by Titration.evaluate, named after the
+# attributes that Titration.commit copies them to. residuals is the square root of the
+# sum of squared residuals.
+EvaluationResult = namedtuple(
+    "EvaluationResult",
+    (
+        "kVars",
+        "totalConcVars",
+        "ks",
+        "totalConcs",
+        "speciesConcs",
+        "signalVars",
+        "fittedSpectra",
+        "fittedCurves",
+        "residuals",
+    ),
+)
+
 
 class Titration:
+    # Incremented whenever an attribute is set, so that unchanged titrations don't need
+    # to be serialised again when saving.
+    _revision = 0
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        super().__setattr__("_revision", self._revision + 1)
+
     def __init__(self, title="Titration"):
         self.title = title
         self.continuousRange = np.array([-np.inf, np.inf])
@@ -192,6 +241,8 @@ class Titration:
         if numSignals <= maxPeaks + maxShoulderPeaks:
             return np.arange(numSignals)
 
+        from scipy.signal import find_peaks
+
         # get the total movement for each signal
         movement = abs(np.diff(self.processedData, axis=0)).sum(axis=0)
         # get the range for each signal
@@ -262,26 +313,54 @@ class Titration:
     def RMSE(self):
         return np.sqrt(np.mean((self.lastFittedCurves - self.processedData) ** 2))
 
-    def optimisationFunc(self, ksAndTotalConcs):
+    @property
+    def parameterCount(self):
+        # The unknown spectra are fitted too, so also count towards the parameters.
+        return (
+            self.equilibriumConstants.variableCount
+            + self.totalConcentrations.variableCount
+            + np.count_nonzero(ma.getmaskarray(self.knownSignals.run()))
+        )
+
+    # Information criteria of the last fit, from the residual sum of squares assuming
+    # normally distributed errors. Lower is better.
+    def informationCriteria(self):
+        residuals = ma.compressed(
+            ma.masked_invalid(self.lastFittedCurves) - self.processedData
+        )
+        numPoints = len(residuals)
+        numParameters = self.parameterCount
+        logLikelihoodTerm = numPoints * np.log(np.sum(residuals**2) / numPoints)
+        return (
+            logLikelihoodTerm + 2 * numParameters,
+            logLikelihoodTerm + numParameters * np.log(numPoints),
+        )
+
+    @property
+    def AIC(self):
+        return self.informationCriteria()[0]
+
+    @property
+    def BIC(self):
+        return self.informationCriteria()[1]
+
+    def evaluate(self, ksAndTotalConcs):
+        # Runs the whole model for the given variables without changing any state, so
+        # can be called from several threads at once.
+
         # scipy.optimize optimizes everything as a single array, so split it
         kVars = ksAndTotalConcs[: self.equilibriumConstants.variableCount]
-        self.lastKVars = kVars
         totalConcVars = ksAndTotalConcs[self.equilibriumConstants.variableCount :]
-        self.lastTotalConcVars = totalConcVars
 
         # get all Ks and total concs, as some are fixed and thus aren't passed
         # to the function as arguments
         speciationVars = self.equilibriumConstants.run(kVars)
-        self.lastKs = speciationVars
         totalConcs = self.totalConcentrations.run(totalConcVars)
-        self.lastTotalConcs = totalConcs
 
         speciesConcs = self.speciation.run(speciationVars, totalConcs)
-        self.lastSpeciesConcs = speciesConcs
 
         contributingSpeciesFilter = self.contributingSpecies.run()
         signalVars, contributorsCountPerMolecule = self.contributors.run(speciesConcs)
-        self.lastSignalVars = signalVars
 
         proportionalSignalVars = self.proportionality.run(
             signalVars, contributorsCountPerMolecule
@@ -289,14 +368,43 @@ class Titration:
 
         knownSpectra = self.knownSignals.run()
 
-        self.lastFittedSpectra, residuals, self.lastFittedCurves = self.fitSignals.run(
+        fittedSpectra, residuals, fittedCurves = self.fitSignals.run(
             proportionalSignalVars, knownSpectra
         )
 
-        combinedResiduals = np.sqrt(np.sum(residuals))
-        self.lastResiduals = combinedResiduals
+        return EvaluationResult(
+            kVars,
+            totalConcVars,
+            speciationVars,
+            totalConcs,
+            speciesConcs,
+            signalVars,
+            fittedSpectra,
+            fittedCurves,
+            np.sqrt(np.sum(residuals)),
+        )
 
-        return combinedResiduals
+    def commit(self, result):
+        # Makes the result of evaluate the current fit.
+        self.lastKVars = result.kVars
+        self.lastTotalConcVars = result.totalConcVars
+        self.lastKs = result.ks
+        self.lastTotalConcs = result.totalConcs
+        self.lastSpeciesConcs = result.speciesConcs
+        self.lastSignalVars = result.signalVars
+        # evaluate uses nan for unknown values, which are masked in the saved fit.
+        self.lastFittedSpectra = ma.masked_invalid(result.fittedSpectra, copy=False)
+        self.lastFittedCurves = ma.masked_invalid(result.fittedCurves, copy=False)
+        self.lastResiduals = result.residuals
+
+    def evaluationRMSE(self, result):
+        fittedCurves = ma.masked_invalid(result.fittedCurves, copy=False)
+        return np.sqrt(np.mean((fittedCurves - self.processedData) ** 2))
+
+    def optimisationFunc(self, ksAndTotalConcs):
+        result = self.evaluate(ksAndTotalConcs)
+        self.commit(result)
+        return result.residuals
 
     def simulate(self, speciationVars, totalConcs, spectra):
         speciesConcs = self.speciation.run(speciationVars, totalConcs)
@@ -305,29 +413,71 @@ class Titration:
         proportionalSignalVars = self.proportionality.run(
             signalVars, contributorsCountPerMolecule
         )
-        fittedCurves = ma.dot(proportionalSignalVars, spectra)
-        fittedCurves.data[fittedCurves.mask] = np.nan
+        fittedCurves = fitSignals.dotIgnoringNan(
+            proportionalSignalVars, ma.filled(spectra, np.nan)
+        )
+
+        return speciesConcs, fittedCurves
+
+    def simulateBatch(self, speciationVarsBatch, totalConcsBatch, spectra):
+        # Simulates many sets of Ks and total concentrations at once, with the sets
+        # along the first axis. A single set of total concentrations or spectra is used
+        # for every set of Ks.
+        speciationVarsBatch = np.asarray(speciationVarsBatch, dtype=float)
+        totalConcsBatch = np.broadcast_to(
+            totalConcsBatch,
+            (len(speciationVarsBatch),) + np.shape(totalConcsBatch)[-2:],
+        )
+        speciesConcs = self.speciation.runBatch(speciationVarsBatch, totalConcsBatch)
+        signalVars, contributorsCountPerMolecule = self.contributors.run(speciesConcs)
+        proportionalSignalVars = self.proportionality.run(
+            signalVars, contributorsCountPerMolecule
+        )
+        spectra = ma.filled(spectra, np.nan)
+        if np.ndim(spectra) == 2:
+            # As a single 2D product, which is much faster than the N-D one.
+            numSets, numPoints, numContributors = proportionalSignalVars.shape
+            fittedCurves = fitSignals.dotIgnoringNan(
+                proportionalSignalVars.reshape(-1, numContributors), spectra
+            ).reshape(numSets, numPoints, -1)
+        else:
+            fittedCurves = np.stack(
+                [
+                    fitSignals.dotIgnoringNan(setSignalVars, setSpectra)
+                    for setSignalVars, setSpectra in zip(
+                        proportionalSignalVars, spectra
+                    )
+                ]
+            )
 
         return speciesConcs, fittedCurves
 
     def calculateInterpolatedConcsAndSpectra(self):
         # Calculate speciation and spectra in between the data points, to plot the
         # curves smoothly
+        from scipy import ndimage
+
         scalingFactor = 10
         zoomFactor = (scalingFactor * (self.numAdditions - 1) + 1) / self.numAdditions
         # Linear interpolation
         self.interpolatedTotalConcs = ndimage.zoom(
             self.lastTotalConcs, (zoomFactor, 1), order=1
         )
-        self.interpolatedSpeciesConcs, self.interpolatedFittedCurves = self.simulate(
+        self.interpolatedSpeciesConcs, interpolatedFittedCurves = self.simulate(
             self.lastKs, self.interpolatedTotalConcs, self.lastFittedSpectra
         )
+        self.interpolatedFittedCurves = ma.masked_invalid(
+            interpolatedFittedCurves, copy=False
+        )
 
     def optimisationFuncLog(self, logKsAndTotalConcs):
         ksAndTotalConcs = 10**logKsAndTotalConcs
         return self.optimisationFunc(ksAndTotalConcs)
 
     def optimise(self, callback=None):
+        # scipy is imported lazily, to keep it off the startup path.
+        from scipy.optimize import minimize
+
         initialGuessKs = np.log10(self.equilibriumConstants.variableInitialGuesses)
         initialGuessConcs = np.log10(self.totalConcentrations.variableInitialGuesses)
         initialGuess = np.concatenate((initialGuessKs, initialGuessConcs))
@@ -345,34 +495,40 @@ class Titration:
 
         return result.x
 
-    # Run the optimisation with one or more of the variables at a fixed value
+    # Run the optimisation with one or more of the variables at a fixed value. Returns
+    # the optimised log variables and the evaluation at them, without changing the
+    # current fit.
     def optimiseFixed(
         self, fixedVars, initialGuess=None, callback=None, minimizeOptions={}
     ):
-        initialGuessKs = np.log10(self.equilibriumConstants.variableInitialGuesses)
-        initialGuessConcs = np.log10(self.totalConcentrations.variableInitialGuesses)
-        _initialGuess = np.concatenate((initialGuessKs, initialGuessConcs))
+        from scipy.optimize import minimize
+
+        # Not in log space, like the initial guesses that can be passed in.
+        _initialGuess = np.concatenate(
+            (
+                self.equilibriumConstants.variableInitialGuesses,
+                self.totalConcentrations.variableInitialGuesses,
+            )
+        )
         if initialGuess is not None:
             _initialGuess = initialGuess.filled(_initialGuess)
 
         initialGuessFiltered = _initialGuess[fixedVars.mask]
 
-        def optimisationFuncLogFixed(logKsAndTotalConcs):
+        def evaluateFixed(logKsAndTotalConcs):
             ksAndTotalConcs = 10**logKsAndTotalConcs
             allKsAndTotalConcs = fixedVars.copy()
             allKsAndTotalConcs[fixedVars.mask] = ksAndTotalConcs
-            return self.optimisationFunc(allKsAndTotalConcs.data)
+            return self.evaluate(allKsAndTotalConcs.data)
 
         result = minimize(
-            optimisationFuncLogFixed,
+            lambda logKsAndTotalConcs: evaluateFixed(logKsAndTotalConcs).residuals,
             x0=np.log10(initialGuessFiltered),
             method="nelder-mead",
             callback=callback,
             options=minimizeOptions,
         )
-        # to make sure the last fit is the optimal one
-        optimisationFuncLogFixed(result.x)
-        return result.x
+        return result.x, evaluateFixed(result.x)
 
     def fitData(self, callback=None):
         self.fitResult = 10 ** self.optimise(callback)
@@ -0,0 +1,267 @@
+from abc import abstractmethod
+from decimal import Decimal
+
+import numpy as np
+from numpy import ma
+
+from .strategy import Strategy
+
+prefixesDecimal = {
+    "": Decimal(1),
+    "m": Decimal(1e-3),
+    "u": Decimal(1e-6),
+    "μ": Decimal(1e-6),
+    "n": Decimal(1e-9),
+}
+
+
+prefixes = dict([key, float(value)] for key, value in prefixesDecimal.items())
+
+
+def convertConc(conc, fromUnit, toUnit):
+    if conc is ma.masked:
+        return "?"
+    conc = Decimal(conc)
+    convertedConc = float(
+        conc * prefixesDecimal[fromUnit.strip("M")] / prefixesDecimal[toUnit.strip("M")]
+    )
+    return f"{convertedConc:g}"  # strip trailing zeroes
+
+
+def blankIndicators(blanks, linked, componentAxis):
+    # Returns an array with an extra last axis for each variable, which is 1 for the
+    # blank cells filled by that variable. If linked, all blank cells for a component
+    # are filled by a single variable.
+    if linked:
+        otherAxis = 1 - componentAxis
+        componentHasBlanks = np.any(blanks, axis=otherAxis)
+        variableCount = np.count_nonzero(componentHasBlanks)
+        componentVariables = np.cumsum(componentHasBlanks) - 1
+        variables = np.where(blanks, np.expand_dims(componentVariables, otherAxis), -1)
+    else:
+        variableCount = np.count_nonzero(blanks)
+        variables = np.full(blanks.shape, -1)
+        variables[blanks] = np.arange(variableCount)
+
+    return (variables[..., np.newaxis] == np.arange(variableCount)).astype(float)
+
+
+class totalConcentrations(Strategy):
+    requiredAttributes = (
+        "concsUnit",
+        "totalConcs",
+        "freeNames",
+        "variableNames",
+    )
+
+    # TODO: support entering initial guesses
+    @property
+    def variableInitialGuesses(self):
+        return np.full(
+            self.variableCount,
+            self.defaultInitialGuess,
+        )
+
+    @property
+    def defaultInitialGuess(self):
+        return prefixes[self.concsUnit.strip("M")] * 1.0
+
+    @property
+    def freeCount(self):
+        return len(self.freeNames)
+
+    # The total concentrations are affine in the variables, so are calculated as
+    # constant + coefficients @ totalConcVars, with the map cached until any of the
+    # options are changed.
+    _affineMap = (None, None, None)
+
+    @abstractmethod
+    def calculateAffineMap(self):
+        # Returns the constant total concentrations, and the coefficients with shape
+        # (additions, components, variables).
+        pass
+
+    @property
+    def affineMap(self):
+        revision, constant, coefficients = self._affineMap
+        if revision != self._revision:
+            constant, coefficients = self.calculateAffineMap()
+            # Returned as is when there are no variables, so mustn't be modified.
+            constant.flags.writeable = False
+            self._affineMap = (self._revision, constant, coefficients)
+        return constant, coefficients
+
+    def run(self, totalConcVars):
+        constant, coefficients = self.affineMap
+        if coefficients.shape[-1] == 0:
+            return constant
+        return constant + coefficients @ totalConcVars
+
+
+class GetTotalConcsFromVolumes(totalConcentrations):
+    popupAttributes = (
+        "stockTitles",
+        "unknownTotalConcsLinked",
+        "concsUnit",
+        "stockConcs",
+        "stockConcsGuesses",
+        "volumesUnit",
+        "volumes",
+        "freeNames",
+    )
+
+    def calculateAffineMap(self):
+        # Volumes loaded from a file are a masked array, but are never blank.
+        volumes = np.asarray(self.volumes, dtype=float)
+        additionFractions = volumes / np.sum(volumes, axis=1, keepdims=True)
+        indicators = blankIndicators(
+            ma.getmaskarray(self.stockConcs), self.unknownTotalConcsLinked, 0
+        )
+        constant = additionFractions @ ma.filled(self.stockConcs, 0).T
+        coefficients = np.einsum("as,csv->acv", additionFractions, indicators)
+        return constant, coefficients
+
+    def filledStockConcs(self, totalConcVars):
+        # The stock concentrations, with the unknown ones set to the variables.
+        stockConcs = np.copy(self.stockConcs)
+        maskArray = ma.getmaskarray(self.stockConcs)
+
+        if self.unknownTotalConcsLinked:
+            # For each row (= species), all blank cells are assigned to a
+            # single unknown variable.
+            for rowIndex, totalConcVar in zip(
+                np.where(self.rowsWithBlanks)[0], totalConcVars
+            ):
+                stockConcs[rowIndex, maskArray[rowIndex, :]] = totalConcVar
+        else:
+            stockConcs[maskArray] = totalConcVars
+
+        return stockConcs
+
+    @property
+    def totalConcs(self):
+        # Known total concentrations can be used by other strategies.
+        return ma.dot(self.volumes, self.stockConcs.T) / np.sum(
+            self.volumes, axis=1, keepdims=True
+        )
+
+    @property
+    def totalConcsGuesses(self):
+        return ma.dot(self.volumes, self.stockConcsGuesses.T) / np.sum(
+            self.volumes, axis=1, keepdims=True
+        )
+
+    @property
+    def variableInitialGuesses(self):
+        if self.unknownTotalConcsLinked:
+            output = np.empty(self.variableCount)
+
+            for i, row in enumerate(self.stockConcsGuesses[self.rowsWithBlanks, :]):
+                rowGuesses = row[~ma.getmaskarray(row)]
+                if len(np.unique(rowGuesses)) > 1:
+                    raise ValueError(
+                        "Multiple different initial guesses entered for "
+                        f"{self.variableNames[i]}"
+                    )
+                elif len(rowGuesses) == 0:
+                    output[i] = self.defaultInitialGuess
+                else:
+                    output[i] = rowGuesses[0]
+
+            return output
+        else:
+            return self.stockConcsGuesses[ma.getmaskarray(self.stockConcs)].filled(
+                self.defaultInitialGuess
+            )
+
+    @property
+    def rowsWithBlanks(self):
+        return np.any(ma.getmaskarray(self.stockConcs), axis=1)
+
+    @property
+    def variableNames(self):
+        if self.unknownTotalConcsLinked:
+            # return the number of rows (= species) with blank cells
+            concVarsNames = self.freeNames[self.rowsWithBlanks]
+            return np.array([f"[{name}]" for name in concVarsNames])
+        else:
+            concVarsNames = []
+            for freeName, concs in zip(self.freeNames, self.stockConcs):
+                concVarsNames.extend(
+                    [
+                        f"[{freeName}] in {stock}"
+                        for stock in self.stockTitles[ma.getmaskarray(concs)]
+                    ]
+                )
+            return np.array(concVarsNames)
+
+
+class GetTotalConcs(totalConcentrations):
+    popupAttributes = (
+        "unknownTotalConcsLinked",
+        "concsUnit",
+        "totalConcs",
+        "totalConcsGuesses",
+        "freeNames",
+    )
+
+    def calculateAffineMap(self):
+        constant = np.array(ma.filled(self.totalConcs, 0), dtype=float)
+        coefficients = blankIndicators(
+            ma.getmaskarray(self.totalConcs), self.unknownTotalConcsLinked, 1
+        )
+        return constant, coefficients
+
+    @property
+    def variableInitialGuesses(self):
+        if self.unknownTotalConcsLinked:
+            output = np.empty(self.variableCount)
+
+            for i, column in enumerate(
+                self.totalConcsGuesses[:, self.columnsWithBlanks].T
+            ):
+                columnGuesses = column[~ma.getmaskarray(column)]
+                if len(np.unique(columnGuesses)) > 1:
+                    raise ValueError(
+                        "Multiple different initial guesses entered for "
+                        f"{self.variableNames[i]}"
+                    )
+                elif len(columnGuesses) == 0:
+                    output[i] = self.defaultInitialGuess
+                else:
+                    output[i] = columnGuesses[0]
+
+            return output
+        else:
+            return self.totalConcsGuesses[ma.getmaskarray(self.totalConcs)].filled(
+                self.defaultInitialGuess
+            )
+
+    @property
+    def columnsWithBlanks(self):
+        return np.any(ma.getmaskarray(self.totalConcs), axis=0)
+
+    @property
+    def variableNames(self):
+        if self.unknownTotalConcsLinked:
+            # return the number of columns (= component) with blank cells
+            concVarsNames = self.freeNames[self.columnsWithBlanks]
+            return np.array([f"[{name}]" for name in concVarsNames])
+        else:
+            concVarsNames = []
+            for freeName, concs in zip(self.freeNames, self.totalConcs.T):
+                concVarsNames.extend(
+                    [
+                        f"[{freeName}] in {additionTitle}"
+                        for additionTitle in self.titration.additionTitles[
+                            ma.getmaskarray(concs)
+                        ]
+                    ]
+                )
+            return np.array(concVarsNames)
+
+
+strategies = {
+    "Volumes": GetTotalConcsFromVolumes,
+    "Concentrations": GetTotalConcs,
+}
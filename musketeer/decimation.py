@@ -0,0 +1,132 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from numpy import ma
+
+# Number of bins used to decimate the full data, before the axes know how wide they
+# are. Enough to show the whole spectrum at any realistic figure size.
+FULL_RANGE_BINS = 2048
+MIN_POINTS_PER_BIN = 4
+
+
+def decimate(x, ys, bins):
+    # Decimates lines sharing the same x values, where bins is a non-decreasing integer
+    # array assigning each point to a bin. Only the minimum and maximum of each line in
+    # each bin are kept, so that peaks remain visible.
+    if len(x) == 0:
+        return x, ys
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bins)) + 1])
+    # Not worth it unless there are several points per bin, as Line2D simplifies its
+    # path anyway.
+    if MIN_POINTS_PER_BIN * len(starts) > len(x):
+        return x, ys
+    ends = np.append(starts[1:], len(x)) - 1
+
+    # fmin and fmax ignore NaNs, unless the entire bin is missing.
+    mins = np.fmin.reduceat(ys, starts, axis=1)
+    maxs = np.fmax.reduceat(ys, starts, axis=1)
+    # Draw the maximum first in bins where the line is decreasing, so that smooth lines
+    # don't double back on themselves.
+    decreasing = ys[:, starts] > ys[:, ends]
+    first = np.where(decreasing, maxs, mins)
+    second = np.where(decreasing, mins, maxs)
+
+    xDecimated = np.column_stack([x[starts], x[ends]]).ravel()
+    ysDecimated = np.stack([first, second], axis=-1).reshape(ys.shape[0], -1)
+    return xDecimated, ysDecimated
+
+
+class Decimator:
+    # Shows lines with many points by only drawing as many points as the axes are wide
+    # in pixels, which keeps panning and zooming fast for large spectra. Each artist is
+    # decimated again for the visible range whenever the x limits change.
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.canvasCallback = ax.figure.canvas.mpl_connect("resize_event", self.update)
+        self.callbacks = None
+        # artist: (x, ys)
+        self.artists = {}
+
+    def prepare(self, x, ys):
+        # Returns x sorted in ascending order, and ys as a 2D float array with the
+        # masked values replaced by NaN.
+        x = np.asarray(x, dtype=float)
+        ys = ma.filled(ma.asarray(ys, dtype=float), np.nan)
+        ys = np.atleast_2d(ys)
+        if np.any(np.diff(x) < 0):
+            order = np.argsort(x, kind="stable")
+            x = x[order]
+            ys = ys[:, order]
+        return x, ys
+
+    def decimateFull(self, x, ys):
+        if len(x) < 2 or x[-1] == x[0]:
+            return x, ys
+        bins = ((x - x[0]) / (x[-1] - x[0]) * (FULL_RANGE_BINS - 1)).astype(int)
+        return decimate(x, ys, bins)
+
+    def decimateView(self, x, ys):
+        xMin, xMax = sorted(self.ax.get_xlim())
+        # Include one point outside the view on either side, so that lines continue to
+        # the edge of the axes.
+        start = max(np.searchsorted(x, xMin, side="left") - 1, 0)
+        stop = min(np.searchsorted(x, xMax, side="right") + 1, len(x))
+        x = x[start:stop]
+        ys = ys[:, start:stop]
+
+        # Bin by pixel column, which also works for logarithmic and inverted axes.
+        pixels = self.ax.transData.transform(np.column_stack([x, np.zeros_like(x)]))
+        bins = np.floor(np.nan_to_num(pixels[:, 0])).astype(int)
+        if len(bins) > 1 and bins[-1] < bins[0]:
+            bins = -bins
+        return decimate(x, ys, bins)
+
+    def setArtistData(self, artist, x, ys):
+        if isinstance(artist, LineCollection):
+            artist.set_segments([np.column_stack([x, y]) for y in np.atleast_2d(ys)])
+        else:
+            artist.set_data(x, ys[0])
+
+    def add(self, artist, x, ys):
+        # Registers an artist that has already been created, and sets its data.
+        self.connect()
+        x, ys = self.prepare(x, ys)
+        self.artists[artist] = (x, ys)
+        self.setArtistData(artist, *self.decimateFull(x, ys))
+
+    def plot(self, x, y, **kwargs):
+        # Same as ax.plot(x, y, **kwargs) for a single line, but decimated.
+        x, ys = self.prepare(x, y)
+        xDecimated, ysDecimated = self.decimateFull(x, ys[0:1])
+        (line,) = self.ax.plot(xDecimated, ysDecimated[0], **kwargs)
+        self.connect()
+        self.artists[line] = (x, ys[0:1])
+        return line
+
+    def lineCollection(self, x, ys, **kwargs):
+        # A LineCollection with one line for each row of ys, decimated.
+        x, ys = self.prepare(x, ys)
+        xDecimated, ysDecimated = self.decimateFull(x, ys)
+        collection = LineCollection(
+            [np.column_stack([xDecimated, y]) for y in ysDecimated], **kwargs
+        )
+        self.ax.add_collection(collection)
+        self.connect()
+        self.artists[collection] = (x, ys)
+        return collection
+
+    def connect(self):
+        # Clearing the axes also removes their callbacks, and all artists.
+        if self.callbacks is not self.ax.callbacks:
+            self.callbacks = self.ax.callbacks
+            self.callbacks.connect("xlim_changed", self.update)
+            self.artists = {}
+
+    def update(self, *args):
+        self.artists = {
+            artist: data
+            for artist, data in self.artists.items()
+            if artist.axes is self.ax
+        }
+        for artist, (x, ys) in self.artists.items():
+            self.setArtistData(artist, *self.decimateView(x, ys))
@@ -231,6 +231,12 @@ class EditDataPopup(moduleFrame.Popup):
         fileReader = fileReaders[fileReaders[:, 0] == fileType.get(), -1].item()
         data, additionTitles, signalTitles, defaultParams = fileReader(filePath, self)
 
+        if data.dtype.kind == "f":
+            data = ma.filled(data, np.nan)
+            formattedData = data.astype(str)
+            formattedData[np.isnan(data)] = ""
+            data = formattedData
+
         if (additionTitles is not None) and (signalTitles is not None):
             data = np.c_[additionTitles, data]
             data = np.r_[[np.insert(signalTitles, 0, "")], data]
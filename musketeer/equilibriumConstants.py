@@ -5,83 +5,19 @@ import numpy as np
 from numpy import ma
 
 from . import moduleFrame
+from .core.equilibriumConstants import (  # noqa: F401
+    DEFAULT_INITIAL_GUESS,
+    EquilibriumConstants,
+    GetKsAll,
+    GetKsNonspecific,
+    GetKsCustom,
+    GetKsNoCooperativity,
+    GetKsKnown,
+    strategies,
+)
 from .scrolledFrame import ScrolledFrame
 from .table import ButtonFrame, Table, WrappedLabel
 
-DEFAULT_INITIAL_GUESS = 1000
-
-
-class EquilibriumConstants(moduleFrame.Strategy):
-    requiredAttributes = (
-        "kNames",
-        "knownKs",
-        "initialKs",
-    )
-
-    @property
-    def initialKs(self):
-        return self._initialKs
-
-    @initialKs.setter
-    def initialKs(self, value):
-        if not isinstance(value, ma.MaskedArray):
-            value = ma.masked_invalid(value)
-        self._initialKs = value
-
-    @property
-    def outputNames(self):
-        return self.titration.speciation.variableNames
-
-    @property
-    def knownMask(self):
-        return ma.getmaskarray(self.knownKs)
-
-    @property
-    def variableNames(self):
-        return self.kNames[self.knownMask]
-
-    @property
-    def variableInitialGuesses(self):
-        return self.initialKs[self.knownMask].filled(DEFAULT_INITIAL_GUESS)
-
-    def run(self, kVars):
-        ks = self.knownKs.copy()
-        ks[self.knownMask] = kVars
-        return ma.compressed(ks)
-
-
-class GetKsAll(EquilibriumConstants):
-    # when every equilibrium constant is unknown and independent
-    @property
-    def kNames(self):
-        return self.titration.speciation.variableNames
-
-    @property
-    def knownKs(self):
-        return ma.array(np.empty(self.outputCount), mask=True)
-
-    @property
-    def initialKs(self):
-        return ma.array(np.empty(self.outputCount), mask=True)
-
-
-# TODO: make trimerIndices work with polymers
-class GetKsNonspecific(EquilibriumConstants):
-    @property
-    def kNames(self):
-        return self.titration.speciation.variableNames
-
-    @property
-    def knownKs(self):
-        knownKs = ma.masked_array(np.empty(self.outputCount))
-        knownKs[self.trimerIndices] = 0.001
-        knownKs[~self.trimerIndices] = ma.masked
-        return knownKs
-
-    @property
-    def initialKs(self):
-        return ma.array(np.empty(self.outputCount), mask=True)
-
 
 class CustomKsTable(Table):
     def __init__(self, master, titration):
@@ -267,59 +203,6 @@ class CustomKsPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetKsCustom(EquilibriumConstants):
-    Popup = CustomKsPopup
-
-    popupAttributes = (
-        "ksMatrix",
-        "statisticalFactors",
-        "kNames",
-        "knownKs",
-        "initialKs",
-    )
-
-    def run(self, kVars):
-        # microKs as a column vector, with the unknown values filled in
-        microKs = self.knownKs.copy()
-        microKs[self.knownMask] = kVars
-        microKs = np.atleast_2d(microKs).T
-
-        # perform the calculation as previewed in the popup
-        globalKs = self.statisticalFactors * np.prod(microKs**self.ksMatrix, 0)
-        return globalKs
-
-
-class GetKsNoCooperativity(GetKsCustom):
-    Popup = None
-    popupAttributes = ()
-    requiredAttributes = tuple(
-        set(EquilibriumConstants.requiredAttributes) | set(GetKsCustom.popupAttributes)
-    )
-
-    @property
-    def statisticalFactors(self):
-        statisticalFactors, _, _ = self.titration.speciation.noCooperativityValues
-        return statisticalFactors
-
-    @property
-    def ksMatrix(self):
-        _, ksMatrix, _ = self.titration.speciation.noCooperativityValues
-        return ksMatrix
-
-    @property
-    def kNames(self):
-        _, _, kNames = self.titration.speciation.noCooperativityValues
-        return kNames
-
-    @property
-    def knownKs(self):
-        return ma.array(np.empty(len(self.kNames)), mask=True)
-
-    @property
-    def initialKs(self):
-        return ma.array(np.empty(len(self.kNames)), mask=True)
-
-
 class KnownKsTable(Table):
     def __init__(self, master, titration):
         self.titration = titration
@@ -403,23 +286,12 @@ class KnownKsPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetKsKnown(EquilibriumConstants):
-    Popup = KnownKsPopup
-    popupAttributes = ("knownKs", "initialKs")
-
-    @property
-    def kNames(self):
-        return self.titration.speciation.variableNames
+GetKsCustom.Popup = CustomKsPopup
+GetKsKnown.Popup = KnownKsPopup
 
 
 class ModuleFrame(moduleFrame.ModuleFrame):
     group = "Equilibria"
     dropdownLabelText = "Fix any K values?"
-    dropdownOptions = {
-        "No, optimise all Ks": GetKsAll,
-        "Assume no cooperativity": GetKsNoCooperativity,
-        # "Assume second binding weak": GetKsNonspecific,
-        "Fix some known Ks": GetKsKnown,
-        "Custom": GetKsCustom,
-    }
+    dropdownOptions = strategies
     attributeName = "equilibriumConstants"
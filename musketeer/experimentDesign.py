@@ -0,0 +1,402 @@
+import itertools
+import os
+import tkinter as tk
+import tkinter.filedialog as fd
+import tkinter.ttk as ttk
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+from numpy import ma
+
+from . import moduleFrame
+from .style import padding
+from .table import ButtonFrame
+from .totalConcentrations import GetTotalConcsFromVolumes, convertConc, prefixes
+from .uncertainty import covarianceFromInformation, jacobianStep, residualVariance
+
+# A candidate addition schedule, made from the current one by scaling the
+# concentration of the titrant stock and its final volume, and spacing its additions
+# differently. The volumes are cumulative, in L. spacing is None for the current
+# schedule.
+Schedule = namedtuple(
+    "Schedule", ("titrant", "stockScale", "volumeScale", "spacing", "volumes")
+)
+DesignScore = namedtuple("DesignScore", ("schedule", "standardErrors", "criterion"))
+
+# Factors that the titrant stock concentration and final volume are scaled by.
+defaultStockScales = np.logspace(-1, 1, 5)
+defaultVolumeScales = np.logspace(np.log10(0.25), np.log10(4), 5)
+# The fraction of the final titrant volume added by addition i out of n is
+# (i / (n-1)) ** spacing, so higher values concentrate the additions near the start.
+defaultSpacings = (0.5, 1, 1.5, 2, 3)
+
+# Number of schedules evaluated by each task in the thread pool.
+chunkSize = 16
+
+
+def titrantIndex(volumes):
+    # The stock whose volume increases the most over the titration.
+    return np.argmax(volumes[-1] - volumes[0])
+
+
+def checkTitration(titration):
+    if not isinstance(titration.totalConcentrations, GetTotalConcsFromVolumes):
+        raise ValueError(
+            "Designing an experiment requires the total concentrations to be"
+            " calculated from stock concentrations and addition volumes."
+        )
+    if titration.equilibriumConstants.variableCount == 0:
+        raise ValueError("There are no equilibrium constants to determine.")
+
+
+def currentSchedule(titration):
+    volumes = np.asarray(titration.totalConcentrations.volumes, dtype=float)
+    return Schedule(titrantIndex(volumes), 1, 1, None, volumes)
+
+
+def candidateSchedules(
+    titration,
+    numAdditions=None,
+    stockScales=defaultStockScales,
+    volumeScales=defaultVolumeScales,
+    spacings=defaultSpacings,
+):
+    checkTitration(titration)
+    volumes = np.asarray(titration.totalConcentrations.volumes, dtype=float)
+    if numAdditions is None:
+        numAdditions = len(volumes)
+    titrant = titrantIndex(volumes)
+
+    # The other stocks keep their volumes, stretched to the new number of additions.
+    oldPositions = np.linspace(0, 1, len(volumes))
+    newPositions = np.linspace(0, 1, numAdditions)
+    baseVolumes = np.column_stack(
+        [np.interp(newPositions, oldPositions, column) for column in volumes.T]
+    )
+    firstVolume, lastVolume = volumes[0, titrant], volumes[-1, titrant]
+
+    schedules = []
+    for stockScale, volumeScale, spacing in itertools.product(
+        stockScales, volumeScales, spacings
+    ):
+        scheduleVolumes = baseVolumes.copy()
+        finalVolume = firstVolume + volumeScale * (lastVolume - firstVolume)
+        scheduleVolumes[:, titrant] = (
+            firstVolume + (finalVolume - firstVolume) * newPositions**spacing
+        )
+        schedules.append(
+            Schedule(titrant, stockScale, volumeScale, spacing, scheduleVolumes)
+        )
+    return schedules
+
+
+def scheduleStockConcs(titration, schedule, totalConcVars):
+    stockConcs = titration.totalConcentrations.filledStockConcs(totalConcVars)
+    stockConcs[:, schedule.titrant] *= schedule.stockScale
+    return stockConcs
+
+
+def scheduleTotalConcs(titration, schedule, totalConcVars):
+    stockConcs = scheduleStockConcs(titration, schedule, totalConcVars)
+    return (schedule.volumes @ stockConcs.T) / np.sum(
+        schedule.volumes, axis=1, keepdims=True
+    )
+
+
+def fisherInformation(titration, schedules, step=jacobianStep):
+    # The information about the log10 variables that each schedule would give per unit
+    # noise variance, JᵀJ, with the Jacobian J of the simulated curves taken by central
+    # differences. All schedules and offsets are simulated in a single batch.
+    logVariables = np.log10(titration.lastVars)
+    numVariables = len(logVariables)
+    kCount = titration.equilibriumConstants.variableCount
+    offsets = np.vstack(
+        [np.zeros(numVariables), np.eye(numVariables), -np.eye(numVariables)]
+    )
+    pointVariables = 10 ** (logVariables + offsets * step)
+    numPoints = len(pointVariables)
+
+    speciationVars = np.array(
+        [titration.equilibriumConstants.run(v[:kCount]) for v in pointVariables]
+    )
+    totalConcs = np.array(
+        [
+            scheduleTotalConcs(titration, schedule, v[kCount:])
+            for schedule in schedules
+            for v in pointVariables
+        ]
+    )
+    # Simulating with unit spectra gives the concentrations of each contributor.
+    spectra = ma.filled(titration.lastFittedSpectra, 0)
+    _, contributorConcs = titration.simulateBatch(
+        np.tile(speciationVars, (len(schedules), 1)),
+        totalConcs,
+        np.eye(spectra.shape[0]),
+    )
+    contributorConcs = np.nan_to_num(contributorConcs).reshape(
+        len(schedules), numPoints, -1, spectra.shape[0]
+    )
+
+    base = contributorConcs[:, 0]
+    forward = contributorConcs[:, 1 : numVariables + 1]
+    backward = contributorConcs[:, numVariables + 1 :]
+    curveDerivatives = ((forward - backward) / (2 * step)) @ spectra
+
+    # The spectra are refitted along with the variables, so only the changes in the
+    # curves that can't be matched by changing the spectra carry any information. All
+    # spectra are treated as unknown, which slightly underestimates the information.
+    numAdditions = base.shape[1]
+    projection = np.eye(numAdditions) - base @ np.linalg.pinv(base)
+    projected = projection[:, np.newaxis] @ curveDerivatives
+    return np.einsum("sinj,sknj->sik", projected, projected)
+
+
+def scoreSchedules(titration, schedules, variance):
+    # Expected standard errors of the log10 variables, from the linearised covariance
+    # s²(JᵀJ)⁻¹. Schedules are ranked by the sum of the variances of the log Ks, which
+    # is infinite if a schedule can't determine one of them.
+    kCount = titration.equilibriumConstants.variableCount
+    covariances, _ = covarianceFromInformation(
+        fisherInformation(titration, schedules), variance
+    )
+    variances = np.abs(np.diagonal(covariances, axis1=1, axis2=2))
+    return [
+        DesignScore(schedule, np.sqrt(v), np.sum(v[:kCount]))
+        for schedule, v in zip(schedules, variances)
+    ]
+
+
+def designExperiment(titration, schedules, callback=lambda *args: None):
+    # Scores the current schedule and the candidates, using the current fit as the true
+    # model and its residuals as the noise level. Returns the score of the current
+    # schedule, and the scores of the candidates from best to worst. callback is called
+    # with the number of candidates scored.
+    checkTitration(titration)
+    variance = residualVariance(titration)
+    current = scoreSchedules(titration, [currentSchedule(titration)], variance)[0]
+
+    # Simulating doesn't change the titration, so the chunks can be scored in parallel.
+    chunks = [
+        schedules[start : start + chunkSize]
+        for start in range(0, len(schedules), chunkSize)
+    ]
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        futures = [
+            executor.submit(scoreSchedules, titration, chunk, variance)
+            for chunk in chunks
+        ]
+        while True:
+            done, notDone = wait(futures, timeout=0.1)
+            callback(sum(len(chunk) for chunk, f in zip(chunks, futures) if f in done))
+            if not notDone:
+                break
+
+    scores = [score for future in futures for score in future.result()]
+    scores = [score for score in scores if np.isfinite(score.criterion)]
+    if len(scores) == 0:
+        raise ValueError(
+            "None of the candidate schedules could be evaluated, or determine all the"
+            " equilibrium constants."
+        )
+    return current, sorted(scores, key=lambda score: score.criterion)
+
+
+class DesignPopup(moduleFrame.Popup):
+    def __init__(self, numAdditions, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Design experiment")
+        self.resizable(False, False)
+        self.defaultNumAdditions = numAdditions
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        self.numAdditionsVar = tk.IntVar(self)
+        self.maxStockScaleVar = tk.DoubleVar(self)
+        self.maxVolumeScaleVar = tk.DoubleVar(self)
+        self.stepsVar = tk.IntVar(self)
+
+        rows = [
+            ("Number of additions:", self.numAdditionsVar),
+            ("Titrant stock concentration (up to × or ÷):", self.maxStockScaleVar),
+            ("Final titrant volume (up to × or ÷):", self.maxVolumeScaleVar),
+            ("Values to try for each:", self.stepsVar),
+        ]
+        for row, (text, variable) in enumerate(rows):
+            ttk.Label(frame, text=text).grid(row=row, column=0, sticky="w")
+            ttk.Spinbox(frame, textvariable=variable, from_=1, to=1000, width=6).grid(
+                row=row, column=1, sticky="e", padx=padding, pady=padding
+            )
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.saveButton.configure(text="Search")
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+        self.reset()
+
+    def reset(self):
+        self.numAdditionsVar.set(self.defaultNumAdditions)
+        self.maxStockScaleVar.set(10)
+        self.maxVolumeScaleVar.set(4)
+        self.stepsVar.set(5)
+
+    def saveData(self):
+        self.numAdditions = self.numAdditionsVar.get()
+        if self.numAdditions < 2:
+            raise ValueError("There must be at least 2 additions.")
+        maxStockScale = self.maxStockScaleVar.get()
+        maxVolumeScale = self.maxVolumeScaleVar.get()
+        if maxStockScale < 1 or maxVolumeScale < 1:
+            raise ValueError("The ranges must be at least 1.")
+        steps = self.stepsVar.get()
+        if steps < 1:
+            raise ValueError("At least one value must be tried.")
+        self.stockScales = np.logspace(
+            -np.log10(maxStockScale), np.log10(maxStockScale), steps
+        )
+        self.volumeScales = np.logspace(
+            -np.log10(maxVolumeScale), np.log10(maxVolumeScale), steps
+        )
+
+        self.saved = True
+        self.destroy()
+
+
+class DesignResultsPopup(tk.Toplevel):
+    def __init__(self, titration, current, scores, *args, numShown=20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Experiment design")
+        self.titration = titration
+        self.current = current
+        self.scores = scores[:numShown]
+
+        totalConcentrations = titration.totalConcentrations
+        self.stockTitles = list(totalConcentrations.stockTitles)
+        self.volumesUnit = totalConcentrations.volumesUnit
+        self.concsUnit = totalConcentrations.concsUnit
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        titrantTitle = self.stockTitles[current.schedule.titrant]
+        ttk.Label(
+            frame,
+            text=(
+                f"Expected standard errors of the log values when titrating with"
+                f" {titrantTitle}, at the current noise level. Schedules from best"
+                " to worst:"
+            ),
+        ).pack(fill="x", pady=padding)
+
+        variableNames = list(titration.equilibriumConstants.variableNames) + list(
+            totalConcentrations.variableNames
+        )
+        columns = ["Schedule", "Stock conc. ×", "Final volume ×", "Spacing"]
+        columns += [f"SE ({name})" for name in variableNames]
+        self.treeview = ttk.Treeview(
+            frame, columns=columns, show="headings", height=len(self.scores) + 1
+        )
+        for column in columns:
+            self.treeview.heading(column, text=column)
+            self.treeview.column(column, width=100, anchor="e")
+        self.treeview.column("Schedule", width=80, anchor="w")
+
+        self.treeview.insert("", "end", values=self.rowValues("Current", current))
+        for index, score in enumerate(self.scores):
+            self.treeview.insert("", "end", values=self.rowValues(index + 1, score))
+        self.treeview.pack(expand=True, fill="both")
+        self.treeview.bind("<<TreeviewSelect>>", self.showSelected)
+
+        self.volumesLabel = ttk.Label(frame)
+        self.volumesLabel.pack(fill="x", pady=padding)
+        self.volumesTreeview = ttk.Treeview(
+            frame, columns=["Addition"] + self.stockTitles, show="headings"
+        )
+        for column in ["Addition"] + self.stockTitles:
+            self.volumesTreeview.heading(column, text=column)
+            self.volumesTreeview.column(column, width=100, anchor="e")
+        self.volumesTreeview.pack(expand=True, fill="both")
+
+        buttonFrame = ttk.Frame(frame)
+        buttonFrame.pack(pady=padding)
+        ttk.Button(
+            buttonFrame,
+            text="Save volumes to CSV",
+            command=self.saveCSV,
+            style="success.Outline.TButton",
+        ).pack(side="left", padx=padding)
+        ttk.Button(
+            buttonFrame, text="Close", command=self.destroy, style="Outline.TButton"
+        ).pack(side="left", padx=padding)
+
+        # Show the recommended schedule.
+        self.treeview.selection_set(self.treeview.get_children()[1])
+
+    @staticmethod
+    def rowValues(name, score):
+        schedule = score.schedule
+        spacing = "" if schedule.spacing is None else f"{schedule.spacing:.3g}"
+        return [
+            name,
+            f"{schedule.stockScale:.3g}",
+            f"{schedule.volumeScale:.3g}",
+            spacing,
+        ] + [f"{error:.2g}" for error in score.standardErrors]
+
+    @property
+    def selectedScore(self):
+        index = self.treeview.index(self.treeview.selection()[0])
+        return self.current if index == 0 else self.scores[index - 1]
+
+    def selectedTable(self):
+        # The stock concentrations and cumulative volumes of the selected schedule, in
+        # the units of the fit.
+        schedule = self.selectedScore.schedule
+        stockConcs = scheduleStockConcs(
+            self.titration, schedule, self.titration.lastTotalConcVars
+        )
+        freeNames = self.titration.totalConcentrations.freeNames
+        concRows = [
+            [f"{name} ({self.concsUnit})"]
+            + [convertConc(conc, "M", self.concsUnit) for conc in row]
+            for name, row in zip(freeNames, stockConcs)
+        ]
+        volumes = schedule.volumes / prefixes[self.volumesUnit.strip("L")]
+        volumeRows = [
+            [str(index + 1)] + [f"{volume:.4g}" for volume in row]
+            for index, row in enumerate(volumes)
+        ]
+        return concRows, volumeRows
+
+    def showSelected(self, *args):
+        concRows, volumeRows = self.selectedTable()
+        self.volumesTreeview.delete(*self.volumesTreeview.get_children())
+        for row in concRows + volumeRows:
+            self.volumesTreeview.insert("", "end", values=row)
+        self.volumesTreeview.configure(height=len(concRows) + len(volumeRows))
+        self.volumesLabel.configure(
+            text=(
+                "Stock concentrations and cumulative addition volumes"
+                f" ({self.volumesUnit}):"
+            )
+        )
+
+    def saveCSV(self):
+        initialfile = os.path.splitext(self.titration.title)[0] + "_design"
+        fileName = fd.asksaveasfilename(
+            title="Save addition volumes",
+            initialfile=initialfile,
+            filetypes=[("CSV file", "*.csv")],
+            defaultextension=".csv",
+            parent=self,
+        )
+        if fileName == "":
+            return
+        concRows, volumeRows = self.selectedTable()
+        output = np.array(
+            [[f"Addition ({self.volumesUnit})"] + self.stockTitles]
+            + concRows
+            + volumeRows
+        )
+        np.savetxt(fileName, output, fmt="%s", delimiter=",", encoding="utf-8-sig")
@@ -0,0 +1,229 @@
+import tkinter as tk
+import tkinter.filedialog as fd
+import tkinter.ttk as ttk
+import warnings
+from concurrent.futures import ThreadPoolExecutor, wait
+from copy import deepcopy
+from pathlib import Path, PurePath
+
+import numpy as np
+from numpy import ma
+
+from . import moduleFrame
+from .editData import Params, predefinedParams
+from .style import padding
+from .table import ButtonFrame
+from .core.titration import Titration
+from .titrationReader import (
+    detectTitles,
+    fileReaders,
+    fillPredefinedParams,
+    interactiveFileReaders,
+    isNumeric,
+)
+
+# Attributes that are calculated by fitting, and are therefore not copied from the
+# template.
+resultAttributes = (
+    "fitResult",
+    "lastKVars",
+    "lastTotalConcVars",
+    "lastKs",
+    "lastTotalConcs",
+    "lastSpeciesConcs",
+    "lastSignalVars",
+    "lastFittedSpectra",
+    "lastFittedCurves",
+    "interpolatedTotalConcs",
+    "interpolatedSpeciesConcs",
+    "interpolatedFittedCurves",
+)
+
+
+def readDataset(filePath, fileReader, master):
+    data, additionTitles, signalTitles, defaultParams = fileReader(filePath, master)
+
+    titration = Titration(PurePath(filePath).stem)
+    if data.dtype.kind != "f":
+        # Point out the first cell that isn't a title or a number.
+        hasSignalTitles, hasAdditionTitles = detectTitles(
+            data[0], data[1] if len(data) > 1 else []
+        )
+        body = data[int(hasSignalTitles) :, int(hasAdditionTitles) :]
+        rows, columns = np.nonzero(~np.vectorize(isNumeric, otypes=[bool])(body))
+        if len(rows) == 0:
+            raise ValueError("File contains non-numeric data.")
+        row = rows[0] + int(hasSignalTitles)
+        column = columns[0] + int(hasAdditionTitles)
+        raise ValueError(
+            f'File contains non-numeric data: "{data[row, column]}" in row {row + 1},'
+            f" column {column + 1}."
+        )
+    if data.size == 0 or np.isnan(data).all():
+        raise ValueError("No data found.")
+    titration.rawData = ma.masked_invalid(data)
+    if additionTitles is not None:
+        titration.additionTitles = additionTitles
+    if signalTitles is not None:
+        titration.signalTitles = signalTitles
+    fillPredefinedParams(titration, predefinedParams.get(defaultParams, Params()))
+    return titration
+
+
+def readFolder(folderPath, fileReader, master, callback=lambda *args: None):
+    # Returns a list of (name, titration) tuples, one for each file of the reader's file
+    # type in the folder.
+    pattern = fileReaders[fileReaders[:, -1] == fileReader, 1].item()
+    filePaths = sorted(Path(folderPath).glob(pattern))
+    if len(filePaths) == 0:
+        raise ValueError(f"No files matching {pattern} found in {folderPath}")
+
+    if fileReader in interactiveFileReaders:
+        # Requires user input, so has to be run in the main thread.
+        results = []
+        for filePath in filePaths:
+            try:
+                results.append(readDataset(filePath, fileReader, master))
+            except Exception as e:
+                results.append(e)
+            callback()
+    else:
+        with ThreadPoolExecutor() as executor:
+            futures = [
+                executor.submit(readDataset, filePath, fileReader, master)
+                for filePath in filePaths
+            ]
+            while wait(futures, timeout=0.1).not_done:
+                callback()
+        results = [future.exception() or future.result() for future in futures]
+
+    datasets = []
+    for filePath, result in zip(filePaths, results):
+        if isinstance(result, Exception):
+            warnings.warn(f"Could not import {filePath.name}: {result}")
+        else:
+            datasets.append((filePath.stem, result))
+
+    return datasets
+
+
+def applyTemplate(template, dataset):
+    # Returns a copy of the template fit, with the data replaced by that of the dataset.
+    fit = deepcopy(template)
+    for attribute in resultAttributes:
+        if hasattr(fit, attribute):
+            delattr(fit, attribute)
+    for attribute in ("_additionTitles", "_signalTitles"):
+        if hasattr(fit, attribute) and not hasattr(dataset, attribute):
+            delattr(fit, attribute)
+
+    for attribute, value in vars(dataset).items():
+        # Keep the range of continuous signals from the template.
+        if attribute not in ("_revision", "continuousRange"):
+            setattr(fit, attribute, deepcopy(value))
+
+    # Strategies with options for each addition or signal can't be reused if the number
+    # of additions or signals differs from the template.
+    if (
+        fit.numAdditions != template.numAdditions
+        and fit.totalConcentrations is not None
+    ):
+        warnings.warn(
+            f"{dataset.title} has a different number of additions than the template, so"
+            " the concentrations need to be entered manually."
+        )
+        fit.totalConcentrations = None
+    if (
+        fit.processedSignalCount != template.processedSignalCount
+        and fit.knownSignals is not None
+    ):
+        warnings.warn(
+            f"{dataset.title} has a different number of signals than the template, so"
+            " the known spectra need to be entered manually."
+        )
+        fit.knownSignals = None
+
+    return fit
+
+
+class ImportFolderPopup(moduleFrame.Popup):
+    def __init__(self, master, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.title("Import folder")
+        self.resizable(True, False)
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        self.folderPathVar = tk.StringVar(self)
+        self.fileTypeVar = tk.StringVar(self)
+        self.templatePathVar = tk.StringVar(self)
+
+        folderLabel = ttk.Label(frame, text="Folder:")
+        folderLabel.grid(row=0, column=0, sticky="w")
+        folderEntry = ttk.Entry(frame, textvariable=self.folderPathVar, width=50)
+        folderEntry.grid(row=0, column=1, sticky="ew", padx=padding, pady=padding)
+        folderButton = ttk.Button(
+            frame, text="Browse", command=self.browseFolder, style="Outline.TButton"
+        )
+        folderButton.grid(row=0, column=2, sticky="ew")
+
+        fileTypeLabel = ttk.Label(frame, text="File type:")
+        fileTypeLabel.grid(row=1, column=0, sticky="w")
+        fileTypeNames = fileReaders[:, 0].tolist()
+        fileTypeMenu = ttk.OptionMenu(
+            frame,
+            self.fileTypeVar,
+            fileTypeNames[0],
+            *fileTypeNames,
+            style="Outline.TMenubutton",
+        )
+        fileTypeMenu.grid(row=1, column=1, sticky="w", padx=padding, pady=padding)
+
+        templateLabel = ttk.Label(frame, text="Template fit file (optional):")
+        templateLabel.grid(row=2, column=0, sticky="w")
+        templateEntry = ttk.Entry(frame, textvariable=self.templatePathVar, width=50)
+        templateEntry.grid(row=2, column=1, sticky="ew", padx=padding, pady=padding)
+        templateButton = ttk.Button(
+            frame,
+            text="Browse",
+            command=self.browseTemplate,
+            style="Outline.TButton",
+        )
+        templateButton.grid(row=2, column=2, sticky="ew")
+
+        frame.columnconfigure(1, weight=1)
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+    def browseFolder(self):
+        folderPath = fd.askdirectory(title="Import folder", parent=self)
+        if folderPath != "":
+            self.folderPathVar.set(folderPath)
+
+    def browseTemplate(self):
+        templatePath = fd.askopenfilename(
+            title="Choose template fit file",
+            filetypes=[("Musketeer files", "*.fit")],
+            parent=self,
+        )
+        if templatePath != "":
+            self.templatePathVar.set(templatePath)
+
+    def reset(self):
+        self.folderPathVar.set("")
+        self.fileTypeVar.set(fileReaders[0, 0])
+        self.templatePathVar.set("")
+
+    def saveData(self):
+        self.folderPath = self.folderPathVar.get()
+        if not Path(self.folderPath).is_dir():
+            raise ValueError(f"{self.folderPath} is not a folder")
+        self.fileReader = fileReaders[
+            fileReaders[:, 0] == self.fileTypeVar.get(), -1
+        ].item()
+        self.templatePath = self.templatePathVar.get() or None
+
+        self.saved = True
+        self.destroy()
@@ -0,0 +1,172 @@
+import tkinter as tk
+import tkinter.ttk as ttk
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import moduleFrame
+from .style import padding
+from .table import ButtonFrame
+
+
+class GlobalFit:
+    # Fits several titrations at once, with a single set of equilibrium constants. Each
+    # titration keeps its own data, total concentrations, contributors and signal
+    # fitting. The variables are the shared equilibrium constants, followed by the
+    # total concentration variables of each titration in turn.
+
+    def __init__(self, titrations):
+        if len(titrations) < 2:
+            raise ValueError("At least two fits are needed for a global fit.")
+        kNames = titrations[0].equilibriumConstants.variableNames
+        for titration in titrations[1:]:
+            if not np.array_equal(titration.equilibriumConstants.variableNames, kNames):
+                raise ValueError(
+                    "All fits must have the same equilibrium constants to be fitted"
+                    f" globally, but {titration.title} has"
+                    f" {', '.join(titration.equilibriumConstants.variableNames)}"
+                    f" instead of {', '.join(kNames)}."
+                )
+        self.titrations = titrations
+        self.executor = None
+
+    @property
+    def kVariableCount(self):
+        return self.titrations[0].equilibriumConstants.variableCount
+
+    @property
+    def concsSplitIndices(self):
+        counts = [
+            titration.totalConcentrations.variableCount for titration in self.titrations
+        ]
+        return np.cumsum(counts)[:-1]
+
+    def splitVariables(self, variables):
+        # Returns the variables to pass to each titration's optimisationFunc.
+        kVars = variables[: self.kVariableCount]
+        concVars = np.split(variables[self.kVariableCount :], self.concsSplitIndices)
+        return [
+            np.concatenate([kVars, titrationConcVars]) for titrationConcVars in concVars
+        ]
+
+    @staticmethod
+    def runTitration(titration, variables):
+        return titration.optimisationFunc(variables)
+
+    def optimisationFunc(self, variables):
+        # Each titration runs its own speciation and spectra fitting, which mostly
+        # happens in numpy and scipy with the GIL released, so they run in parallel.
+        mapFunction = map if self.executor is None else self.executor.map
+        residuals = list(
+            mapFunction(
+                self.runTitration, self.titrations, self.splitVariables(variables)
+            )
+        )
+
+        # Datasets can have very different units and numbers of points, so each one
+        # contributes its mean squared residual relative to the variance of its data.
+        combined = sum(
+            residual**2 / titration.processedData.count() / self.dataVariance(titration)
+            for titration, residual in zip(self.titrations, residuals)
+        )
+        return np.sqrt(combined)
+
+    @staticmethod
+    def dataVariance(titration):
+        variance = np.var(titration.processedData)
+        if not np.isfinite(variance) or variance == 0:
+            return 1
+        return variance
+
+    def optimisationFuncLog(self, logVariables):
+        return self.optimisationFunc(10**logVariables)
+
+    @property
+    def initialGuess(self):
+        return np.log10(
+            np.concatenate(
+                [self.titrations[0].equilibriumConstants.variableInitialGuesses]
+                + [
+                    titration.totalConcentrations.variableInitialGuesses
+                    for titration in self.titrations
+                ]
+            )
+        )
+
+    def optimise(self, callback=None):
+        from scipy.optimize import minimize
+
+        self.executor = ThreadPoolExecutor(max_workers=len(self.titrations))
+        try:
+            result = minimize(
+                self.optimisationFuncLog,
+                x0=self.initialGuess,
+                method="nelder-mead",
+                callback=callback,
+            )
+            # to make sure the last fit is the optimal one
+            self.optimisationFuncLog(result.x)
+        finally:
+            self.executor.shutdown()
+            self.executor = None
+
+        for titration in self.titrations:
+            titration.calculateInterpolatedConcsAndSpectra()
+
+        return result.x
+
+    def fitData(self, callback=None):
+        logVariables = self.optimise(callback)
+        for titration, titrationVariables in zip(
+            self.titrations, self.splitVariables(10**logVariables)
+        ):
+            titration.fitResult = titrationVariables
+
+    @property
+    def kVars(self):
+        return self.titrations[0].lastKVars
+
+    @property
+    def RMSEs(self):
+        return [titration.RMSE for titration in self.titrations]
+
+
+class GlobalFitPopup(moduleFrame.Popup):
+    def __init__(self, fitNames, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Global fit")
+        self.resizable(False, False)
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        label = ttk.Label(
+            frame,
+            text="Fit the selected fits together, with shared equilibrium constants:",
+        )
+        label.pack(fill="x", pady=padding)
+
+        self.fitVars = []
+        for fitName in fitNames:
+            fitVar = tk.BooleanVar(self, value=True)
+            checkbutton = ttk.Checkbutton(frame, text=fitName, variable=fitVar)
+            checkbutton.pack(fill="x", padx=padding, pady=padding / 2)
+            self.fitVars.append(fitVar)
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.saveButton.configure(text="Fit")
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+    def reset(self):
+        for fitVar in self.fitVars:
+            fitVar.set(True)
+
+    def saveData(self):
+        self.selectedIndices = [
+            index for index, fitVar in enumerate(self.fitVars) if fitVar.get()
+        ]
+        if len(self.selectedIndices) < 2:
+            raise ValueError("Please select at least two fits.")
+
+        self.saved = True
+        self.destroy()
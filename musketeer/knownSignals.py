@@ -9,17 +9,16 @@ from numpy import ma
 from tksheet import Sheet
 
 from . import moduleFrame
+from .core.knownSignals import (  # noqa: F401
+    KnownSignals,
+    GetKnownSpectra,
+    GetAllSpectra,
+    strategies,
+)
 from .style import padding
 from .table import ButtonFrame
 
 
-class KnownSignals(moduleFrame.Strategy):
-    requiredAttributes = ("knownSpectra",)
-
-    def run(self):
-        return self.knownSpectra
-
-
 class KnownSpectraPopup(moduleFrame.Popup):
     def __init__(self, titration, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -243,61 +242,19 @@ class KnownSpectraPerMoleculePopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetKnownSpectra(KnownSignals):
-    Popup = KnownSpectraPopup
-    popupAttributes = ("knownSpectra", "spectraTitles", "signalTitles")
+def getKnownSpectraPopup(self):
+    singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
+    if type(singleMoleculeIndex) is np.ndarray:
+        return KnownSpectraPerMoleculePopup
+    else:
+        return KnownSpectraPopup
 
-    @property
-    def Popup(self):
-        singleMoleculeIndex = self.titration.contributingSpecies.singleMoleculeIndex
-        if type(singleMoleculeIndex) is np.ndarray:
-            return KnownSpectraPerMoleculePopup
-        else:
-            return KnownSpectraPopup
-
-    @property
-    def knownSpectra(self):
-        currentContributors = self.titration.contributors.outputNames
-        lastContributors = self.spectraTitles
-        lastSignals = self.signalTitles
-        currentSignals = self.titration.processedSignalTitlesStrings
-
-        if not set(currentSignals).issubset(lastSignals):
-            return ma.masked_all((len(currentContributors), len(currentSignals)))
-        relevantSignalIndices = [
-            np.where(lastSignals == signal)[0][0] for signal in currentSignals
-        ]
-        relevantSignals = self._knownSpectra[:, relevantSignalIndices]
-
-        output = ma.masked_all((len(currentContributors), len(currentSignals)))
-        for spectrumTitle, spectrum in zip(lastContributors, relevantSignals):
-            if spectrumTitle in currentContributors:
-                output[np.where(currentContributors == spectrumTitle)[0][0], :] = (
-                    spectrum
-                )
-        return output
 
-    @knownSpectra.setter
-    def knownSpectra(self, value):
-        self._knownSpectra = value
-
-
-class GetAllSpectra(KnownSignals):
-    @property
-    def knownSpectra(self):
-        return ma.masked_all(
-            (
-                self.titration.contributors.outputCount,
-                self.titration.processedSignalCount,
-            )
-        )
+GetKnownSpectra.Popup = property(getKnownSpectraPopup)
 
 
 class ModuleFrame(moduleFrame.ModuleFrame):
     group = "Spectra"
     dropdownLabelText = "Specify any known spectra?"
-    dropdownOptions = {
-        "Optimise all spectra": GetAllSpectra,
-        "Specify some known spectra": GetKnownSpectra,
-    }
+    dropdownOptions = strategies
     attributeName = "knownSignals"
@@ -0,0 +1,335 @@
+import tkinter as tk
+import tkinter.ttk as ttk
+import warnings
+from collections import namedtuple
+from copy import deepcopy
+
+import numpy as np
+
+from . import (
+    contributingSpecies,
+    contributors,
+    equilibriumConstants,
+    fitSignals,
+    knownSignals,
+    moduleFrame,
+    processPool,
+    speciation,
+)
+from .core import builder
+from .processPool import runInProcessPool
+from .style import padding
+from .table import ButtonFrame
+
+# Candidates with stoichiometries use custom speciation with those stoichiometries,
+# instead of the speciation strategy called speciationName.
+Candidate = namedtuple(
+    "Candidate",
+    ("name", "speciationName", "equilibriumConstantsName", "stoichiometries"),
+    defaults=(None,),
+)
+ModelScore = namedtuple(
+    "ModelScore",
+    ("candidate", "titration", "numParameters", "RMSE", "AIC", "BIC"),
+)
+
+# Models without a built-in binding isotherm that are also compared by default, with
+# the stoichiometries of the first two components.
+presetStoichiometries = {
+    "2:1 binding": ((1, 1), (2, 1)),
+}
+
+# Modules whose options are set for a specific model in a popup, and are therefore
+# reset to their defaults for the other candidate models.
+dependentModules = (contributingSpecies, contributors, knownSignals, fitSignals)
+
+
+def isCompatible(titration, candidate):
+    # Whether the model can be used with the titration's components and data, e.g. 1:1
+    # binding needs exactly two components.
+    fit = buildCandidate(titration, candidate)
+    initialGuess = np.concatenate(
+        [
+            fit.equilibriumConstants.variableInitialGuesses,
+            fit.totalConcentrations.variableInitialGuesses,
+        ]
+    )
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fit.optimisationFunc(initialGuess)
+    except Exception:
+        return False
+    return True
+
+
+def getModelCandidates(titration, modelName, speciationName, stoichiometries=None):
+    # The candidates for each way of calculating the Ks of a model that don't need
+    # any options to be entered in a popup, and that can be used with the titration.
+    # Assuming no cooperativity is only included when it reduces the number of Ks.
+    candidates = []
+    for (
+        kName,
+        EquilibriumConstants,
+    ) in equilibriumConstants.ModuleFrame.dropdownOptions.items():
+        if EquilibriumConstants.Popup is not None:
+            continue
+        candidate = Candidate(
+            f"{modelName}, {kName}", speciationName, kName, stoichiometries
+        )
+        if not isCompatible(titration, candidate):
+            continue
+        if EquilibriumConstants is equilibriumConstants.GetKsNoCooperativity:
+            fit = buildCandidate(titration, candidate)
+            statisticalFactors, _, kNames = fit.speciation.noCooperativityValues
+            if len(kNames) == len(statisticalFactors):
+                continue
+        candidates.append(candidate)
+    return candidates
+
+
+def getCandidates(titration):
+    # All built-in binding isotherms, and the preset stoichiometries, padded with
+    # zeros for any further components.
+    candidates = []
+    for speciationName, Speciation in speciation.ModuleFrame.dropdownOptions.items():
+        if Speciation.Popup is None:
+            candidates += getModelCandidates(titration, speciationName, speciationName)
+    freeCount = titration.totalConcentrations.freeCount
+    for modelName, stoichiometries in presetStoichiometries.items():
+        if freeCount < 2:
+            continue
+        zeros = (0,) * (freeCount - 2)
+        stoichiometries = tuple(row + zeros for row in stoichiometries)
+        candidates += getModelCandidates(
+            titration, modelName, "Custom", stoichiometries
+        )
+    return candidates
+
+
+def parseStoichiometries(text, freeCount):
+    # Reads complexes written like the names of the binding isotherms, e.g.
+    # "1:1, 2:1" for HG and H₂G, with the number of each component in each complex.
+    try:
+        stoichiometries = tuple(
+            tuple(int(number) for number in row.split(":")) for row in text.split(",")
+        )
+    except ValueError:
+        raise ValueError(
+            f"Could not read the complexes {text}. Please enter the number of each"
+            " component in a complex separated by colons, and separate the complexes"
+            " by commas, e.g. 1:1, 2:1"
+        )
+    if any(len(row) != freeCount for row in stoichiometries):
+        raise ValueError(
+            f"Each complex must contain a number for each of the {freeCount}"
+            " components."
+        )
+    return stoichiometries
+
+
+def buildCandidate(titration, candidate):
+    # Returns a copy of the titration using the candidate model.
+    fit = deepcopy(titration)
+    fit.title = candidate.name
+    if candidate.stoichiometries is None:
+        fit.speciation = speciation.ModuleFrame.dropdownOptions[
+            candidate.speciationName
+        ](fit)
+    else:
+        builder.setStoichiometries(fit, candidate.stoichiometries)
+    fit.equilibriumConstants = equilibriumConstants.ModuleFrame.dropdownOptions[
+        candidate.equilibriumConstantsName
+    ](fit)
+    for module in dependentModules:
+        attributeName = module.ModuleFrame.attributeName
+        strategy = getattr(fit, attributeName)
+        if strategy is None or strategy.popupAttributes:
+            Default = list(module.ModuleFrame.dropdownOptions.values())[0]
+            setattr(fit, attributeName, Default(fit))
+    return fit
+
+
+def scoreModel(titration, candidate):
+    # Uses the same information criteria as the results tab.
+    AIC, BIC = titration.informationCriteria()
+    return ModelScore(
+        candidate,
+        titration,
+        titration.parameterCount,
+        titration.RMSE,
+        AIC,
+        BIC,
+    )
+
+
+def fitCandidate(candidate):
+    # Runs in a worker process.
+    fit = buildCandidate(processPool.workerTitration, candidate)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        fit.fitData()
+    return scoreModel(fit, candidate)
+
+
+def compareModels(titration, candidates, callback=lambda *args: None):
+    # Fits each candidate model in parallel, and returns their scores from best to
+    # worst BIC. callback is called with the number of fits completed.
+    if len(candidates) == 0:
+        raise ValueError("There are no models to compare.")
+    futures = runInProcessPool(
+        titration, fitCandidate, [(candidate,) for candidate in candidates], callback
+    )
+
+    scores = []
+    for candidate, future in zip(candidates, futures):
+        if future.exception() is not None:
+            warnings.warn(f"Could not fit {candidate.name}: {future.exception()}")
+        else:
+            scores.append(future.result())
+    if len(scores) == 0:
+        raise ValueError("None of the models could be fitted.")
+    return sorted(scores, key=lambda score: score.BIC)
+
+
+class ModelComparisonPopup(moduleFrame.Popup):
+    def __init__(self, titration, candidates, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Compare models")
+        self.resizable(False, False)
+        self.titration = titration
+        self.candidates = []
+        self.candidateVars = []
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        label = ttk.Label(frame, text="Fit and compare the selected models:")
+        label.pack(fill="x", pady=padding)
+
+        self.candidatesFrame = ttk.Frame(frame)
+        self.candidatesFrame.pack(fill="x")
+        for candidate in candidates:
+            self.addCandidate(candidate)
+
+        freeNames = ":".join(titration.totalConcentrations.freeNames)
+        addLabel = ttk.Label(
+            frame,
+            text=f"Add a model, by entering its complexes as {freeNames}, e.g. 1:1,"
+            " 2:1",
+        )
+        addLabel.pack(fill="x", pady=padding)
+
+        addFrame = ttk.Frame(frame)
+        addFrame.pack(fill="x")
+        self.stoichiometriesEntry = ttk.Entry(addFrame)
+        self.stoichiometriesEntry.pack(side="left", expand=True, fill="x")
+        addButton = ttk.Button(
+            addFrame,
+            text="Add",
+            command=self.addModel,
+            style="Outline.TButton",
+        )
+        addButton.pack(side="left", padx=padding)
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.saveButton.configure(text="Fit")
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+    def addCandidate(self, candidate):
+        candidateVar = tk.BooleanVar(self, value=True)
+        checkbutton = ttk.Checkbutton(
+            self.candidatesFrame, text=candidate.name, variable=candidateVar
+        )
+        checkbutton.pack(fill="x", padx=padding, pady=padding / 2)
+        self.candidates.append(candidate)
+        self.candidateVars.append(candidateVar)
+
+    def addModel(self):
+        text = self.stoichiometriesEntry.get()
+        stoichiometries = parseStoichiometries(
+            text, self.titration.totalConcentrations.freeCount
+        )
+        candidates = getModelCandidates(
+            self.titration, f"Custom ({text.strip()})", "Custom", stoichiometries
+        )
+        if len(candidates) == 0:
+            raise ValueError(f"The model {text} can't be used with this fit.")
+        for candidate in candidates:
+            self.addCandidate(candidate)
+        self.stoichiometriesEntry.delete(0, "end")
+
+    def reset(self):
+        for candidateVar in self.candidateVars:
+            candidateVar.set(True)
+
+    def saveData(self):
+        self.selectedCandidates = [
+            candidate
+            for candidate, candidateVar in zip(self.candidates, self.candidateVars)
+            if candidateVar.get()
+        ]
+        if len(self.selectedCandidates) == 0:
+            raise ValueError("Please select at least one model.")
+
+        self.saved = True
+        self.destroy()
+
+
+class ModelComparisonResultsPopup(tk.Toplevel):
+    def __init__(self, scores, addFit, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Model comparison")
+        self.scores = scores
+        self.addFit = addFit
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        ttk.Label(
+            frame, text="Models from best to worst (lower AIC and BIC are better):"
+        ).pack(fill="x", pady=padding)
+
+        columns = ["Model", "Parameters", "RMSE", "AIC", "ΔAIC", "BIC", "ΔBIC"]
+        self.treeview = ttk.Treeview(
+            frame, columns=columns, show="headings", height=len(scores)
+        )
+        for column in columns:
+            self.treeview.heading(column, text=column)
+            self.treeview.column(column, width=100, anchor="e")
+        self.treeview.column("Model", width=300, anchor="w")
+
+        bestAIC = min(score.AIC for score in scores)
+        bestBIC = min(score.BIC for score in scores)
+        for score in scores:
+            self.treeview.insert(
+                "",
+                "end",
+                values=[
+                    score.candidate.name,
+                    score.numParameters,
+                    f"{score.RMSE:.4g}",
+                    f"{score.AIC:.1f}",
+                    f"{score.AIC - bestAIC:.1f}",
+                    f"{score.BIC:.1f}",
+                    f"{score.BIC - bestBIC:.1f}",
+                ],
+            )
+        self.treeview.pack(expand=True, fill="both")
+
+        buttonFrame = ttk.Frame(frame)
+        buttonFrame.pack(pady=padding)
+        ttk.Button(
+            buttonFrame,
+            text="Open selected as new fit",
+            command=self.openSelected,
+            style="success.Outline.TButton",
+        ).pack(side="left", padx=padding)
+        ttk.Button(
+            buttonFrame, text="Close", command=self.destroy, style="Outline.TButton"
+        ).pack(side="left", padx=padding)
+
+    def openSelected(self):
+        for item in self.treeview.selection():
+            score = self.scores[self.treeview.index(item)]
+            self.addFit(deepcopy(score.titration), score.candidate.name)
@@ -2,53 +2,12 @@ import importlib
 import sys
 import tkinter as tk
 import tkinter.ttk as ttk
-from abc import ABC
 
 from . import style
+from .core.strategy import Strategy  # noqa: F401
 from .style import padding
 
 
-# all module strategies should be a subclass
-class Strategy(ABC):
-    Popup = None
-
-    # List of attributes that are set through the popup window, and can be
-    # loaded from / saved to a file.
-    popupAttributes = ()
-
-    # List of attributes that each base Strategy class should define, for all concrete
-    # strategies to set either in __init__ or from the popup. Compliance by the concrete
-    # strategies is checked in ModuleFrame.callback().
-    requiredAttributes = NotImplemented
-
-    def __init_subclass__(cls, **kwargs):
-        super().__init_subclass__(**kwargs)
-        if cls.requiredAttributes is NotImplemented:
-            raise NotImplementedError(
-                f"Can't define class {cls.__name__} without implementing the abstract"
-                " class attribute requiredAttributes"
-            )
-
-    def checkAttributes(self):
-        for attr in self.requiredAttributes:
-            if not hasattr(self, attr):
-                raise NotImplementedError(
-                    f"Can't set strategy {type(self).__name__} without"
-                    f" implementing the required attribute {attr}"
-                )
-
-    def __init__(self, titration):
-        self.titration = titration
-
-    @property
-    def outputCount(self):
-        return len(self.outputNames)
-
-    @property
-    def variableCount(self):
-        return len(self.variableNames)
-
-
 class Popup(tk.Toplevel):
     def show(self):
         if self._windowingsystem != "aqua":
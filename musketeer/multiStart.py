@@ -0,0 +1,240 @@
+import os
+import tkinter as tk
+import tkinter.ttk as ttk
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+from . import moduleFrame, processPool
+from .processPool import runInProcessPool
+from .style import padding
+from .table import ButtonFrame
+
+Minimum = namedtuple("Minimum", ("logVariables", "residual"))
+
+samplingMethods = {
+    "Sobol sequence": "sobol",
+    "Latin hypercube": "lhs",
+}
+
+# Half-width of the box that starting points are drawn from, in orders of magnitude
+# around the initial guesses.
+defaultKDecades = 3
+defaultConcDecades = 1
+
+# Minima closer than this in every log10 variable are counted as the same minimum.
+minimumTolerance = 0.01
+
+
+def getBounds(titration, kDecades=defaultKDecades, concDecades=defaultConcDecades):
+    initialGuess = np.log10(
+        np.concatenate(
+            [
+                titration.equilibriumConstants.variableInitialGuesses,
+                titration.totalConcentrations.variableInitialGuesses,
+            ]
+        )
+    )
+    halfWidths = np.concatenate(
+        [
+            np.full(titration.equilibriumConstants.variableCount, kDecades),
+            np.full(titration.totalConcentrations.variableCount, concDecades),
+        ]
+    )
+    return initialGuess, initialGuess - halfWidths, initialGuess + halfWidths
+
+
+def sampleStarts(lower, upper, numStarts, method="sobol"):
+    from scipy.stats import qmc
+
+    if method == "sobol":
+        sampler = qmc.Sobol(len(lower))
+        # Sobol sequences are only balanced for powers of 2.
+        samples = sampler.random_base2(int(np.ceil(np.log2(numStarts))))[:numStarts]
+    elif method == "lhs":
+        sampler = qmc.LatinHypercube(len(lower))
+        samples = sampler.random(numStarts)
+    else:
+        raise ValueError(f"Unknown sampling method {method}")
+    return qmc.scale(samples, lower, upper)
+
+
+def screen(titration, starts, callback=lambda *args: None):
+    # A single evaluation at each starting point, to decide which are worth refining.
+    residuals = np.empty(len(starts))
+    with warnings.catch_warnings():
+        # Extreme starting points often overflow, which is expected.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for index, start in enumerate(starts):
+            try:
+                residuals[index] = titration.optimisationFuncLog(start)
+            except Exception:
+                # e.g. speciation failing to converge at extreme values
+                residuals[index] = np.inf
+            callback()
+    residuals[np.isnan(residuals)] = np.inf
+    return residuals
+
+
+def refine(start):
+    # Runs in a worker process, using the same optimisation as Titration.optimise, so
+    # that the best result matches a single fit started from the same point.
+    from scipy.optimize import minimize
+
+    titration = processPool.workerTitration
+    result = minimize(titration.optimisationFuncLog, x0=start, method="nelder-mead")
+    return Minimum(result.x, result.fun)
+
+
+def distinctMinima(minima):
+    # Returns the minima sorted from best to worst, with duplicates removed.
+    distinct = []
+    for minimum in sorted(minima, key=lambda minimum: minimum.residual):
+        if not any(
+            np.all(np.abs(minimum.logVariables - other.logVariables) < minimumTolerance)
+            for other in distinct
+        ):
+            distinct.append(minimum)
+    return distinct
+
+
+def multiStartFit(
+    titration,
+    numStarts=64,
+    numRefined=8,
+    method="sobol",
+    kDecades=defaultKDecades,
+    concDecades=defaultConcDecades,
+    callback=lambda *args: None,
+):
+    # Returns the distinct minima found, from best to worst. The titration is left at
+    # the best one.
+    initialGuess, lower, upper = getBounds(titration, kDecades, concDecades)
+    if len(initialGuess) == 0:
+        raise ValueError("There are no variables to optimise.")
+
+    starts = sampleStarts(lower, upper, numStarts, method)
+    residuals = screen(titration, starts, callback)
+    bestStarts = starts[np.argsort(residuals)[: numRefined - 1]]
+    # Always include the initial guesses, so that the result is never worse than a
+    # single fit.
+    refinedStarts = np.vstack([initialGuess, bestStarts])
+
+    futures = runInProcessPool(
+        titration, refine, [(start,) for start in refinedStarts], callback
+    )
+    minima = [
+        future.result()
+        for future in futures
+        if future.exception() is None and np.isfinite(future.result().residual)
+    ]
+    numFailed = len(refinedStarts) - len(minima)
+    if len(minima) == 0:
+        raise ValueError("None of the refinements succeeded.")
+    if numFailed > 0:
+        warnings.warn(
+            f"{numFailed} of {len(refinedStarts)} refinements failed and were ignored."
+        )
+    minima = distinctMinima(minima)
+
+    titration.optimisationFuncLog(minima[0].logVariables)
+    titration.calculateInterpolatedConcsAndSpectra()
+    titration.fitResult = 10 ** minima[0].logVariables
+    return minima
+
+
+class MultiStartPopup(moduleFrame.Popup):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Multi-start fit")
+        self.resizable(False, False)
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        self.numStartsVar = tk.IntVar(self)
+        self.numRefinedVar = tk.IntVar(self)
+        self.methodVar = tk.StringVar(self)
+        self.kDecadesVar = tk.DoubleVar(self)
+        self.concDecadesVar = tk.DoubleVar(self)
+
+        rows = [
+            ("Starting points to screen:", self.numStartsVar),
+            ("Starting points to refine:", self.numRefinedVar),
+            ("Range of K (± orders of magnitude):", self.kDecadesVar),
+            ("Range of concentrations (± orders of magnitude):", self.concDecadesVar),
+        ]
+        for row, (text, variable) in enumerate(rows):
+            ttk.Label(frame, text=text).grid(row=row, column=0, sticky="w")
+            ttk.Spinbox(frame, textvariable=variable, from_=1, to=4096, width=6).grid(
+                row=row, column=1, sticky="e", padx=padding, pady=padding
+            )
+
+        ttk.Label(frame, text="Sampling:").grid(row=len(rows), column=0, sticky="w")
+        ttk.OptionMenu(
+            frame,
+            self.methodVar,
+            list(samplingMethods)[0],
+            *samplingMethods,
+            style="Outline.TMenubutton",
+        ).grid(row=len(rows), column=1, sticky="e", padx=padding, pady=padding)
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.saveButton.configure(text="Fit")
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+        self.reset()
+
+    def reset(self):
+        self.numStartsVar.set(64)
+        self.numRefinedVar.set(min(8, os.cpu_count() or 1))
+        self.methodVar.set(list(samplingMethods)[0])
+        self.kDecadesVar.set(defaultKDecades)
+        self.concDecadesVar.set(defaultConcDecades)
+
+    def saveData(self):
+        self.numStarts = self.numStartsVar.get()
+        self.numRefined = self.numRefinedVar.get()
+        if self.numStarts < 1 or self.numRefined < 1:
+            raise ValueError("The number of starting points must be at least 1.")
+        self.method = samplingMethods[self.methodVar.get()]
+        self.kDecades = self.kDecadesVar.get()
+        self.concDecades = self.concDecadesVar.get()
+
+        self.saved = True
+        self.destroy()
+
+
+class MultiStartResultsPopup(tk.Toplevel):
+    def __init__(self, titration, minima, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Multi-start fit results")
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        ttk.Label(
+            frame,
+            text=f"Found {len(minima)} distinct minima, from best to worst:",
+        ).pack(fill="x", pady=padding)
+
+        variableNames = list(titration.equilibriumConstants.variableNames) + list(
+            titration.totalConcentrations.variableNames
+        )
+        columns = ["RMSE"] + variableNames
+        treeview = ttk.Treeview(frame, columns=columns, show="headings")
+        for column in columns:
+            treeview.heading(column, text=column)
+            treeview.column(column, width=100, anchor="e")
+
+        numPoints = titration.processedData.count()
+        for minimum in minima:
+            rmse = minimum.residual / np.sqrt(numPoints)
+            values = [f"{rmse:.4g}"] + [f"{v:.4g}" for v in 10**minimum.logVariables]
+            treeview.insert("", "end", values=values)
+        treeview.pack(expand=True, fill="both")
+
+        ttk.Button(
+            frame, text="Close", command=self.destroy, style="Outline.TButton"
+        ).pack(pady=padding)
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+# The titration used by a worker process, sent once when the worker starts rather than
+# with every task.
+workerTitration = None
+
+
+def setWorkerTitration(titration):
+    global workerTitration
+    workerTitration = titration
+
+
+@contextmanager
+def workerPool(titration, maxWorkers):
+    # Worker processes are started fresh rather than forked, as the interface is
+    # running threads that shouldn't be copied.
+    executor = ProcessPoolExecutor(
+        max_workers=min(maxWorkers, os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=setWorkerTitration,
+        initargs=(titration,),
+    )
+    try:
+        yield executor
+    finally:
+        # Don't wait for the remaining tasks if aborted, e.g. by the callback raising
+        # an exception when the progress dialog is cancelled.
+        executor.shutdown(cancel_futures=True)
+
+
+def waitForFutures(futures, callback=lambda *args: None):
+    # callback is called with the number of futures done while waiting.
+    while True:
+        done, notDone = wait(futures, timeout=0.1)
+        callback(len(done))
+        if not notDone:
+            return
+
+
+def runInProcessPool(titration, function, argsList, callback=lambda *args: None):
+    # Calls function(*args) in worker processes for each args in argsList, and returns
+    # the futures in the same order, so that the caller can decide how to handle
+    # failures. The functions can access the titration as workerTitration. callback
+    # is called with the number of calls completed.
+    with workerPool(titration, len(argsList)) as executor:
+        futures = [executor.submit(function, *args) for args in argsList]
+        waitForFutures(futures, callback)
+    return futures
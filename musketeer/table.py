@@ -1,8 +1,10 @@
 import tkinter as tk
 import tkinter.ttk as ttk
+import warnings
 
 import numpy as np
 from numpy import ma
+from tksheet import Sheet
 
 from . import style
 from .style import cellWidth, padding
@@ -508,6 +510,228 @@ class Table(ttk.Frame):
                 cell.set(title)
 
 
+class SheetTable(ttk.Frame):
+    # Equivalent of Table for large amounts of data, using a tksheet.Sheet that only
+    # draws the visible cells, rather than a widget for each cell. Titles are shown in
+    # the header and index of the sheet, and actions on entire rows or columns in their
+    # right click menus.
+    def __init__(
+        self,
+        master,
+        rowTitles=[],
+        columnTitles=[],
+        data=None,
+        *,
+        maskBlanks=False,
+        blankValue="?",
+        rowOptions=[],
+        columnOptions=[],
+        allowGuesses=False,
+        height=None,
+        **kwargs,
+    ):
+        self.rowOptions = rowOptions
+        self.columnOptions = columnOptions
+        self.maskBlanks = maskBlanks
+        self.blankValue = blankValue
+        self.allowGuesses = allowGuesses
+        super().__init__(master, padding=padding, **kwargs)
+
+        if data is None:
+            data = np.full((len(rowTitles), len(columnTitles)), "")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.sheet = Sheet(
+                self,
+                data=np.asarray(data, dtype=str).tolist(),
+                headers=[str(title) for title in columnTitles],
+                row_index=[str(title) for title in rowTitles],
+                height=height,
+                empty_vertical=0,
+                empty_horizontal=0,
+            )
+        self.sheet.pack(expand=True, fill="both")
+
+        bindings = [
+            "single_select",
+            "drag_select",
+            "select_all",
+            "row_select",
+            "column_select",
+            "column_width_resize",
+            "double_click_column_resize",
+            "row_width_resize",
+            "arrowkeys",
+            "right_click_popup_menu",
+            "rc_select",
+            "copy",
+            "paste",
+            "delete",
+            "undo",
+            "edit_cell",
+        ]
+        if "titles" in rowOptions:
+            bindings.append("edit_index")
+        if "titles" in columnOptions:
+            bindings.append("edit_header")
+        self.sheet.enable_bindings(*bindings)
+        self.sheet.set_width_of_index_to_text()
+
+        if "delete" in rowOptions:
+            self.sheet.popup_menu_add_command(
+                "Delete row",
+                lambda: self.deleteRow(self.selectedRow),
+                table_menu=False,
+                header_menu=False,
+                empty_space_menu=False,
+            )
+        if "delete" in columnOptions:
+            self.sheet.popup_menu_add_command(
+                "Delete column",
+                lambda: self.deleteColumn(self.selectedColumn),
+                table_menu=False,
+                index_menu=False,
+                empty_space_menu=False,
+            )
+
+        if allowGuesses:
+            self.sheet.extra_bindings(
+                ["end_edit_cell", "end_paste", "end_delete", "end_undo"],
+                lambda *args: self.highlightGuesses(),
+            )
+            self.highlightGuesses()
+
+    @property
+    def selectedRow(self):
+        return self.sheet.get_currently_selected().row
+
+    @property
+    def selectedColumn(self):
+        return self.sheet.get_currently_selected().column
+
+    def highlightGuesses(self):
+        # Entries starting with "~" are initial guesses.
+        cells = self.cells
+        self.sheet.dehighlight_cells(all_=True, redraw=False)
+        guesses = np.char.startswith(cells, "~")
+        if np.any(guesses):
+            self.sheet.highlight_cells(
+                cells=[(int(row), int(column)) for row, column in np.argwhere(guesses)],
+                fg=ttk.Style().lookup("info.TButton", "background"),
+                redraw=False,
+            )
+        self.sheet.redraw()
+
+    def addRow(self, firstEntry="", data=None):
+        if data is None:
+            data = np.full(self.cells.shape[1], "")
+        self.sheet.insert_row([str(value) for value in data], redraw=False, undo=False)
+        self.sheet.row_index(self.sheet.get_total_rows() - 1, str(firstEntry))
+        self.sheet.set_width_of_index_to_text()
+
+    def addColumn(self, firstEntry="", data=None):
+        if data is None:
+            data = np.full(self.cells.shape[0], "")
+        self.sheet.insert_column(
+            [str(value) for value in data], redraw=False, undo=False
+        )
+        self.sheet.headers(str(firstEntry), self.sheet.get_total_columns() - 1)
+
+    # So that subclasses can specify default values when new rows/columns are added
+    # by a button press.
+    def newColumn(self):
+        self.addColumn()
+
+    def newRow(self):
+        self.addRow()
+
+    def deleteRow(self, row):
+        self.sheet.delete_row(row, undo=False)
+
+    def deleteColumn(self, column):
+        self.sheet.delete_column(column, undo=False)
+
+    convertData = Table.convertData
+
+    @property
+    def cells(self):
+        # The contents of the data cells as strings.
+        cells = self.sheet.get_sheet_data()
+        if len(cells) == 0:
+            return np.empty((0, len(self.sheet.headers())), dtype=str)
+        return np.array(cells, dtype=str)
+
+    @property
+    def data(self):
+        cells = self.cells
+        dtype = type(self.convertData("0"))
+        if dtype is str:
+            dtype = object
+        data = np.empty(cells.shape, dtype=dtype)
+        for (row, column), cell in np.ndenumerate(cells):
+            data[row, column] = self.convertData(cell)
+        if self.maskBlanks:
+            data = ma.masked_invalid(data)
+        if dtype is object:
+            data = data.astype(str)
+        return data
+
+    @data.setter
+    def data(self, data):
+        if self.cells.shape != data.shape:
+            raise ValueError(
+                f"Requested data shape {data.shape} does not match table shape"
+                f" {self.cells.shape}."
+            )
+        self.sheet.set_sheet_data(np.asarray(data, dtype=str).tolist())
+        if self.allowGuesses:
+            self.highlightGuesses()
+
+    @property
+    def initialGuesses(self):
+        if not self.allowGuesses:
+            raise RuntimeError(
+                "initialGuesses() called on a SheetTable instance that does not allow initial guesses"
+            )
+
+        cells = self.cells
+        dtype = type(self.convertData("0"))
+        if dtype is str:
+            dtype = object
+        data = ma.masked_all(cells.shape, dtype=dtype)
+        for (row, column), cell in np.ndenumerate(cells):
+            if cell.startswith("~"):
+                data[row, column] = self.convertData(cell[1:])
+
+        if dtype is object:
+            data = data.astype(str)
+        return data
+
+    @property
+    def rowTitles(self):
+        return np.array(self.sheet.row_index(), dtype=str)
+
+    @rowTitles.setter
+    def rowTitles(self, titles):
+        self.sheet.row_index([str(title) for title in titles])
+        self.sheet.set_width_of_index_to_text()
+
+    @property
+    def columnTitles(self):
+        return np.array(self.sheet.headers(), dtype=str)
+
+    @columnTitles.setter
+    def columnTitles(self, titles):
+        # make sure the number of columns matches the number of titles
+        difference = len(titles) - self.cells.shape[1]
+        for _ in range(difference):
+            self.addColumn()
+        for _ in range(-difference):
+            self.deleteColumn(self.cells.shape[1] - 1)
+        self.sheet.headers([str(title) for title in titles])
+
+
 class ButtonFrame(ttk.Frame):
     def __init__(self, master, reset, save, cancel, *args, **kwargs):
         super().__init__(master, borderwidth=padding, *args, **kwargs)
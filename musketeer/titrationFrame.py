@@ -11,9 +11,7 @@ from pathlib import PurePath
 import matplotlib as mpl
 import matplotlib.ticker as mtick
 import numpy as np
-import packaging.version
 import tksheet
-from cycler import cycler
 from matplotlib.backend_bases import ResizeEvent
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -33,17 +31,37 @@ from . import (
     speciation,
     totalConcentrations,
 )
+from .backgroundSaver import AUTOSAVE_INTERVAL, BackgroundSaver
+from .core.fitFile import COPY_ORIGINAL_ARRAY, readFitFile
+from .core.titration import Titration, titrationAttributes
+from .decimation import Decimator
+from .experimentDesign import (
+    DesignPopup,
+    DesignResultsPopup,
+    candidateSchedules,
+    designExperiment,
+)
+from .globalFit import GlobalFit, GlobalFitPopup
+from .modelComparison import (
+    ModelComparisonPopup,
+    ModelComparisonResultsPopup,
+    compareModels,
+    getCandidates,
+)
+from .multiStart import MultiStartPopup, MultiStartResultsPopup, multiStartFit
 from .progressDialog import ProgressDialog
 from .moduleFrame import GroupFrame
 from .patchMatplotlib import NavigationToolbarVertical, VerticalToolbarAxes
 from .scrolledFrame import ScrolledFrame
 from .style import defaultFigureParams, figureParams, padding
 from .table import Table, ButtonFrame, WrappedLabel
-from .titration import Titration, titrationAttributes
-
-# Magic value indicating that the data in a .fit file should be copied from the original
-# titration
-COPY_ORIGINAL_ARRAY = "COPY_OGIRINAL_ARRAY"
+from .uncertainty import (
+    BootstrapPopup,
+    BootstrapResultsPopup,
+    bootstrap,
+    parameterErrors,
+    profile2D,
+)
 
 titrationModules = [
     totalConcentrations,
@@ -63,6 +81,12 @@ class TitrationFrame(ttk.Frame):
         self.filePath = filePath
         self.numFits = 0
 
+        self.saver = BackgroundSaver()
+        self.saving = False
+        self.savedState = None
+        self.checkSavedId = None
+        self.autosaveId = self.after(AUTOSAVE_INTERVAL, self.autosave)
+
         # options bar on the left
         scrolledFrame = ScrolledFrame(self)
         scrolledFrame.grid(column=0, row=0, sticky="nesw")
@@ -95,6 +119,30 @@ class TitrationFrame(ttk.Frame):
         )
         fitDataButton.grid(sticky="nesw", pady=padding, ipady=padding)
 
+        globalFitButton = ttk.Button(
+            self.options,
+            style="success.Outline.TButton",
+            text="Global fit",
+            command=self.globalFit,
+        )
+        globalFitButton.grid(sticky="nesw", pady=padding, ipady=padding)
+
+        multiStartButton = ttk.Button(
+            self.options,
+            style="success.Outline.TButton",
+            text="Multi-start fit",
+            command=self.multiStartFit,
+        )
+        multiStartButton.grid(sticky="nesw", pady=padding, ipady=padding)
+
+        compareModelsButton = ttk.Button(
+            self.options,
+            style="success.Outline.TButton",
+            text="Compare models",
+            command=self.compareModels,
+        )
+        compareModelsButton.grid(sticky="nesw", pady=padding, ipady=padding)
+
         if __debug__ and sys.flags.dev_mode:
             self.reloadButton = ttk.Button(
                 self.options,
@@ -163,200 +211,31 @@ class TitrationFrame(ttk.Frame):
 
         return "break"
 
-    def loadTitration(self, titration, callback=lambda *args: None):
+    def loadTitration(self, titration, callback=lambda *args: None, setDefault=False):
         if type(titration) is Titration:
             self.originalTitration = titration
             self.newFit(callback=callback)
         elif type(titration) is np.lib.npyio.NpzFile:
-            # TODO: move this to titrationReader.py
-            self.originalTitration = Titration()
-            fileVersion = packaging.version.parse(titration[".version"].item())
-            for attribute in titrationAttributes:
-                try:
-                    data = titration[f".original.{attribute}"]
-                except KeyError:
-                    continue
-                else:
-                    if data.shape == ():
-                        data = data.item()
-
-                try:
-                    mask = titration[f".original.{attribute}.mask"]
-                except KeyError:
-                    pass
-                else:
-                    if mask.shape == ():
-                        mask = mask.item()
-                    data = ma.masked_array(data, mask)
-                setattr(self.originalTitration, attribute, data)
-
-            for name in titration[".fits"]:
-                fit = Titration()
-
-                for attribute in titrationAttributes:
-                    try:
-                        data = titration[f"{name}.{attribute}"]
-                    except KeyError:
-                        # Backwards compatibility:
-                        # Before version 1.4.0, last free and bound concs were stored
-                        # separately.
-                        if (
-                            fileVersion < packaging.version.parse("1.4.0")
-                            and attribute == "lastSpeciesConcs"
-                        ):
-                            try:
-                                freeConcs = titration[f"{name}.lastFreeConcs"]
-                                boundConcs = titration[f"{name}.lastBoundConcs"]
-                            except KeyError:
-                                continue
-                            data = np.hstack([freeConcs, boundConcs])
-                        else:
-                            continue
-                    else:
-                        if data.shape == ():
-                            data = data.item()
-
-                    if (
-                        type(data) is type(COPY_ORIGINAL_ARRAY)
-                        and data == COPY_ORIGINAL_ARRAY
-                    ):
-                        data = deepcopy(getattr(self.originalTitration, attribute))
-                    else:
-                        try:
-                            mask = titration[f"{name}.{attribute}.mask"]
-                        except KeyError:
-                            pass
-                        else:
-                            if mask.shape == ():
-                                mask = mask.item()
-                            data = ma.masked_array(data, mask)
-                    setattr(fit, attribute, data)
-
-                for module in titrationModules:
-                    moduleFrame = module.ModuleFrame
-                    # in case no valid strategy is present in the loaded file
-                    setattr(fit, moduleFrame.attributeName, None)
-
-                    try:
-                        SelectedStrategy = moduleFrame.dropdownOptions[
-                            titration[f"{name}.{moduleFrame.attributeName}"].item()
-                        ]
-                    except KeyError:
-                        # no stategy selected
-                        continue
-
-                    selectedStrategy = SelectedStrategy(fit)
-                    for popupAttributeName in selectedStrategy.popupAttributes:
-                        key = f"{name}.{moduleFrame.attributeName}.{popupAttributeName}"
-                        try:
-                            data = titration[key]
-                        except KeyError:
-                            # backwards compatibility:
-                            # version 1.2.0 moved freeNames from speciation to
-                            # totalConcentrations
-                            if (
-                                fileVersion < packaging.version.parse("1.2.0")
-                                and moduleFrame.attributeName == "totalConcentrations"
-                                and popupAttributeName == "freeNames"
-                            ):
-                                if (key := f"{name}.speciation.freeNames") in titration:
-                                    # freeNames set in custom speciation
-                                    data = titration[key]
-                                else:
-                                    # could be ["Host"] or ["Host", "Guest"]
-                                    if (
-                                        key := f"{name}.totalConcentrations.stockConcs"
-                                    ) in titration:
-                                        freeCount = titration[key].shape[0]
-                                    elif (
-                                        key := f"{name}.totalConcentrations.totalConcs"
-                                    ) in titration:
-                                        freeCount = titration[key].shape[1]
-                                    else:
-                                        continue
-                                    data = np.array(["Host", "Guest"][:freeCount])
-                            # 1.4.1 added unknown total concentrations without volumes
-                            elif (
-                                fileVersion < packaging.version.parse("1.4.1")
-                                and moduleFrame.attributeName == "totalConcentrations"
-                                and popupAttributeName == "unknownTotalConcsLinked"
-                            ):
-                                data = True
-                            # 1.6.0 added initial guesses for unknown concentrations
-                            elif (
-                                fileVersion < packaging.version.parse("1.6.0")
-                                and moduleFrame.attributeName == "totalConcentrations"
-                                and popupAttributeName == "stockConcsGuesses"
-                            ):
-                                if (
-                                    key := f"{name}.totalConcentrations.stockConcs"
-                                ) in titration:
-                                    data = ma.masked_all_like(titration[key])
-                            elif (
-                                fileVersion < packaging.version.parse("1.6.0")
-                                and moduleFrame.attributeName == "totalConcentrations"
-                                and popupAttributeName == "totalConcsGuesses"
-                            ):
-                                if (
-                                    key := f"{name}.totalConcentrations.totalConcs"
-                                ) in titration:
-                                    data = ma.masked_all_like(titration[key])
-
-                            else:
-                                continue
-                        else:
-                            if data.shape == ():
-                                data = data.item()
-
-                        try:
-                            mask = titration[f"{key}.mask"]
-                        except KeyError:
-                            pass
-                        else:
-                            if mask.shape == ():
-                                mask = mask.item()
-                            data = ma.masked_array(data, mask)
-                        setattr(selectedStrategy, popupAttributeName, data)
-
-                    try:
-                        selectedStrategy.checkAttributes()
-                    except NotImplementedError:
-                        # required attribute missing
-                        continue
-                    setattr(fit, moduleFrame.attributeName, selectedStrategy)
-
-                # Backwards compatibility: from version 1.9.1 onwards, after a fit has
-                # been calculated, interpolated concentrations are also calculated and
-                # stored in the Titration object.
-                if fileVersion < packaging.version.parse("1.9.1") and hasattr(
-                    fit, "lastFittedCurves"
-                ):
-                    try:
-                        fit.calculateInterpolatedConcsAndSpectra()
-                    except Exception as e:
-                        try:
-                            fit.interpolatedTotalConcs = fit.lastTotalConcs
-                            fit.interpolatedSpeciesConcs = fit.lastSpeciesConcs
-                            fit.interpolatedFittedCurves = fit.lastFittedCurves
-                        except AttributeError:
-                            # Other required attributes missing, so the relevant output
-                            # tab will already show a warning.
-                            pass
-                        else:
-                            warnings.warn(
-                                f"Could not calculate interpolated concentrations and spectra for fit '{name}'.\nTo show smooth curves, please manually press the 'Fit' button.\nCause: {str(e)}"
-                            )
-
-                self.newFit(fit, name, setDefault=False, callback=callback)
-
+            self.originalTitration, fits = readFitFile(titration)
+            self.loadFits(fits, callback=callback)
             self.numFits = titration[".numFits"].item()
             titration.close()
+            self.savedState = self.saveState
+        else:
+            # list of (name, titration) tuples, e.g. imported from a folder
+            self.originalTitration = deepcopy(titration[0][1])
+            self.loadFits(titration, setDefault, callback)
+            self.numFits = len(titration)
 
         self.notebook.bind("<<NotebookTabChanged>>", self.switchFit, add=True)
 
         self.rowconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
+    def loadFits(self, fits, setDefault=False, callback=lambda *args: None):
+        for name, fit in fits:
+            self.newFit(fit, name, setDefault=setDefault, callback=callback)
+
     def editData(self):
         root = self.winfo_toplevel()
         popup = editData.EditDataPopup(self.currentTab.titration, master=root)
@@ -409,6 +288,94 @@ class TitrationFrame(ttk.Frame):
     def fitData(self):
         self.currentTab.fitData()
 
+    def multiStartFit(self):
+        root = self.winfo_toplevel()
+        popup = MultiStartPopup(master=root)
+        popup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+        if not popup.show():
+            return
+
+        fitNotebook = self.currentTab
+        with ProgressDialog(
+            self, "Fitting data", "Fitting data from multiple starting points"
+        ) as progressDialog:
+            minima = multiStartFit(
+                fitNotebook.titration,
+                numStarts=popup.numStarts,
+                numRefined=popup.numRefined,
+                method=popup.method,
+                kDecades=popup.kDecades,
+                concDecades=popup.concDecades,
+                callback=progressDialog.callback,
+            )
+
+            progressDialog.setLabelText("Loading results")
+            fitNotebook.showFit()
+
+        resultsPopup = MultiStartResultsPopup(
+            fitNotebook.titration, minima, master=root
+        )
+        resultsPopup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+
+    def compareModels(self):
+        fitNotebook = self.currentTab
+        candidates = getCandidates(fitNotebook.titration)
+
+        root = self.winfo_toplevel()
+        popup = ModelComparisonPopup(fitNotebook.titration, candidates, master=root)
+        popup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+        if not popup.show():
+            return
+
+        with ProgressDialog(
+            self,
+            "Comparing models",
+            "Fitting each model",
+            progressbarSteps=len(popup.selectedCandidates),
+        ) as progressDialog:
+
+            def callback(numDone):
+                progressDialog.progressbar.configure(value=numDone)
+                progressDialog.callback()
+
+            scores = compareModels(
+                fitNotebook.titration, popup.selectedCandidates, callback
+            )
+
+        resultsPopup = ModelComparisonResultsPopup(
+            scores,
+            lambda titration, name: self.newFit(titration, name, setDefault=False),
+            master=root,
+        )
+        resultsPopup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+
+    def globalFit(self):
+        fitNotebooks = [
+            self.notebook.nametowidget(tab)
+            for tab in self.notebook.tabs()
+            if isinstance(self.notebook.nametowidget(tab), FitNotebook)
+        ]
+        fitNames = [name for name, _ in self.fits]
+
+        root = self.winfo_toplevel()
+        popup = GlobalFitPopup(fitNames, master=root)
+        popup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+        if not popup.show():
+            return
+        fitNotebooks = [fitNotebooks[index] for index in popup.selectedIndices]
+
+        with ProgressDialog(
+            self, "Fitting data", "Fitting data globally"
+        ) as progressDialog:
+            globalFit = GlobalFit(
+                [fitNotebook.titration for fitNotebook in fitNotebooks]
+            )
+            globalFit.fitData(progressDialog.callback)
+
+            progressDialog.setLabelText("Loading results")
+            for fitNotebook in fitNotebooks:
+                fitNotebook.showFit()
+
     def reloadObjects(self):
         importlib.reload(sys.modules[self.__module__])
         importlib.reload(sys.modules[self.currentTab.titration.__module__])
@@ -429,77 +396,131 @@ class TitrationFrame(ttk.Frame):
         self.reloadButton.configure(command=self.reloadObjects)
         print(f"reloaded {self.__module__} and {self.currentTab.titration.__module__}")
 
-    def saveFile(self, saveAs=False):
+    @staticmethod
+    def titrationOptions(titration, originalTitration=None):
         options = {}
-        options[".version"] = __version__
-        options[".numFits"] = self.numFits
-
         for titrationAttribute in titrationAttributes:
+            if (
+                originalTitration is not None
+                and (titrationAttribute == "rawData")
+                and np.array_equal(titration.rawData, originalTitration.rawData)
+            ):
+                options[titrationAttribute] = COPY_ORIGINAL_ARRAY
+                continue
+
             try:
-                data = getattr(self.originalTitration, titrationAttribute)
+                data = getattr(titration, titrationAttribute)
             except AttributeError:
                 continue
 
             if isinstance(data, ma.MaskedArray):
-                options[f".original.{titrationAttribute}"] = data.data
-                options[f".original.{titrationAttribute}.mask"] = data.mask
+                options[titrationAttribute] = data.data
+                options[f"{titrationAttribute}.mask"] = data.mask
             else:
-                options[f".original.{titrationAttribute}"] = data
+                options[titrationAttribute] = data
 
-        fits = np.array([])
+        if originalTitration is None:
+            return options
+
+        for module in titrationModules:
+            moduleFrame = module.ModuleFrame
+            strategy = getattr(titration, moduleFrame.attributeName)
+            if strategy is None:
+                continue
+
+            options[moduleFrame.attributeName] = list(
+                moduleFrame.dropdownOptions.keys()
+            )[
+                [x.__name__ for x in moduleFrame.dropdownOptions.values()].index(
+                    type(getattr(titration, moduleFrame.attributeName)).__name__
+                )
+            ]
+
+            for popupAttributeName in strategy.popupAttributes:
+                key = f"{moduleFrame.attributeName}.{popupAttributeName}"
+                data = getattr(strategy, popupAttributeName)
+
+                if isinstance(data, ma.MaskedArray):
+                    options[key] = data.data
+                    options[f"{key}.mask"] = data.mask
+                else:
+                    options[key] = data
+
+        return options
 
+    @property
+    def fits(self):
+        fits = []
         for tkpath in self.notebook.tabs():
             tab = self.notebook.nametowidget(tkpath)
             if not isinstance(tab, ttk.Notebook):
                 continue
             fit = self.notebook.tab(tkpath)["text"][: -self.notebook._padding_spaces]
-            fits = np.append(fits, fit)
+            fits.append((fit, tab.titration))
+        return fits
 
-            titration = tab.titration
-            for titrationAttribute in titrationAttributes:
-                if (titrationAttribute == "rawData") and np.array_equal(
-                    titration.rawData, self.originalTitration.rawData
-                ):
-                    options[f"{fit}.{titrationAttribute}"] = COPY_ORIGINAL_ARRAY
-                    continue
+    @property
+    def saveState(self):
+        # Changes whenever the file would need to be saved again. The revision of the
+        # original titration is included for each fit, as it determines whether the
+        # fit's data is saved as a copy of the original.
+        originalRevision = self.originalTitration._revision
+        return (originalRevision,) + tuple(
+            (fit, titration, titration._revision) for fit, titration in self.fits
+        )
+
+    def writeFile(self, filePath):
+        saveState = self.saveState
+        originalRevision = self.originalTitration._revision
+
+        groups = []
+        if self.saver.isCached(self.originalTitration, originalRevision):
+            originalOptions = None
+        else:
+            originalOptions = self.titrationOptions(self.originalTitration)
+        groups.append(
+            (self.originalTitration, originalRevision, ".original.", originalOptions)
+        )
 
-                try:
-                    data = getattr(titration, titrationAttribute)
-                except AttributeError:
-                    continue
+        fits = np.array([])
+        for fit, titration in self.fits:
+            fits = np.append(fits, fit)
+            revision = (titration._revision, originalRevision)
+            if self.saver.isCached(titration, revision):
+                options = None
+            else:
+                options = self.titrationOptions(titration, self.originalTitration)
+            groups.append((titration, revision, f"{fit}.", options))
 
-                if isinstance(data, ma.MaskedArray):
-                    options[f"{fit}.{titrationAttribute}"] = data.data
-                    options[f"{fit}.{titrationAttribute}.mask"] = data.mask
-                else:
-                    options[f"{fit}.{titrationAttribute}"] = data
-
-            for module in titrationModules:
-                moduleFrame = module.ModuleFrame
-                strategy = getattr(titration, moduleFrame.attributeName)
-                if strategy is None:
-                    continue
-
-                options[f"{fit}.{moduleFrame.attributeName}"] = list(
-                    moduleFrame.dropdownOptions.keys()
-                )[
-                    [x.__name__ for x in moduleFrame.dropdownOptions.values()].index(
-                        type(getattr(titration, moduleFrame.attributeName)).__name__
-                    )
-                ]
+        header = {".version": __version__, ".numFits": self.numFits, ".fits": fits}
 
-                for popupAttributeName in strategy.popupAttributes:
-                    key = f"{fit}.{moduleFrame.attributeName}.{popupAttributeName}"
-                    data = getattr(strategy, popupAttributeName)
+        future = self.saver.save(filePath, groups, header)
 
-                    if isinstance(data, ma.MaskedArray):
-                        options[key] = data.data
-                        options[f"{key}.mask"] = data.mask
-                    else:
-                        options[key] = data
+        def checkSaved():
+            if not future.done():
+                self.checkSavedId = self.after(100, checkSaved)
+                return
+            self.checkSavedId = None
+            self.saving = False
+            # Raises any exception from the worker thread in the Tk thread.
+            future.result()
+            self.savedState = saveState
 
-        options[".fits"] = fits
+        self.saving = True
+        checkSaved()
 
+    def autosave(self):
+        self.autosaveId = self.after(AUTOSAVE_INTERVAL, self.autosave)
+        if (
+            self.filePath is None
+            or PurePath(self.filePath).suffix != ".fit"
+            or self.saving
+            or self.saveState == self.savedState
+        ):
+            return
+        self.writeFile(self.filePath)
+
+    def saveFile(self, saveAs=False):
         if self.filePath is None:
             filePath = fd.asksaveasfilename(
                 title="Save as",
@@ -519,17 +540,24 @@ class TitrationFrame(ttk.Frame):
             filePath = self.filePath
 
         if filePath != "":
-            with open(filePath, "wb") as f:
-                np.savez_compressed(f, **options)
+            self.writeFile(filePath)
             if filePath != self.filePath:
                 self.filePath = filePath
                 self.master.tab(self, text=PurePath(self.filePath).name)
 
+    def destroy(self):
+        self.after_cancel(self.autosaveId)
+        if self.checkSavedId is not None:
+            self.after_cancel(self.checkSavedId)
+        self.saver.shutdown()
+        super().destroy()
+
 
 class FitNotebook(ttk.Notebook):
     def __init__(self, master, titration, *args, **kwargs):
         super().__init__(master, padding=padding, style="Flat.TNotebook")
         self.titration = titration
+        self.bind("<<NotebookTabChanged>>", self.refreshSelectedTab, add=True)
 
     def add(self, tab, *args, hidden=False, **kwargs):
         super().add(tab, *args, **kwargs)
@@ -577,51 +605,68 @@ class FitNotebook(ttk.Notebook):
 
     def showFit(self, callback=lambda *args: None):
         callback()
-        if hasattr(self.titration, "fitResult"):
-            lastTabClass = type(self.nametowidget(self.select()))
-            for tab in self.tabs():
-                widget = self.nametowidget(tab)
-                if isinstance(widget, InputSpectraFrame):
-                    continue
-                self.forget(widget)
-                widget.destroy()
+        if self.titration.continuous:
+            tabs = [
+                (ContinuousFittedFrame, "Fitted Spectra"),
+                (
+                    DiscreteFromContinuousFittedFrame,
+                    f"Fit at select {self.titration.xQuantity}",
+                ),
+            ]
         else:
-            lastTabClass = None
+            tabs = [(DiscreteFittedFrame, "Fitted signals")]
+        tabs += [(SpeciationFrame, "Speciation"), (ResultsFrame, "Results")]
 
-        if self.titration.continuous:
-            self.continuousFittedFrame = ContinuousFittedFrame(self, self.titration)
-            self.add(self.continuousFittedFrame, text="Fitted Spectra")
-            callback()
-            self.discreteFittedFrame = DiscreteFromContinuousFittedFrame(
-                self, self.titration
-            )
-            self.add(
-                self.discreteFittedFrame,
-                text=f"Fit at select {self.titration.xQuantity}",
-            )
-            callback()
+        resultTabs = [
+            widget
+            for widget in map(self.nametowidget, self.tabs())
+            if not isinstance(widget, InputSpectraFrame)
+        ]
+
+        if [type(widget) for widget in resultTabs] == [Tab for Tab, _ in tabs]:
+            # Keep the existing tabs, which will be redrawn with the new fit once
+            # they are selected.
+            for widget, (_, text) in zip(resultTabs, tabs):
+                self.tab(widget, text=text)
+                widget.stale = True
         else:
-            self.discreteFittedFrame = DiscreteFittedFrame(self, self.titration)
-            self.add(self.discreteFittedFrame, text="Fitted signals")
-            callback()
+            if len(resultTabs) > 0:
+                lastTabClass = type(self.nametowidget(self.select()))
+            else:
+                lastTabClass = None
+            for widget in resultTabs:
+                self.forget(widget)
+                widget.destroy()
 
-        self.speciationFrame = SpeciationFrame(self, self.titration)
-        self.add(self.speciationFrame, text="Speciation")
+            # The tabs are only populated once they are selected.
+            resultTabs = [Tab(self, self.titration) for Tab, _ in tabs]
+            for widget, (_, text) in zip(resultTabs, tabs):
+                self.add(widget, text=text)
+            if self.titration.continuous:
+                self.continuousFittedFrame, self.discreteFittedFrame, *_ = resultTabs
+            else:
+                self.discreteFittedFrame, *_ = resultTabs
+            self.speciationFrame, self.resultsFrame = resultTabs[-2:]
+
+            if lastTabClass is not None:
+                for tab in self.tabs():
+                    widget = self.nametowidget(tab)
+                    if isinstance(widget, lastTabClass):
+                        self.select(str(widget))
+                        break
+            else:
+                self.select(str(self.discreteFittedFrame))
         callback()
 
-        self.resultsFrame = ResultsFrame(self, self.titration)
-        self.add(self.resultsFrame, text="Results")
+        self.refreshSelectedTab()
         callback()
 
-        if lastTabClass is not None:
-            for tab in self.tabs():
-                widget = self.nametowidget(tab)
-                if isinstance(widget, lastTabClass):
-                    self.select(str(widget))
-                    break
-        else:
-            self.select(str(self.discreteFittedFrame))
-        callback()
+    def refreshSelectedTab(self, *args):
+        if self.select() == "":
+            return
+        widget = self.nametowidget(self.select())
+        if isinstance(widget, ResultTabMixin) and widget.stale:
+            widget.refresh()
 
     def updateDpi(self):
         for tab in self.tabs():
@@ -629,7 +674,33 @@ class FitNotebook(ttk.Notebook):
                 plotFrame.updateDpi()
 
 
+class ResultTabMixin:
+    # Result tabs are only populated when they are first shown, and are only redrawn
+    # with a new fit when they are next shown. Subclasses implement populate(),
+    # updateFit(), and getLayout(), which returns the options that the widgets created
+    # by populate() depend on.
+    stale = True
+    layout = None
+
+    def __init__(self, parent, titration, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.titration = titration
+
+    def refresh(self):
+        layout = self.getLayout()
+        if layout != self.layout:
+            for child in self.winfo_children():
+                child.destroy()
+            self.populate()
+            self.layout = layout
+        self.updateFit()
+        self.stale = False
+
+
 class PlotFrame(ttk.Frame):
+    # If set, lines are plotted through the Decimator.
+    decimator = None
+
     @property
     def dpi(self):
         return figureParams["x"] / self.figwidth
@@ -651,6 +722,9 @@ class PlotFrame(ttk.Frame):
         return figureParams["y"]
 
     def updateDpi(self):
+        if not hasattr(self, "fig"):
+            # Not populated yet, so will use the new DPI once it is.
+            return
         self.fig.set_size_inches(self.figwidth, self.figheight)
         mpl.rcParams["savefig.dpi"] = self.dpi
         self.fig.canvas.get_tk_widget().configure(
@@ -662,6 +736,49 @@ class PlotFrame(ttk.Frame):
         )
         self.fig.canvas.draw_idle()
 
+    def plotCurves(self, curves):
+        # Each curve is a tuple of (plotFunction, x, y, kwargs), where plotFunction is
+        # either "plot" or "scatter". If the same curves were plotted last time, their
+        # data is updated in place, which is much faster than clearing the axes and
+        # plotting everything again. Returns True if the axes were cleared.
+        key = (
+            self.ax,
+            [(plotFunction, kwargs) for plotFunction, _, _, kwargs in curves],
+        )
+        if key == getattr(self, "curvesKey", None):
+            for artist, (plotFunction, x, y, _) in zip(self.curveArtists, curves):
+                if plotFunction == "scatter":
+                    artist.set_offsets(ma.column_stack([x, y]))
+                elif self.decimator is not None:
+                    self.decimator.add(artist, x, y)
+                else:
+                    artist.set_data(x, y)
+            self.ax.relim()
+            # relim() ignores collections, so add the scatter points manually.
+            for plotFunction, x, y, _ in curves:
+                if plotFunction == "scatter":
+                    points = ma.column_stack([x, y])
+                    self.ax.update_datalim(
+                        ma.getdata(points)[~ma.getmaskarray(points).any(axis=1)]
+                    )
+            self.ax.autoscale_view()
+            if self.decimator is not None:
+                self.decimator.update()
+            return False
+
+        self.ax.clear()
+        self.curveArtists = []
+        for plotFunction, x, y, kwargs in curves:
+            if plotFunction == "scatter":
+                artist = self.ax.scatter(x, y, **kwargs)
+            elif self.decimator is not None:
+                artist = self.decimator.plot(x, y, **kwargs)
+            else:
+                (artist,) = self.ax.plot(x, y, **kwargs)
+            self.curveArtists.append(artist)
+        self.curvesKey = key
+        return True
+
 
 class FigureCanvasTkAggFixedRatio(FigureCanvasTkAgg):
     @property
@@ -744,24 +861,38 @@ class InputSpectraFrame(PlotFrame):
         self.rangeLabel = ttk.Label(rangeSelection)
         self.rangeLabel.pack(side="left")
 
-        self.fromSpinbox = ttk.Spinbox(rangeSelection, width=5)
+        self.fromSpinbox = ttk.Spinbox(
+            rangeSelection, width=5, command=self.updateOverlay
+        )
+        self.fromSpinbox.bind("<KeyRelease>", self.updateOverlay)
         self.fromSpinbox.pack(padx=padding, side="left")
 
         ttk.Label(rangeSelection, text="to").pack(side="left")
 
-        self.toSpinbox = ttk.Spinbox(rangeSelection, width=5)
+        self.toSpinbox = ttk.Spinbox(
+            rangeSelection, width=5, command=self.updateOverlay
+        )
+        self.toSpinbox.bind("<KeyRelease>", self.updateOverlay)
         self.toSpinbox.pack(padx=padding, side="left")
 
         self.fig = Figure(
             layout="constrained", figsize=(self.figwidth, self.figheight), dpi=self.dpi
         )
         self.ax = self.fig.add_subplot(axes_class=VerticalToolbarAxes)
+        self.decimator = Decimator(self.ax)
 
         ttk.Button(rangeSelection, text="Update", command=self.updateWLRange).pack(
             side="left"
         )
 
+        # The regions outside of the range to fit are shaded. The shading is animated,
+        # so that it can be moved by blitting over the saved background, without
+        # redrawing the spectra.
+        self.excludedSpans = []
+        self.background = None
         canvas = FigureCanvasTkAggFixedRatio(self.fig, master=self)
+        self.canvas = canvas
+        canvas.mpl_connect("draw_event", self.onDraw)
         canvas.draw()
         canvas.get_tk_widget().grid(row=1, column=1, sticky="nw")
 
@@ -812,31 +943,72 @@ class InputSpectraFrame(PlotFrame):
 
         ax.cla()
 
+        # All spectra are drawn as a single collection, which is much faster than
+        # separate lines when there are many additions.
         spectraColors = (
             ["black"] + ["#80808080"] * (titration.numAdditions - 2) + ["tab:red"]
         )
-        colorCycler = cycler(color=spectraColors)
-        ax.set_prop_cycle(colorCycler)
+        self.decimator.lineCollection(
+            titration.signalTitles, titration.rawData, colors=spectraColors
+        )
+        ax.autoscale_view()
 
-        ax.plot(titration.processedSignalTitles, titration.processedData.T)
+        signalMin = titration.signalTitles.min()
+        self.excludedSpans = [
+            ax.axvspan(signalMin, signalMin, color="0.5", alpha=0.25, animated=True)
+            for _ in range(2)
+        ]
+        self.updateOverlay()
 
         ax.set_xlabel(f"{titration.xQuantity} / {titration.xUnit}")
         ax.set_ylabel(f"{titration.yQuantity} / {titration.yUnit}")
 
         fig.canvas.draw_idle()
 
+    def onDraw(self, event):
+        # Save everything except the overlay, so that it can be moved by blitting.
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for span in self.excludedSpans:
+            self.ax.draw_artist(span)
+
+    def updateOverlay(self, *args):
+        if len(self.excludedSpans) == 0:
+            return
+        try:
+            from_ = float(self.fromSpinbox.get())
+            to = float(self.toSpinbox.get())
+        except ValueError:
+            # Still being typed.
+            return
+
+        signalMin = self.titration.signalTitles.min()
+        signalMax = self.titration.signalTitles.max()
+        leftSpan, rightSpan = self.excludedSpans
+        leftSpan.set_x(signalMin)
+        leftSpan.set_width(max(from_ - signalMin, 0))
+        rightSpan.set_x(min(to, signalMax))
+        rightSpan.set_width(max(signalMax - to, 0))
+
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        for span in self.excludedSpans:
+            self.ax.draw_artist(span)
+        self.canvas.blit(self.ax.bbox)
+
     def updateWLRange(self):
         from_ = float(self.fromSpinbox.get())
         to = float(self.toSpinbox.get())
         self.titration.continuousRange = np.array([from_, to])
-        self.plot()
+        self.updateOverlay()
 
 
-class ContinuousFittedFrame(PlotFrame):
-    def __init__(self, parent, titration, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.titration = titration
-        self.populate()
+class ContinuousFittedFrame(ResultTabMixin, PlotFrame):
+    def getLayout(self):
+        return self.titration.yQuantity
+
+    def updateFit(self):
         self.plot()
 
     def populate(self):
@@ -844,6 +1016,7 @@ class ContinuousFittedFrame(PlotFrame):
             layout="constrained", figsize=(self.figwidth, self.figheight), dpi=self.dpi
         )
         self.ax = self.fig.add_subplot(axes_class=VerticalToolbarAxes)
+        self.decimator = Decimator(self.ax)
         self.canvas = FigureCanvasTkAggFixedRatio(self.fig, master=self)
         self.canvas.draw()
         self.canvas.get_tk_widget().grid(row=1, column=1, sticky="nw")
@@ -896,8 +1069,6 @@ class ContinuousFittedFrame(PlotFrame):
         self.grid_anchor("center")
 
     def plot(self):
-        self.ax.clear()
-
         titration = self.titration
         spectra = titration.lastFittedSpectra
         names = titration.contributors.outputNames
@@ -905,9 +1076,11 @@ class ContinuousFittedFrame(PlotFrame):
 
         deconvolution = self.deconvolutionVar.get()
         if deconvolution == f"Molar {titration.yQuantity}":
-            for spectrum, name in zip(spectra, names):
-                self.ax.plot(wavelengths, spectrum, label=name)
-            self.ax.set_ylabel(f"molar {titration.yQuantity} / {titration.yUnit} M⁻¹")
+            curves = [
+                ("plot", wavelengths, spectrum, {"label": name})
+                for spectrum, name in zip(spectra, names)
+            ]
+            yLabel = f"molar {titration.yQuantity} / {titration.yUnit} M⁻¹"
         else:
             if deconvolution == "Deconvolution at start":
                 deconvolutionPoint = 0
@@ -916,41 +1089,49 @@ class ContinuousFittedFrame(PlotFrame):
             else:
                 raise ValueError(f"Unknown deconvolution option {deconvolution}")
 
-            self.ax.plot(
-                wavelengths,
-                titration.processedData[deconvolutionPoint],
-                color="0.5",
-                label="Observed",
-            )
-            self.ax.plot(
-                wavelengths,
-                titration.lastFittedCurves[deconvolutionPoint],
-                color="0",
-                linestyle="--",
-                label="Fitted",
-            )
-            for spectrum, name in zip(
-                spectra * titration.lastSignalVars[[deconvolutionPoint], :].T, names
-            ):
-                self.ax.plot(
+            curves = [
+                (
+                    "plot",
+                    wavelengths,
+                    titration.processedData[deconvolutionPoint],
+                    {"color": "0.5", "label": "Observed"},
+                ),
+                (
+                    "plot",
                     wavelengths,
-                    spectrum,
-                    label=name,
+                    titration.lastFittedCurves[deconvolutionPoint],
+                    {"color": "0", "linestyle": "--", "label": "Fitted"},
+                ),
+            ]
+            curves += [
+                ("plot", wavelengths, spectrum, {"label": name})
+                for spectrum, name in zip(
+                    spectra * titration.lastSignalVars[[deconvolutionPoint], :].T,
+                    names,
                 )
-            self.ax.set_ylabel(f"{titration.yQuantity} / {titration.yUnit}")
+            ]
+            yLabel = f"{titration.yQuantity} / {titration.yUnit}"
 
-        self.ax.legend(draggable=True)
+        if self.plotCurves(curves):
+            self.ax.legend(draggable=True)
+        self.ax.set_ylabel(yLabel)
         self.ax.set_xlabel(f"{titration.xQuantity} / {titration.xUnit}")
         self.canvas.draw()
 
 
-class FittedFrame(PlotFrame):
-    def __init__(self, parent, titration, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.titration = titration
-        self.logScale = False
+class FittedFrame(ResultTabMixin, PlotFrame):
+    def getLayout(self):
+        return (
+            self.titration.yQuantity,
+            tuple(self.titration.totalConcentrations.freeNames),
+        )
+
+    def updateFit(self):
+        self.setCurves()
+        self.plot()
 
     def populate(self):
+        self.logScale = False
         self.fig = Figure(
             layout="constrained", figsize=(self.figwidth, self.figheight), dpi=self.dpi
         )
@@ -1086,8 +1267,6 @@ class FittedFrame(PlotFrame):
         np.savetxt(fileName, output, fmt="%s", delimiter=",", encoding="utf-8-sig")
 
     def plot(self):
-        self.ax.clear()
-
         titration = self.titration
 
         # xQuantity and xUnit for the fitted plot. Different from the xQuantity
@@ -1122,12 +1301,12 @@ class FittedFrame(PlotFrame):
         if self.plotType == "absolute":
             points = self.points
             curves = self.curves
-            self.ax.set_ylabel(f"{titration.yQuantity} / {titration.yUnit}")
+            yLabel = f"{titration.yQuantity} / {titration.yUnit}"
         elif self.plotType == "relative":
             fittedZeros = np.atleast_2d(firstUnmaskedFittedElements).T
             points = self.points - fittedZeros
             curves = self.curves - fittedZeros
-            self.ax.set_ylabel(f"Δ{titration.yQuantity} / {titration.yUnit}")
+            yLabel = f"Δ{titration.yQuantity} / {titration.yUnit}"
         elif self.plotType == "normalised":
             points = self.points.T
             curves = self.curves.T
@@ -1152,32 +1331,33 @@ class FittedFrame(PlotFrame):
             ).T
             points = points - fittedZeros
             curves = curves - fittedZeros
-            self.ax.set_ylabel(f"Normalised Δ{titration.yQuantity} / %")
+            yLabel = f"Normalised Δ{titration.yQuantity} / %"
         else:
             raise ValueError(f"Unknown plot type: {self.plotType}")
 
+        plotCurves = []
         for pointsForCurve, curve, name in zip(points, curves, self.names):
-            self.ax.scatter(xConcsPoints, pointsForCurve)
-            self.ax.plot(xConcsCurves, curve, label=name)
+            plotCurves.append(("scatter", xConcsPoints, pointsForCurve, {}))
+            plotCurves.append(("plot", xConcsCurves, curve, {"label": name}))
+        cleared = self.plotCurves(plotCurves)
 
+        self.ax.set_ylabel(yLabel)
         if self.logScale:
             self.ax.set_xscale("log", nonpositive="mask")
         else:
             self.ax.set_xscale("linear")
         self.ax.set_xlabel(f"[{xQuantity}] / {xUnit}")
-        self.ax.legend(draggable=True)
+        if cleared:
+            self.ax.legend(draggable=True)
 
         self.canvas.draw()
 
 
 class DiscreteFittedFrame(FittedFrame):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def setCurves(self):
         self.points = self.titration.processedData.T.copy()
         self.curves = self.titration.interpolatedFittedCurves.T.copy()
         self.names = self.titration.processedSignalTitlesStrings
-        self.populate()
-        self.plot()
 
 
 class ChoosePeakIndicesPopup(tk.Toplevel):
@@ -1337,11 +1517,8 @@ class ChoosePeakIndicesPopup(tk.Toplevel):
 
 
 class DiscreteFromContinuousFittedFrame(FittedFrame):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.setCurves()
-        self.populate()
-        self.plot()
+    def getLayout(self):
+        return super().getLayout() + (self.titration.xQuantity,)
 
     def setCurves(self):
         peakIndices = self.titration.peakIndices
@@ -1376,19 +1553,26 @@ class DiscreteFromContinuousFittedFrame(FittedFrame):
         self.plot()
 
 
-class SpeciationFrame(PlotFrame):
+class SpeciationFrame(ResultTabMixin, PlotFrame):
     def __init__(self, parent, titration, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.titration = titration
-        self.xUnit = titration.totalConcentrations.concsUnit
+        super().__init__(parent, titration, *args, **kwargs)
         self.speciesVar = tk.StringVar(self)
-        self.separatePolymers = False
-        self.logScale = False
-        self.populate()
+
+    def getLayout(self):
+        return (
+            tuple(self.titration.totalConcentrations.freeNames),
+            self.titration.totalConcentrations.concsUnit,
+            self.titration.speciation.polymerCount,
+        )
+
+    def updateFit(self):
         self.plot()
 
     def populate(self):
         titration = self.titration
+        self.xUnit = titration.totalConcentrations.concsUnit
+        self.separatePolymers = False
+        self.logScale = False
         self.fig = Figure(
             layout="constrained", figsize=(self.figwidth, self.figheight), dpi=self.dpi
         )
@@ -1475,6 +1659,15 @@ class SpeciationFrame(PlotFrame):
         )
         self.saveCurvesButton.pack(pady=padding, fill="x")
 
+        separator = ttk.Separator(self.optionsFrame, orient="horizontal")
+        separator.pack(pady=padding, fill="x")
+
+        # Shows whether the speciation was solved numerically or in closed form.
+        self.solutionMethodLabel = ttk.Label(
+            self.optionsFrame, anchor="center", justify="center"
+        )
+        self.solutionMethodLabel.pack(pady=padding, fill="x")
+
         self.columnconfigure(
             0,
             weight=1000,
@@ -1609,12 +1802,14 @@ class SpeciationFrame(PlotFrame):
         return xConcs, curves, names
 
     def plot(self):
-        self.ax.clear()
-
         xConcs, curves, names = self.getData()
 
-        for curve, name in zip(curves, names):
-            self.ax.plot(xConcs, curve, label=name)
+        cleared = self.plotCurves(
+            [
+                ("plot", xConcs, curve, {"label": name})
+                for curve, name in zip(curves, names)
+            ]
+        )
 
         freeName = self.speciesVar.get()
         self.ax.set_ylabel(f"% of {freeName}")
@@ -1626,8 +1821,12 @@ class SpeciationFrame(PlotFrame):
         else:
             self.ax.set_xscale("linear")
         self.ax.set_xlabel(f"[{self.xQuantity}] / {self.xUnit}")
-        self.ax.legend(draggable=True)
+        if cleared:
+            self.ax.legend(draggable=True)
 
+        self.solutionMethodLabel.configure(
+            text=f"Solved with:\n{self.titration.speciation.solutionMethod}"
+        )
         self.canvas.draw()
 
 
@@ -1773,13 +1972,15 @@ class RMSEPopup(tk.Toplevel):
         points = 2 * int(self.pointsSpinbox.get())
         midpoint = points // 2
 
-        fixedTitration = deepcopy(self.titration)
-        initialGuess = ma.array(self.titration.lastVars)
+        # optimiseFixed doesn't change the current fit, so the titration can be used
+        # directly.
+        titration = self.titration
+        initialGuess = ma.array(titration.lastVars)
 
-        fixedVars = ma.masked_all_like(fixedTitration.lastVars)
-        fixedVars[self.variableIndex] = fixedTitration.lastVars[self.variableIndex]
+        fixedVars = ma.masked_all_like(titration.lastVars)
+        fixedVars[self.variableIndex] = titration.lastVars[self.variableIndex]
 
-        bestValue = fixedTitration.lastVars[self.variableIndex]
+        bestValue = titration.lastVars[self.variableIndex]
         logBestValue = np.log10(bestValue)
         values = np.logspace(
             logBestValue - ordersOfMagnitude,
@@ -1805,32 +2006,34 @@ class RMSEPopup(tk.Toplevel):
                 progressDialog.callback()
 
                 fixedVars[self.variableIndex] = values[0]
-                optimisationResults[0] = 10 ** fixedTitration.optimiseFixed(
+                logResult, evaluation = titration.optimiseFixed(
                     fixedVars,
                     initialGuess,
                     progressDialog.callback,
                     {"xatol": 1e-3, "fatol": np.inf},
                 )
-                RMSEs[0] = fixedTitration.RMSE
-                residualsFirst = fixedTitration.lastResiduals
+                optimisationResults[0] = 10**logResult
+                RMSEs[0] = titration.evaluationRMSE(evaluation)
+                residualsFirst = evaluation.residuals
 
                 progressDialog.setLabelText("Estimating range... (2/2)")
                 progressDialog.callback()
                 fixedVars[self.variableIndex] = values[-1]
-                optimisationResults[-1] = 10 ** fixedTitration.optimiseFixed(
+                logResult, evaluation = titration.optimiseFixed(
                     fixedVars,
                     initialGuess,
                     progressDialog.callback,
                     {"xatol": 1e-3, "fatol": np.inf},
                 )
-                RMSEs[-1] = fixedTitration.RMSE
-                residualsLast = fixedTitration.lastResiduals
+                optimisationResults[-1] = 10**logResult
+                RMSEs[-1] = titration.evaluationRMSE(evaluation)
+                residualsLast = evaluation.residuals
 
                 fixedVars[self.variableIndex] = values[midpoint]
-                fixedTitration.optimiseFixed(
+                _, evaluation = titration.optimiseFixed(
                     fixedVars, initialGuess, progressDialog.callback
                 )
-                residualsMidpoint = fixedTitration.lastResiduals
+                residualsMidpoint = evaluation.residuals
 
                 difference = max(residualsFirst, residualsLast) - residualsMidpoint
                 fatol = difference / precision
@@ -1847,13 +2050,14 @@ class RMSEPopup(tk.Toplevel):
                 initialGuess = ma.masked_all_like(fixedVars)
                 initialGuess[fixedVars.mask] = optimisationResults[i + 1]
 
-                optimisationResults[i] = 10 ** fixedTitration.optimiseFixed(
+                logResult, evaluation = titration.optimiseFixed(
                     fixedVars,
                     initialGuess,
                     progressDialog.callback,
                     {"xatol": xatol, "fatol": fatol},
                 )
-                RMSEs[i] = fixedTitration.RMSE
+                optimisationResults[i] = 10**logResult
+                RMSEs[i] = titration.evaluationRMSE(evaluation)
                 progressDialog.progressbar.step()
                 progressDialog.callback()
 
@@ -1863,13 +2067,14 @@ class RMSEPopup(tk.Toplevel):
                 initialGuess = ma.masked_all_like(fixedVars)
                 initialGuess[fixedVars.mask] = optimisationResults[i - 1]
 
-                optimisationResults[i] = 10 ** fixedTitration.optimiseFixed(
+                logResult, evaluation = titration.optimiseFixed(
                     fixedVars,
                     initialGuess,
                     progressDialog.callback,
                     {"xatol": xatol, "fatol": fatol},
                 )
-                RMSEs[i] = fixedTitration.RMSE
+                optimisationResults[i] = 10**logResult
+                RMSEs[i] = titration.evaluationRMSE(evaluation)
 
                 if i == points:
                     # step() wraps around to 0 when reaching maximum
@@ -1886,11 +2091,167 @@ class RMSEPopup(tk.Toplevel):
             self.canvas.draw()
 
 
-class ResultsFrame(ttk.Frame):
+class RMSEContourPopup(RMSEPopup):
+    def __init__(self, master, titration, variableNames, variableLabels, **kwargs):
+        self.variableNames = variableNames
+        self.variableLabels = variableLabels
+        self.colorbar = None
+        self.surface = None
+        super().__init__(master, titration, None, None, **kwargs)
+
+    @property
+    def hasMultipleVariables(self):
+        # Whether there are any variables left to refit at each point.
+        return len(self.variableNames) > 2
+
+    def resetAxes(self):
+        if self.colorbar is not None:
+            self.colorbar.remove()
+            self.colorbar = None
+        self.ax.clear()
+        self.ax.set_xscale("log", nonpositive="mask")
+        self.ax.set_yscale("log", nonpositive="mask")
+        if self.surface is not None:
+            firstIndex, secondIndex = self.surface.variableIndices
+            self.ax.set_xlabel(self.variableLabels[secondIndex])
+            self.ax.set_ylabel(self.variableLabels[firstIndex])
+
+    def populate(self):
+        super().populate()
+        self.pointsLabel.configure(
+            text="Number of points to calculate RMSE at in each direction, for each"
+            " variable"
+        )
+
+        self.variableVars = []
+        for row, default in zip((4, 5), self.variableNames):
+            variableVar = tk.StringVar(self)
+            optionMenu = ttk.OptionMenu(
+                self.frame,
+                variableVar,
+                default,
+                *self.variableNames,
+                style="Outline.TMenubutton",
+            )
+            optionMenu.grid(row=row, column=0, padx=padding, pady=padding, sticky="ne")
+            label = WrappedLabel(
+                self.frame,
+                padding=padding,
+                text="x-axis variable" if row == 4 else "y-axis variable",
+            )
+            label.grid(row=row, column=1, columnspan=2, sticky="nesw")
+            self.variableVars.append(variableVar)
+        # The first variable is shown on the y-axis.
+        self.variableVars.reverse()
+
+        self.calculateButton.grid(row=6)
+
+        self.saveButton = ttk.Button(
+            self.frame,
+            text="Save RMSE values to CSV",
+            command=self.saveCSV,
+            style="Outline.TButton",
+            state="disabled",
+        )
+        self.saveButton.grid(row=7, column=0, columnspan=3, pady=padding, sticky="n")
+
+    def calculate(self):
+        ordersOfMagnitude = float(self.ordersOfMagnitudeSpinbox.get())
+        points = int(self.pointsSpinbox.get())
+        variableIndices = [
+            self.variableNames.index(variableVar.get())
+            for variableVar in self.variableVars
+        ]
+        if self.hasMultipleVariables and self.convergenceCheckbutton.instate(
+            ["selected"]
+        ):
+            options = {"xatol": 1e-2, "fatol": np.inf}
+        else:
+            options = {"xatol": 1e-3, "fatol": np.inf}
+
+        with ProgressDialog(
+            self, "Calculating RMSE plot", progressbarSteps=2 * points + 2
+        ) as progressDialog:
+
+            def callback(numDone):
+                progressDialog.progressbar.configure(value=numDone)
+                progressDialog.callback()
+
+            progressDialog.setLabelText("Calculating RMSE values...")
+            self.surface = profile2D(
+                self.titration,
+                variableIndices,
+                ordersOfMagnitude,
+                points,
+                options,
+                callback,
+            )
+
+            progressDialog.setLabelText("Plotting...")
+            progressDialog.callback()
+
+            self.resetAxes()
+            firstValues, secondValues = self.surface.values
+            contours = self.ax.contourf(
+                secondValues, firstValues, self.surface.RMSEs, levels=20
+            )
+            self.colorbar = self.fig.colorbar(
+                contours, ax=self.ax, label=f"RMSE ({self.titration.yUnit})"
+            )
+            firstIndex, secondIndex = self.surface.variableIndices
+            self.ax.plot(
+                self.surface.bestFit[secondIndex],
+                self.surface.bestFit[firstIndex],
+                "w+",
+                markersize=10,
+            )
+            self.canvas.draw()
+            self.saveButton.configure(state="normal")
+
+    def saveCSV(self):
+        firstIndex, secondIndex = self.surface.variableIndices
+        firstName = self.variableNames[firstIndex]
+        secondName = self.variableNames[secondIndex]
+        initialfile = (
+            os.path.splitext(self.titration.title)[0]
+            + f"_RMSE_{firstName}_{secondName}"
+        )
+        fileName = fd.asksaveasfilename(
+            title="Save RMSE values",
+            initialfile=initialfile,
+            filetypes=[("CSV file", "*.csv")],
+            defaultextension=".csv",
+            parent=self,
+        )
+        if fileName == "":
+            return
+        firstValues, secondValues = self.surface.values
+        columnTitles = np.append(
+            f"{firstName} \\ {secondName}",
+            secondValues,
+        )
+        rowTitles = np.atleast_2d(firstValues).T
+        output = np.vstack(
+            (columnTitles, np.hstack((rowTitles, self.surface.RMSEs)).astype(str))
+        )
+        np.savetxt(fileName, output, fmt="%s", delimiter=",", encoding="utf-8-sig")
+
+
+class ResultsFrame(ResultTabMixin, ttk.Frame):
     def __init__(self, parent, titration, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.titration = titration
+        super().__init__(parent, titration, *args, **kwargs)
         self.sigfigs = 3
+
+    def getLayout(self):
+        return ()
+
+    def populate(self):
+        # All widgets depend on the fit, so are created by updateFit().
+        pass
+
+    def updateFit(self):
+        for child in self.winfo_children():
+            child.destroy()
         self.showResults()
 
     # TODO: add spinbox for sigfigs
@@ -1908,35 +2269,28 @@ class ResultsFrame(ttk.Frame):
     @property
     def bic(self):
         # Bayesian Information Criterion
-        numParameters = (
-            self.titration.equilibriumConstants.variableCount
-            + self.titration.totalConcentrations.variableCount
-            + self.titration.contributors.contributorsMatrix.shape[0]
-        )
-        numDataPoints = self.titration.numAdditions
-        chiSquared = np.sum(
-            (self.titration.lastFittedCurves - self.titration.processedData) ** 2
-            / np.abs(self.titration.lastFittedCurves)
+        return self.titration.BIC
+
+    @property
+    def variableNames(self):
+        return list(self.titration.equilibriumConstants.variableNames) + list(
+            self.titration.totalConcentrations.variableNames
         )
 
-        return numDataPoints * np.log(
-            chiSquared / numDataPoints
-        ) + numParameters * np.log(numDataPoints)
+    @property
+    def variableLabels(self):
+        return [
+            R"$K_{" + name + R"}\ (\mathrm{M^{-n}})$"
+            for name in self.titration.equilibriumConstants.variableNames
+        ] + [
+            "$" + name + R"\ (\mathrm{M})$"
+            for name in self.titration.totalConcentrations.variableNames
+        ]
 
     def showRMSEPlot(self, variableIndex, variableType):
         if variableType == "equilibriumConstants":
-            xLabel = (
-                R"$K_{"
-                + self.titration.equilibriumConstants.variableNames[variableIndex]
-                + R"}\ (\mathrm{M^{-n}})$"
-            )
             absoluteVariableIndex = variableIndex
         elif variableType == "totalConcentrations":
-            xLabel = (
-                "$"
-                + self.titration.totalConcentrations.variableNames[variableIndex]
-                + R"\ (\mathrm{M})$"
-            )
             absoluteVariableIndex = (
                 self.titration.equilibriumConstants.variableCount + variableIndex
             )
@@ -1945,11 +2299,87 @@ class ResultsFrame(ttk.Frame):
                 "variableType must be 'equilibriumConstants' or 'totalConcentrations'"
             )
 
-        popup = RMSEPopup(self, self.titration, absoluteVariableIndex, xLabel)
+        popup = RMSEPopup(
+            self,
+            self.titration,
+            absoluteVariableIndex,
+            self.variableLabels[absoluteVariableIndex],
+        )
         popup.show()
 
+    def showRMSEContourPlot(self):
+        popup = RMSEContourPopup(
+            self, self.titration, self.variableNames, self.variableLabels
+        )
+        popup.show()
+
+    def showConfidenceIntervals(self):
+        root = self.winfo_toplevel()
+        popup = BootstrapPopup(master=root)
+        popup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+        if not popup.show():
+            return
+
+        with ProgressDialog(
+            self,
+            "Calculating confidence intervals",
+            "Refitting synthetic datasets",
+            progressbarSteps=popup.numSamples,
+        ) as progressDialog:
+
+            def callback(numDone):
+                progressDialog.progressbar.configure(value=numDone)
+                progressDialog.callback()
+
+            result = bootstrap(
+                self.titration, popup.numSamples, popup.method, callback=callback
+            )
+
+        resultsPopup = BootstrapResultsPopup(result, popup.level, master=root)
+        resultsPopup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+
+    def showExperimentDesign(self):
+        root = self.winfo_toplevel()
+        popup = DesignPopup(self.titration.numAdditions, master=root)
+        popup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+        if not popup.show():
+            return
+
+        schedules = candidateSchedules(
+            self.titration, popup.numAdditions, popup.stockScales, popup.volumeScales
+        )
+        with ProgressDialog(
+            self,
+            "Designing experiment",
+            "Simulating addition schedules",
+            progressbarSteps=len(schedules),
+        ) as progressDialog:
+
+            def callback(numDone):
+                progressDialog.progressbar.configure(value=numDone)
+                progressDialog.callback()
+
+            current, scores = designExperiment(self.titration, schedules, callback)
+
+        resultsPopup = DesignResultsPopup(self.titration, current, scores, master=root)
+        resultsPopup.geometry(f"+{root.winfo_x()+100}+{root.winfo_y()+100}")
+
+    def getParameterErrors(self):
+        # Only an estimate, so shouldn't stop the rest of the results from showing.
+        try:
+            return parameterErrors(self.titration)
+        except Exception as e:
+            warnings.warn(f"Could not estimate the standard errors: {e}")
+            return None
+
+    def formatError(self, errors, index):
+        if errors is None or not np.isfinite(errors.standardErrors[index]):
+            return "?"
+        return f"±{errors.standardErrors[index]:.2g}"
+
     def showResults(self):
         titration = self.titration
+        errors = self.getParameterErrors()
         bicLabel = ttk.Label(
             self,
             text=f"Bayesian information criterion (lower is better): {self.bic:.3g}",
@@ -1966,7 +2396,7 @@ class ResultsFrame(ttk.Frame):
             self,
             0,
             0,
-            ["K (M⁻ⁿ)", ""],
+            ["K (M⁻ⁿ)", "SE (log K)", ""],
             rowOptions=("readonlyTitles",),
             columnOptions=("readonlyTitles",),
         )
@@ -1979,6 +2409,10 @@ class ResultsFrame(ttk.Frame):
                 name,
                 [
                     self.formatK(value),
+                    [
+                        "readonlyEntry",
+                        {"text": self.formatError(errors, index), "align": "right"},
+                    ],
                     [
                         "button",
                         {
@@ -2000,7 +2434,7 @@ class ResultsFrame(ttk.Frame):
                 self,
                 0,
                 0,
-                [f"c ({titration.totalConcentrations.concsUnit})", ""],
+                [f"c ({titration.totalConcentrations.concsUnit})", "SE (log c)", ""],
                 rowOptions=["readonlyTitles"],
                 columnOptions=["readonlyTitles"],
             )
@@ -2015,6 +2449,17 @@ class ResultsFrame(ttk.Frame):
                         totalConcentrations.convertConc(
                             conc, "M", titration.totalConcentrations.concsUnit
                         ),
+                        [
+                            "readonlyEntry",
+                            {
+                                "text": self.formatError(
+                                    errors,
+                                    titration.equilibriumConstants.variableCount
+                                    + index,
+                                ),
+                                "align": "right",
+                            },
+                        ],
                         [
                             "button",
                             {
@@ -2028,6 +2473,58 @@ class ResultsFrame(ttk.Frame):
                 )
             concsTable.pack(side="top", pady=15)
 
+        if errors is not None and len(errors.variableNames) > 1:
+            correlationsTable = Table(
+                self,
+                0,
+                0,
+                errors.variableNames,
+                rowOptions=["readonlyTitles"],
+                columnOptions=["readonlyTitles"],
+            )
+            for name, row in zip(errors.variableNames, errors.correlations):
+                correlationsTable.addRow(
+                    name,
+                    [
+                        ["readonlyEntry", {"text": f"{value:.2f}", "align": "right"}]
+                        for value in row
+                    ],
+                )
+            correlationsLabel = ttk.Label(
+                self, text="Correlations between the log values:"
+            )
+            correlationsLabel.pack(side="top")
+            correlationsTable.pack(side="top", pady=15)
+
+        confidenceButton = ttk.Button(
+            self,
+            text="Confidence intervals",
+            command=self.showConfidenceIntervals,
+            style="Outline.TButton",
+        )
+        confidenceButton.pack(side="top")
+
+        if len(self.variableNames) > 1:
+            contourButton = ttk.Button(
+                self,
+                text="2D RMSE plot",
+                command=self.showRMSEContourPlot,
+                style="Outline.TButton",
+            )
+            contourButton.pack(side="top", pady=padding)
+
+        if isinstance(
+            titration.totalConcentrations,
+            totalConcentrations.GetTotalConcsFromVolumes,
+        ):
+            designButton = ttk.Button(
+                self,
+                text="Design experiment",
+                command=self.showExperimentDesign,
+                style="Outline.TButton",
+            )
+            designButton.pack(side="top", pady=padding)
+
         if titration.continuous:
             sheetLabel = ttk.Label(
                 self,
@@ -1,4 +1,5 @@
 import csv
+import itertools
 import tkinter as tk
 import tkinter.ttk as ttk
 
@@ -23,42 +24,139 @@ def find_nearest(array, value):
     return array[idx]
 
 
+def isNumeric(cell):
+    if not cell.strip():
+        return True
+    try:
+        float(cell)
+    except ValueError:
+        return False
+    return True
+
+
+def detectTitles(firstRow, secondRow):
+    # Returns whether the first row and the first column are titles. A row or column
+    # containing text is read as titles, and so is a row with text in the corner cell,
+    # as in Musketeer's own files. Numeric titles, such as wavelengths, are recognised
+    # by a blank corner cell, which means both the first row and column are titles.
+    if len(firstRow) == 0:
+        return False, False
+    corner = firstRow[0].strip()
+    blankCorner = corner == "" and all(cell.strip() for cell in firstRow[1:])
+    hasSignalTitles = blankCorner or not all(isNumeric(cell) for cell in firstRow)
+
+    firstDataRow = secondRow if hasSignalTitles else firstRow
+    hasAdditionTitles = (
+        blankCorner
+        or (hasSignalTitles and not isNumeric(corner))
+        or (len(firstDataRow) > 0 and not isNumeric(firstDataRow[0]))
+    )
+    return hasSignalTitles, hasAdditionTitles
+
+
+def readTitlesAndData(lines, dialect, hasTitles, dataColumns=None):
+    # Streams the lines into np.loadtxt, which parses them into a float array in
+    # chunks. If hasTitles, the first cell of each line is collected as a title.
+    titles = []
+
+    def collectTitles(lines):
+        for line in lines:
+            if dialect.quotechar in line:
+                titles.append(next(csv.reader([line], dialect))[0])
+            else:
+                titles.append(line.partition(dialect.delimiter)[0])
+            yield line
+
+    data = np.loadtxt(
+        collectTitles(lines) if hasTitles else lines,
+        delimiter=dialect.delimiter,
+        quotechar=dialect.quotechar,
+        usecols=dataColumns,
+        ndmin=2,
+    )
+
+    if hasTitles:
+        return np.array(titles), data
+    return None, data
+
+
 # TODO: convert to classes, register using ABC
 def readUV(filePath, master):
     with open(filePath, "r", newline="", encoding="utf-8-sig") as inFile:
-        reader = csv.reader(inFile)
-
-        titleRow = next(reader)[::2]
+        titleRow = next(csv.reader([inFile.readline()]))[::2]
         # the title row can contain an extra blank entry, this gets rid of it
         if not titleRow[-1]:
             titleRow.pop(-1)
 
-        wavelengths = []
-        absorbances = []
         # skip the column name row
-        next(reader)
-        for row in reader:
-            if not row or not row[0]:
-                break
-            wavelengths.append(row[0])
-            absorbances.append(row[1::2])
+        inFile.readline()
+        # the data is followed by a blank row, and then details of the method
+        lines = itertools.takewhile(
+            lambda line: line.strip() and not line.startswith(","), inFile
+        )
+        wavelengths, absorbances = readTitlesAndData(
+            lines,
+            csv.excel,
+            hasTitles=True,
+            dataColumns=range(1, 2 * len(titleRow), 2),
+        )
 
     additionTitles = np.array(titleRow)
-    signalTitles = np.array(wavelengths)
+    signalTitles = wavelengths
 
     # transpose data so that the column is the wavelength
-    data = np.array(absorbances, dtype=float).T
+    data = absorbances.T
 
     return data, additionTitles, signalTitles, "UV-Vis"
 
 
 def readGeneric(filePath, master):
-    with open(filePath, encoding="utf-8-sig") as file:
+    with open(filePath, newline="", encoding="utf-8-sig") as file:
         d = csv.Sniffer().sniff(file.readline() + file.readline())
         file.seek(0)
-        data = np.array(list(csv.reader(file, dialect=d)))
 
-    return data, None, None, None
+        firstRow = next(csv.reader([file.readline()], d), [])
+        secondLineStart = file.tell()
+        secondRow = next(csv.reader([file.readline()], d), [])
+        hasSignalTitles, hasAdditionTitles = detectTitles(firstRow, secondRow)
+        if hasSignalTitles:
+            file.seek(secondLineStart)
+            firstDataRow = secondRow
+        else:
+            file.seek(0)
+            firstDataRow = firstRow
+
+        try:
+            additionTitles, data = readTitlesAndData(
+                file,
+                d,
+                hasAdditionTitles,
+                range(1, len(firstDataRow)) if hasAdditionTitles else None,
+            )
+            if hasSignalTitles:
+                signalTitles = np.array(firstRow[1:] if hasAdditionTitles else firstRow)
+                if signalTitles.shape[0] != data.shape[1]:
+                    raise ValueError("Title row is of a different length.")
+            else:
+                signalTitles = None
+            return data, additionTitles, signalTitles, None
+        except ValueError:
+            # Fall back to the csv module, which can also handle empty cells.
+            file.seek(0)
+            text = np.array(list(csv.reader(file, dialect=d)))
+
+    try:
+        if text.ndim != 2:
+            raise ValueError("Rows are of different lengths.")
+        body = text[int(hasSignalTitles) :, int(hasAdditionTitles) :]
+        data = np.where(body == "", "nan", body).astype(float)
+    except ValueError:
+        # Return the file as text, to be edited by the user.
+        return text, None, None, None
+
+    additionTitles = text[int(hasSignalTitles) :, 0] if hasAdditionTitles else None
+    signalTitles = text[0, int(hasAdditionTitles) :] if hasSignalTitles else None
+    return data, additionTitles, signalTitles, None
 
 
 class NavigationToolbarHorizontal(NavigationToolbar2Tk):
@@ -277,3 +375,6 @@ fileReaders = np.array(
         ["Mnova NMR peak list", "*.csv", readNMR],
     ]
 )
+
+# Readers that ask the user for input, and therefore can't be run in the background.
+interactiveFileReaders = [readNMR]
@@ -1,7 +1,6 @@
 import re
 import tkinter as tk
 import tkinter.ttk as ttk
-from abc import abstractmethod
 from decimal import Decimal
 
 import numpy as np
@@ -9,61 +8,20 @@ from numpy import ma
 
 from . import moduleFrame
 from . import style
-from .scrolledFrame import ScrolledFrame
-from .table import ButtonFrame, Table, WrappedLabel
-
-prefixesDecimal = {
-    "": Decimal(1),
-    "m": Decimal(1e-3),
-    "u": Decimal(1e-6),
-    "μ": Decimal(1e-6),
-    "n": Decimal(1e-9),
-}
-
-prefixes = dict([key, float(value)] for key, value in prefixesDecimal.items())
-
-
-def convertConc(conc, fromUnit, toUnit):
-    if conc is ma.masked:
-        return "?"
-    conc = Decimal(conc)
-    convertedConc = float(
-        conc * prefixesDecimal[fromUnit.strip("M")] / prefixesDecimal[toUnit.strip("M")]
-    )
-    return f"{convertedConc:g}"  # strip trailing zeroes
-
-
-class totalConcentrations(moduleFrame.Strategy):
-    requiredAttributes = (
-        "concsUnit",
-        "totalConcs",
-        "freeNames",
-        "variableNames",
-    )
-
-    # TODO: support entering initial guesses
-    @property
-    def variableInitialGuesses(self):
-        return np.full(
-            self.variableCount,
-            self.defaultInitialGuess,
-        )
-
-    @property
-    def defaultInitialGuess(self):
-        return prefixes[self.concsUnit.strip("M")] * 1.0
-
-    @property
-    def freeCount(self):
-        return len(self.freeNames)
-
-    @abstractmethod
-    def run(self, totalConcVars):
-        pass
+from .core.totalConcentrations import (  # noqa: F401
+    prefixesDecimal,
+    prefixes,
+    convertConc,
+    totalConcentrations,
+    GetTotalConcsFromVolumes,
+    GetTotalConcs,
+    strategies,
+)
+from .table import ButtonFrame, SheetTable, Table, WrappedLabel
 
 
 class StockTable(Table):
-    def __init__(self, master, titration):
+    def __init__(self, master, titration, callback=None):
         try:
             stockTitles = titration.totalConcentrations.stockTitles
         except AttributeError:
@@ -83,6 +41,7 @@ class StockTable(Table):
             allowGuesses=True,
             rowOptions=("titles", "new", "delete"),
             columnOptions=("titles", "new", "delete"),
+            callback=callback,
         )
 
         self.titration = titration
@@ -124,34 +83,52 @@ class StockTable(Table):
             self.addRow(name)
 
 
-class VolumesTable(Table):
-    def __init__(self, master, titration):
+class VolumesTable(SheetTable):
+    def __init__(self, master, titration, height=None):
         try:
             stockTitles = titration.totalConcentrations.stockTitles
         except AttributeError:
             stockTitles = ("Stock 1", "Stock 2")
-        super().__init__(
-            master,
-            2,
-            2,
-            stockTitles,
-            rowOptions=("readonlyTitles", "delete"),
-            columnOptions=(),
-        )
 
         self.titration = titration
 
-        self.label(0 - self.headerGridRows, 0, "Cumulative addition volumes:", 4)
-        self.label(1 - self.headerGridRows, 2, "Unit:")
-        _, self.volumesUnit = self.dropdown(
-            1 - self.headerGridRows, 3, ("nL", "μL", "mL", "L"), "μL"
+        super().__init__(master, titration.additionTitles, stockTitles, height=height)
+
+        headerFrame = ttk.Frame(self)
+        headerFrame.pack(fill="x", before=self.sheet, pady=(0, style.padding))
+        volumesLabel = ttk.Label(headerFrame, text="Cumulative addition volumes:")
+        volumesLabel.pack(side="left")
+
+        self.volumesUnit = tk.StringVar(self)
+        unitMenu = ttk.OptionMenu(
+            headerFrame,
+            self.volumesUnit,
+            "μL",
+            *("nL", "μL", "mL", "L"),
+            style="Outline.TMenubutton",
         )
+        unitMenu.pack(side="right")
+        unitLabel = ttk.Label(headerFrame, text="Unit:")
+        unitLabel.pack(side="right", padx=style.padding)
         try:
             self.volumesUnit.set(titration.totalConcentrations.volumesUnit)
         except AttributeError:
             pass
 
-        self.readonlyEntry(self.headerCells - 1, 1, "Addition title:", align="left")
+        self.sheet.popup_menu_add_command(
+            "Copy first",
+            lambda: self.copyFirst(self.selectedColumn),
+            table_menu=False,
+            index_menu=False,
+            empty_space_menu=False,
+        )
+        self.sheet.popup_menu_add_command(
+            "Copy from titles",
+            lambda: self.copyFromTitles(self.selectedColumn),
+            table_menu=False,
+            index_menu=False,
+            empty_space_menu=False,
+        )
 
         if (
             self.titration.totalConcentrations is not None
@@ -162,61 +139,32 @@ class VolumesTable(Table):
             )
         ):
             self.populate(titration.totalConcentrations.volumes)
-        else:
-            self.populateDefault()
-
-    # TODO: instead make the columnspan of the titles 2
-    def deleteRowButton(self, *args, **kwargs):
-        button = super().deleteRowButton(*args, **kwargs)
-        button.state(["disabled"])
-        return button
 
     def populate(self, volumes):
-        for name, row in zip(self.titration.additionTitles, volumes):
-            self.addRow(
-                name,
+        self.data = np.array(
+            [
                 [
                     self.convertVolume(volume, "L", self.volumesUnit.get())
                     for volume in row
-                ],
-            )
-
-    def populateDefault(self):
-        for name in self.titration.additionTitles:
-            self.addRow(name)
-
-    def addColumn(self, firstEntry="", data=None):
-        super().addColumn(firstEntry, data)
-        column = self.cells.shape[1] - 1
-        copyFirstButton = self.button(self.headerCells - 2, column, "Copy first")
-        copyFirstButton.configure(
-            command=lambda button=copyFirstButton: self.copyFirst(
-                button.grid_info()["column"]
-            )
+                ]
+                for row in volumes
+            ]
         )
-        self.cells[self.headerCells - 2, column] = copyFirstButton
 
-        copyTitlesButton = self.button(self.headerCells - 1, column, "Copy from titles")
-        copyTitlesButton.configure(
-            command=lambda button=copyTitlesButton: self.copyFromTitles(
-                button.grid_info()["column"]
-            )
-        )
-        self.cells[self.headerCells - 1, column] = copyTitlesButton
+    def populateDefault(self):
+        self.data = np.full(self.cells.shape, "")
 
     def copyFirst(self, column):
-        cells = self.cells[self.headerCells :, column]
-        first = cells[0].get()
-        for cell in cells:
-            cell.set(first)
+        cells = self.cells[:, column]
+        self.sheet.set_column_data(column, [cells[0]] * len(cells))
+        self.sheet.redraw()
 
     def copyFromTitles(self, column):
-        cells = self.cells[self.headerCells :]
-        for row in cells:
-            title = row[1].get()
+        for row, title in enumerate(self.rowTitles):
             volume = self.getVolumeFromString(title, self.volumesUnit.get())
             if volume is not None:
-                row[column].set(volume)
+                self.sheet.set_cell_data(row, column, volume, redraw=False)
+        self.sheet.redraw()
 
     def getVolumeFromString(self, string, toUnit="L"):
         searchResult = re.search(r"([0-9.]+) ?([nuμm]?)[lL]", string)
@@ -241,18 +189,11 @@ class VolumesPopup(moduleFrame.Popup):
         self.titration = titration
         self.title("Enter volumes")
 
-        height = int(self.master.winfo_height() * 0.8)
-        frame = ScrolledFrame(
-            self,
-            height=height,
-            max_width=self.winfo_toplevel().master.winfo_width() - 200,
-        )
+        frame = ttk.Frame(self)
         frame.pack(expand=True, fill="both")
 
-        innerFrame = frame.display_widget(ttk.Frame, stretch=True)
-
-        unknownConcsFrame = ttk.Frame(innerFrame, borderwidth=5)
-        unknownConcsFrame.pack(expand=True, fill="both")
+        unknownConcsFrame = ttk.Frame(frame, borderwidth=5)
+        unknownConcsFrame.pack(expand=False, fill="both")
         unknownConcsLabel = WrappedLabel(
             unknownConcsFrame,
             text='Enter "?" to optimise that concentration as a variable, or enter'
@@ -273,31 +214,45 @@ class VolumesPopup(moduleFrame.Popup):
         )
         unknownTotalConcsCheckbutton.pack(fill="both", padx=style.padding)
 
-        self.stockTable = StockTable(innerFrame, titration)
-        self.stockTable.pack(expand=True, fill="both")
-        self.volumesTable = VolumesTable(innerFrame, titration)
+        self.stockTable = StockTable(frame, titration, callback=self.updateStockTitles)
+        self.stockTable.pack(expand=False, fill="both")
+        height = int(self.master.winfo_height() * 0.5)
+        self.volumesTable = VolumesTable(frame, titration, height=height)
         self.volumesTable.pack(expand=True, fill="both")
 
         self.stockTable.newColumnButton.configure(command=self.addColumns)
         self.stockTable._deleteColumn = self.stockTable.deleteColumn
         self.stockTable.deleteColumn = self.deleteColumns
 
-        buttonFrame = ButtonFrame(innerFrame, self.reset, self.saveData, self.destroy)
+        buttonFrame = ButtonFrame(frame, self.reset, self.saveData, self.destroy)
         buttonFrame.pack(expand=False, fill="both")
 
+    def updateStockTitles(self, *args):
+        # Called whenever an entry in the stock table changes, including while the
+        # table is being created.
+        if not hasattr(self, "volumesTable"):
+            return
+        stockTitles = self.stockTable.columnTitles
+        # Columns are added and deleted by addColumns and deleteColumns.
+        if len(stockTitles) == len(self.volumesTable.columnTitles):
+            self.volumesTable.columnTitles = stockTitles
+
     def addColumns(self):
         self.stockTable.addColumn()
         self.volumesTable.addColumn()
 
     def deleteColumns(self, column):
         self.stockTable._deleteColumn(column)
-        self.volumesTable.deleteColumn(column)
+        # The first two columns of the stock table are used for its row buttons and
+        # titles.
+        self.volumesTable.deleteColumn(column - 2)
 
     def reset(self):
-        for table in (self.stockTable, self.volumesTable):
-            table.resetData()
-            table.columnTitles = ("Stock 1", "Stock 2")
-            table.populateDefault()
+        self.stockTable.resetData()
+        self.stockTable.columnTitles = ("Stock 1", "Stock 2")
+        self.stockTable.populateDefault()
+        self.volumesTable.columnTitles = ("Stock 1", "Stock 2")
+        self.volumesTable.populateDefault()
 
     def saveData(self):
         if np.unique(self.stockTable.rowTitles).size != self.stockTable.rowTitles.size:
@@ -328,98 +283,9 @@ class VolumesPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetTotalConcsFromVolumes(totalConcentrations):
-    Popup = VolumesPopup
-    popupAttributes = (
-        "stockTitles",
-        "unknownTotalConcsLinked",
-        "concsUnit",
-        "stockConcs",
-        "stockConcsGuesses",
-        "volumesUnit",
-        "volumes",
-        "freeNames",
-    )
-
-    def run(self, totalConcVars):
-        stockConcs = np.copy(self.stockConcs)
-        maskArray = ma.getmaskarray(self.stockConcs)
-
-        if self.unknownTotalConcsLinked:
-            # For each row (= species), all blank cells are assigned to a
-            # single unknown variable.
-            for rowIndex, totalConcVar in zip(
-                np.where(self.rowsWithBlanks)[0], totalConcVars
-            ):
-                stockConcs[rowIndex, maskArray[rowIndex, :]] = totalConcVar
-        else:
-            stockConcs[maskArray] = totalConcVars
-
-        return (self.volumes @ stockConcs.T) / np.sum(
-            self.volumes, axis=1, keepdims=True
-        )
-
-    @property
-    def totalConcs(self):
-        # Known total concentrations can be used by other strategies.
-        return ma.dot(self.volumes, self.stockConcs.T) / np.sum(
-            self.volumes, axis=1, keepdims=True
-        )
-
-    @property
-    def totalConcsGuesses(self):
-        return ma.dot(self.volumes, self.stockConcsGuesses.T) / np.sum(
-            self.volumes, axis=1, keepdims=True
-        )
-
-    @property
-    def variableInitialGuesses(self):
-        if self.unknownTotalConcsLinked:
-            output = np.empty(self.variableCount)
-
-            for i, row in enumerate(self.stockConcsGuesses[self.rowsWithBlanks, :]):
-                rowGuesses = row[~ma.getmaskarray(row)]
-                if len(np.unique(rowGuesses)) > 1:
-                    raise ValueError(
-                        "Multiple different initial guesses entered for "
-                        f"{self.variableNames[i]}"
-                    )
-                elif len(rowGuesses) == 0:
-                    output[i] = self.defaultInitialGuess
-                else:
-                    output[i] = rowGuesses[0]
-
-            return output
-        else:
-            return self.stockConcsGuesses[ma.getmaskarray(self.stockConcs)].filled(
-                self.defaultInitialGuess
-            )
-
-    @property
-    def rowsWithBlanks(self):
-        return np.any(ma.getmaskarray(self.stockConcs), axis=1)
-
-    @property
-    def variableNames(self):
-        if self.unknownTotalConcsLinked:
-            # return the number of rows (= species) with blank cells
-            concVarsNames = self.freeNames[self.rowsWithBlanks]
-            return np.array([f"[{name}]" for name in concVarsNames])
-        else:
-            concVarsNames = []
-            for freeName, concs in zip(self.freeNames, self.stockConcs):
-                concVarsNames.extend(
-                    [
-                        f"[{freeName}] in {stock}"
-                        for stock in self.stockTitles[ma.getmaskarray(concs)]
-                    ]
-                )
-            return np.array(concVarsNames)
-
-
-class ConcsTable(Table):
+class ConcsTable(SheetTable):
     # TODO: merge with VolumesTable
-    def __init__(self, master, titration):
+    def __init__(self, master, titration, height=None):
         self.titration = titration
 
         try:
@@ -429,25 +295,54 @@ class ConcsTable(Table):
 
         super().__init__(
             master,
-            1,
-            2,
+            titration.additionTitles,
             freeNames,
             maskBlanks=True,
             allowGuesses=True,
-            rowOptions=("readonlyTitles",),
-            columnOptions=("titles", "new", "delete"),
+            columnOptions=("titles", "delete"),
+            height=height,
         )
 
-        self.populateDefault()
-
-    def populateDefault(self):
-        self.label(0 - self.headerGridRows, 2, "Unit:")
-        _, self.concsUnit = self.dropdown(
-            0 - self.headerGridRows, 3, ("nM", "μM", "mM", "M"), "mM"
+        headerFrame = ttk.Frame(self)
+        headerFrame.pack(fill="x", before=self.sheet, pady=(0, style.padding))
+        newColumnButton = ttk.Button(
+            headerFrame,
+            text="New column",
+            command=self.newColumn,
+            style="success.Outline.TButton",
+        )
+        newColumnButton.pack(side="left")
+
+        self.concsUnit = tk.StringVar(self)
+        unitMenu = ttk.OptionMenu(
+            headerFrame,
+            self.concsUnit,
+            "mM",
+            *("nM", "μM", "mM", "M"),
+            style="Outline.TMenubutton",
+        )
+        unitMenu.pack(side="right")
+        unitLabel = ttk.Label(headerFrame, text="Unit:")
+        unitLabel.pack(side="right", padx=style.padding)
+
+        self.sheet.popup_menu_add_command(
+            "Copy first",
+            lambda: self.copyFirst(self.selectedColumn),
+            table_menu=False,
+            index_menu=False,
+            empty_space_menu=False,
+        )
+        self.sheet.popup_menu_add_command(
+            "Copy from titles",
+            lambda: self.copyFromTitles(self.selectedColumn),
+            table_menu=False,
+            index_menu=False,
+            empty_space_menu=False,
         )
 
-        self.readonlyEntry(self.headerCells - 1, 1, "Addition title:", align="left")
+        self.populateDefault()
 
+    def populateDefault(self):
         if (
             self.titration.totalConcentrations is not None
             and self.titration.totalConcentrations.totalConcs.shape[0]
@@ -466,56 +361,36 @@ class ConcsTable(Table):
                     self.titration.totalConcentrations.totalConcs
                 )
 
-            for name, row, rowGuesses in zip(
-                self.titration.additionTitles,
-                self.titration.totalConcentrations.totalConcs,
-                totalConcsGuesses,
-            ):
-                self.addRow(
-                    name,
+            self.data = np.array(
+                [
                     [
-                        convertConc(conc, "M", self.concsUnit.get())
-                        if guess is ma.masked
-                        else "~" + convertConc(guess, "M", self.concsUnit.get())
+                        (
+                            convertConc(conc, "M", self.concsUnit.get())
+                            if guess is ma.masked
+                            else "~" + convertConc(guess, "M", self.concsUnit.get())
+                        )
                         for conc, guess in zip(row, rowGuesses)
-                    ],
-                )
-        else:
-            for name in self.titration.additionTitles:
-                self.addRow(name)
-
-    def addColumn(self, firstEntry="", data=None):
-        super().addColumn(firstEntry, data)
-        column = self.cells.shape[1] - 1
-        copyFirstButton = self.button(self.headerCells - 2, column, "Copy first")
-        copyFirstButton.configure(
-            command=lambda button=copyFirstButton: self.copyFirst(
-                button.grid_info()["column"]
-            )
-        )
-        self.cells[self.headerCells - 2, column] = copyFirstButton
-
-        copyTitlesButton = self.button(self.headerCells - 1, column, "Copy from titles")
-        copyTitlesButton.configure(
-            command=lambda button=copyTitlesButton: self.copyFromTitles(
-                button.grid_info()["column"]
+                    ]
+                    for row, rowGuesses in zip(
+                        self.titration.totalConcentrations.totalConcs,
+                        totalConcsGuesses,
+                    )
+                ]
             )
-        )
-        self.cells[self.headerCells - 1, column] = copyTitlesButton
+        else:
+            self.data = np.full(self.cells.shape, "")
 
     def copyFirst(self, column):
-        cells = self.cells[self.headerCells :, column]
-        first = cells[0].get()
-        for cell in cells:
-            cell.set(first)
+        cells = self.cells[:, column]
+        self.sheet.set_column_data(column, [cells[0]] * len(cells))
+        self.highlightGuesses()
 
     def copyFromTitles(self, column):
-        cells = self.cells[self.headerCells :]
-        for row in cells:
-            title = row[1].get()
+        for row, title in enumerate(self.rowTitles):
             conc = self.getConcFromString(title, self.concsUnit.get())
             if conc is not None:
-                row[column].set(conc)
+                self.sheet.set_cell_data(row, column, conc, redraw=False)
+        self.highlightGuesses()
 
     def getConcFromString(self, string, toUnit="M"):
         searchResult = re.search(r"([0-9.]+) ?([nuμm]?)M", string)
@@ -531,18 +406,11 @@ class ConcsPopup(moduleFrame.Popup):
         self.titration = titration
         self.title("Enter concentrations")
 
-        height = int(self.master.winfo_height() * 0.8)
-        frame = ScrolledFrame(
-            self,
-            height=height,
-            max_width=self.winfo_toplevel().master.winfo_width() - 200,
-        )
+        frame = ttk.Frame(self)
         frame.pack(expand=True, fill="both")
 
-        innerFrame = frame.display_widget(ttk.Frame, stretch=True)
-
-        unknownConcsFrame = ttk.Frame(innerFrame, borderwidth=5)
-        unknownConcsFrame.pack(expand=True, fill="both")
+        unknownConcsFrame = ttk.Frame(frame, borderwidth=5)
+        unknownConcsFrame.pack(expand=False, fill="both")
         unknownConcsLabel = WrappedLabel(
             unknownConcsFrame,
             text='Enter "?" to optimise that concentration as a variable, or enter'
@@ -563,14 +431,14 @@ class ConcsPopup(moduleFrame.Popup):
         )
         unknownTotalConcsCheckbutton.pack(fill="both", padx=style.padding)
 
-        self.concsTable = ConcsTable(innerFrame, titration)
+        height = int(self.master.winfo_height() * 0.6)
+        self.concsTable = ConcsTable(frame, titration, height=height)
         self.concsTable.pack(expand=True, fill="both")
 
-        buttonFrame = ButtonFrame(innerFrame, self.reset, self.saveData, self.destroy)
+        buttonFrame = ButtonFrame(frame, self.reset, self.saveData, self.destroy)
         buttonFrame.pack(expand=False, fill="both")
 
     def reset(self):
-        self.concsTable.resetData()
         try:
             self.concsTable.columnTitles = self.titration.totalConcentrations.freeNames
         except AttributeError:
@@ -604,87 +472,13 @@ class ConcsPopup(moduleFrame.Popup):
         self.destroy()
 
 
-class GetTotalConcs(totalConcentrations):
-    Popup = ConcsPopup
-    popupAttributes = (
-        "unknownTotalConcsLinked",
-        "concsUnit",
-        "totalConcs",
-        "totalConcsGuesses",
-        "freeNames",
-    )
-
-    def run(self, totalConcVars):
-        totalConcs = np.copy(self.totalConcs)
-        maskArray = ma.getmaskarray(self.totalConcs)
-
-        if self.unknownTotalConcsLinked:
-            # For each row (= component), all blank cells are assigned to a
-            # single unknown variable.
-            for columnIndex, totalConcVar in zip(
-                np.where(self.columnsWithBlanks)[0], totalConcVars
-            ):
-                totalConcs[maskArray[:, columnIndex], columnIndex] = totalConcVar
-        else:
-            totalConcs[maskArray] = totalConcVars
-
-        return totalConcs
-
-    @property
-    def variableInitialGuesses(self):
-        if self.unknownTotalConcsLinked:
-            output = np.empty(self.variableCount)
-
-            for i, column in enumerate(
-                self.totalConcsGuesses[:, self.columnsWithBlanks].T
-            ):
-                columnGuesses = column[~ma.getmaskarray(column)]
-                if len(np.unique(columnGuesses)) > 1:
-                    raise ValueError(
-                        "Multiple different initial guesses entered for "
-                        f"{self.variableNames[i]}"
-                    )
-                elif len(columnGuesses) == 0:
-                    output[i] = self.defaultInitialGuess
-                else:
-                    output[i] = columnGuesses[0]
-
-            return output
-        else:
-            return self.totalConcsGuesses[ma.getmaskarray(self.totalConcs)].filled(
-                self.defaultInitialGuess
-            )
-
-    @property
-    def columnsWithBlanks(self):
-        return np.any(ma.getmaskarray(self.totalConcs), axis=0)
-
-    @property
-    def variableNames(self):
-        if self.unknownTotalConcsLinked:
-            # return the number of columns (= component) with blank cells
-            concVarsNames = self.freeNames[self.columnsWithBlanks]
-            return np.array([f"[{name}]" for name in concVarsNames])
-        else:
-            concVarsNames = []
-            for freeName, concs in zip(self.freeNames, self.totalConcs.T):
-                concVarsNames.extend(
-                    [
-                        f"[{freeName}] in {additionTitle}"
-                        for additionTitle in self.titration.additionTitles[
-                            ma.getmaskarray(concs)
-                        ]
-                    ]
-                )
-            return np.array(concVarsNames)
+GetTotalConcsFromVolumes.Popup = VolumesPopup
+GetTotalConcs.Popup = ConcsPopup
 
 
 class ModuleFrame(moduleFrame.ModuleFrame):
     group = "Experimental Data"
     dropdownLabelText = "Enter concentrations or volumes:"
-    dropdownOptions = {
-        "Volumes": GetTotalConcsFromVolumes,
-        "Concentrations": GetTotalConcs,
-    }
+    dropdownOptions = strategies
     attributeName = "totalConcentrations"
     setDefault = False
@@ -0,0 +1,436 @@
+import os
+import tkinter as tk
+import tkinter.ttk as ttk
+import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy import ma
+
+from . import moduleFrame, processPool
+from .processPool import runInProcessPool, waitForFutures, workerPool
+from .style import padding
+from .table import ButtonFrame
+
+BootstrapResult = namedtuple(
+    "BootstrapResult", ("variableNames", "bestFit", "logSamples", "numFailed")
+)
+
+ProfileSurface = namedtuple(
+    "ProfileSurface", ("variableIndices", "values", "RMSEs", "bestFit")
+)
+
+ParameterErrors = namedtuple(
+    "ParameterErrors", ("variableNames", "standardErrors", "correlations")
+)
+
+noiseMethods = {
+    "Resampled residuals": "residuals",
+    "Gaussian noise": "gaussian",
+}
+
+
+def refit(processedData, start):
+    # Runs in a worker process. Replaces the fitted part of the data with a synthetic
+    # dataset, and fits it with the same optimisation as Titration.optimise.
+    from scipy.optimize import minimize
+
+    titration = processPool.workerTitration
+    rawData = titration.rawData.copy()
+    rawData[:, titration.columnFilter] = processedData
+    titration.rawData = rawData
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        result = minimize(titration.optimisationFuncLog, x0=start, method="nelder-mead")
+    return result.x
+
+
+def syntheticDatasets(titration, numSamples, method="residuals", seed=None):
+    # Yields copies of the fitted curves with noise added, keeping the mask of the
+    # original data.
+    rng = np.random.default_rng(seed)
+    fittedCurves = ma.getdata(titration.lastFittedCurves)
+    mask = ma.getmaskarray(titration.processedData)
+    residuals = ma.array(titration.processedData - fittedCurves, mask=mask)
+
+    if method == "residuals":
+        # Each signal only draws from its own residuals, as signals can have very
+        # different noise levels.
+        columnResiduals = [residuals[:, i].compressed() for i in range(mask.shape[1])]
+        for _ in range(numSamples):
+            noise = np.zeros_like(fittedCurves)
+            for i, column in enumerate(columnResiduals):
+                if column.size > 0:
+                    noise[:, i] = rng.choice(column, size=noise.shape[0])
+            yield ma.array(fittedCurves + noise, mask=mask)
+    elif method == "gaussian":
+        standardDeviations = ma.filled(np.sqrt(np.mean(residuals**2, axis=0)), 0)
+        for _ in range(numSamples):
+            noise = rng.normal(size=fittedCurves.shape) * standardDeviations
+            yield ma.array(fittedCurves + noise, mask=mask)
+    else:
+        raise ValueError(f"Unknown noise method {method}")
+
+
+def bootstrap(
+    titration, numSamples=500, method="residuals", seed=None, callback=lambda *a: None
+):
+    # Refits synthetic datasets generated from the current fit, each starting from the
+    # fitted values. callback is called with the number of completed refits.
+    if not hasattr(titration, "fitResult"):
+        raise ValueError("Please fit the data first.")
+    start = np.log10(titration.fitResult)
+    if len(start) == 0:
+        raise ValueError("There are no variables to optimise.")
+    variableNames = list(titration.equilibriumConstants.variableNames) + list(
+        titration.totalConcentrations.variableNames
+    )
+
+    futures = runInProcessPool(
+        titration,
+        refit,
+        [
+            (dataset, start)
+            for dataset in syntheticDatasets(titration, numSamples, method, seed)
+        ],
+        callback,
+    )
+
+    logSamples = []
+    for future in futures:
+        if future.exception() is None and np.all(np.isfinite(future.result())):
+            logSamples.append(future.result())
+    numFailed = numSamples - len(logSamples)
+    if numFailed > 0:
+        warnings.warn(f"{numFailed} of {numSamples} refits failed and were ignored.")
+    if len(logSamples) < 2:
+        raise ValueError("Not enough refits succeeded to estimate uncertainties.")
+
+    return BootstrapResult(
+        variableNames, titration.fitResult, np.array(logSamples), numFailed
+    )
+
+
+def confidenceIntervals(result, level=0.95):
+    # Percentile intervals. Percentiles commute with log10, so these are the same as
+    # for the values themselves.
+    tail = (1 - level) / 2 * 100
+    return 10 ** np.percentile(result.logSamples, [tail, 100 - tail], axis=0).T
+
+
+def correlationMatrix(result):
+    # Correlations between the log10 variables, as that is the space they are fitted in.
+    if result.logSamples.shape[1] == 1:
+        return np.ones((1, 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.corrcoef(result.logSamples, rowvar=False)
+
+
+# Step size for the finite differences, in orders of magnitude.
+jacobianStep = 1e-4
+
+
+def residualVector(titration, fittedCurves=None):
+    if fittedCurves is None:
+        fittedCurves = titration.lastFittedCurves
+    return ma.compressed(ma.masked_invalid(fittedCurves) - titration.processedData)
+
+
+def evaluateResiduals(titration, logVariables):
+    return residualVector(titration, titration.evaluate(10**logVariables).fittedCurves)
+
+
+def jacobian(titration, step=jacobianStep):
+    # Central differences of the residuals with respect to the log10 variables, at the
+    # current fit. The fitted spectra are solved for at each point, so this is the
+    # Jacobian of the variable projection functional.
+    logVariables = np.log10(titration.lastVars)
+    numVariables = len(logVariables)
+    offsets = np.vstack([np.eye(numVariables), -np.eye(numVariables)]) * step
+    points = logVariables + offsets
+
+    # evaluate doesn't change the titration, so the points can be evaluated in
+    # parallel, leaving the current fit untouched.
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        residuals = np.array(
+            list(executor.map(evaluateResiduals, [titration] * len(points), points))
+        )
+    forward, backward = residuals[:numVariables], residuals[numVariables:]
+    return ((forward - backward) / (2 * step)).T
+
+
+def residualVariance(titration):
+    # Estimate of the variance of the noise on each data point.
+    residuals = residualVector(titration)
+    degreesOfFreedom = len(residuals) - titration.parameterCount
+    if degreesOfFreedom <= 0:
+        warnings.warn(
+            "There are fewer data points than fitted parameters, so the errors are"
+            " underestimated."
+        )
+        degreesOfFreedom = len(residuals)
+    return np.sum(residuals**2) / degreesOfFreedom
+
+
+# Eigenvalues of the information matrix below this fraction of the largest are treated
+# as 0.
+rankTolerance = 1e-10
+
+
+def covarianceFromInformation(information, variance):
+    # Linearised covariance variance * information⁻¹, for information matrices along
+    # the last two axes. A pseudoinverse would give the variables that the data can't
+    # determine a variance of 0, so they get an infinite variance and undefined
+    # covariances instead. Also returns which variables are undetermined.
+    eigenvalues, eigenvectors = np.linalg.eigh(information)
+    determined = eigenvalues > rankTolerance * eigenvalues[..., -1:]
+    inverseEigenvalues = np.where(
+        determined, 1 / np.where(determined, eigenvalues, 1), 0
+    )
+    covariance = variance * (
+        (eigenvectors * inverseEigenvalues[..., np.newaxis, :])
+        @ np.swapaxes(eigenvectors, -1, -2)
+    )
+
+    # Variables with any weight along a direction with no information.
+    undetermined = np.any(
+        (np.abs(eigenvectors) > np.sqrt(rankTolerance))
+        & ~determined[..., np.newaxis, :],
+        axis=-1,
+    )
+    covariance[undetermined[..., :, np.newaxis] | undetermined[..., np.newaxis, :]] = (
+        np.nan
+    )
+    diagonal = np.arange(covariance.shape[-1])
+    covariance[..., diagonal, diagonal] = np.where(
+        undetermined, np.inf, covariance[..., diagonal, diagonal]
+    )
+    return covariance, undetermined
+
+
+def parameterErrors(titration):
+    # Standard errors of the log10 variables and their correlations, from the linearised
+    # covariance s²(JᵀJ)⁻¹.
+    variableNames = list(titration.equilibriumConstants.variableNames) + list(
+        titration.totalConcentrations.variableNames
+    )
+    if len(variableNames) == 0:
+        return ParameterErrors(variableNames, np.empty(0), np.empty((0, 0)))
+
+    J = jacobian(titration)
+    variance = residualVariance(titration)
+
+    covariance, undetermined = covarianceFromInformation(J.T @ J, variance)
+    if np.any(undetermined):
+        names = ", ".join(np.array(variableNames)[undetermined])
+        warnings.warn(
+            f"The data can't determine {names}, so the standard errors are infinite."
+        )
+    standardErrors = np.sqrt(np.abs(np.diag(covariance)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlations = covariance / np.outer(standardErrors, standardErrors)
+    return ParameterErrors(variableNames, standardErrors, correlations)
+
+
+def profileLine(fixedVars, lineIndex, values, startIndex, startGuess, options):
+    # Runs in a worker process. Fixes the variable at lineIndex to each of the values in
+    # turn, moving outwards from startIndex, and refits the free variables starting
+    # from the result at the neighbouring value.
+    titration = processPool.workerTitration
+    fixedVars = fixedVars.copy()
+    RMSEs = np.empty(len(values))
+    results = np.empty((len(values), np.count_nonzero(ma.getmaskarray(fixedVars))))
+
+    def fitAt(index, guess):
+        fixedVars[lineIndex] = values[index]
+        initialGuess = ma.masked_all_like(fixedVars)
+        initialGuess[fixedVars.mask] = guess
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            logResult, evaluation = titration.optimiseFixed(
+                fixedVars, initialGuess, minimizeOptions=options
+            )
+        results[index] = 10**logResult
+        RMSEs[index] = titration.evaluationRMSE(evaluation)
+
+    fitAt(startIndex, startGuess)
+    for index in range(startIndex - 1, -1, -1):
+        fitAt(index, results[index + 1])
+    for index in range(startIndex + 1, len(values)):
+        fitAt(index, results[index - 1])
+    return RMSEs, results
+
+
+def profile2D(
+    titration,
+    variableIndices,
+    ordersOfMagnitude=2,
+    points=10,
+    options={"xatol": 1e-3, "fatol": np.inf},
+    callback=lambda *args: None,
+):
+    # Returns the RMSE on a grid of values of two variables, with the others refitted at
+    # each point. The grid has 2 * points + 1 values in each direction, centred on the
+    # fit. callback is called with the number of lines of the grid completed, out of
+    # 2 * points + 2 including the first column.
+    firstIndex, secondIndex = variableIndices
+    if firstIndex == secondIndex:
+        raise ValueError("Please select two different variables.")
+    bestFit = titration.lastVars.copy()
+    logBestFit = np.log10(bestFit[[firstIndex, secondIndex]])
+    values = [
+        np.logspace(
+            logBest - ordersOfMagnitude, logBest + ordersOfMagnitude, 2 * points + 1
+        )
+        for logBest in logBestFit
+    ]
+    midpoint = points
+
+    fixedVars = ma.masked_all_like(bestFit)
+    fixedVars[firstIndex] = bestFit[firstIndex]
+    fixedVars[secondIndex] = bestFit[secondIndex]
+    bestGuess = bestFit[fixedVars.mask]
+
+    RMSEs = np.empty((len(values[0]), len(values[1])))
+    with workerPool(titration, len(values[0])) as executor:
+        # First the column through the fit, where each refit starts from the previous
+        # one. Its results are then the starting points for each row, which are
+        # independent of each other, so are calculated in parallel.
+        column = executor.submit(
+            profileLine, fixedVars, firstIndex, values[0], midpoint, bestGuess, options
+        )
+        waitForFutures([column], lambda numDone: callback(0))
+        RMSEs[:, midpoint], columnResults = column.result()
+
+        rows = []
+        for rowIndex, value in enumerate(values[0]):
+            rowFixedVars = fixedVars.copy()
+            rowFixedVars[firstIndex] = value
+            rows.append(
+                executor.submit(
+                    profileLine,
+                    rowFixedVars,
+                    secondIndex,
+                    values[1],
+                    midpoint,
+                    columnResults[rowIndex],
+                    options,
+                )
+            )
+        waitForFutures(rows, lambda numDone: callback(1 + numDone))
+
+    for rowIndex, row in enumerate(rows):
+        RMSEs[rowIndex] = row.result()[0]
+    return ProfileSurface((firstIndex, secondIndex), values, RMSEs, bestFit)
+
+
+class BootstrapPopup(moduleFrame.Popup):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Confidence intervals")
+        self.resizable(False, False)
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        self.numSamplesVar = tk.IntVar(self)
+        self.levelVar = tk.DoubleVar(self)
+        self.methodVar = tk.StringVar(self)
+
+        ttk.Label(frame, text="Synthetic datasets:").grid(row=0, column=0, sticky="w")
+        ttk.Spinbox(
+            frame, textvariable=self.numSamplesVar, from_=2, to=100000, width=8
+        ).grid(row=0, column=1, sticky="e", padx=padding, pady=padding)
+
+        ttk.Label(frame, text="Confidence level (%):").grid(row=1, column=0, sticky="w")
+        ttk.Spinbox(frame, textvariable=self.levelVar, from_=50, to=99.9, width=8).grid(
+            row=1, column=1, sticky="e", padx=padding, pady=padding
+        )
+
+        ttk.Label(frame, text="Noise:").grid(row=2, column=0, sticky="w")
+        ttk.OptionMenu(
+            frame,
+            self.methodVar,
+            list(noiseMethods)[0],
+            *noiseMethods,
+            style="Outline.TMenubutton",
+        ).grid(row=2, column=1, sticky="e", padx=padding, pady=padding)
+
+        buttonFrame = ButtonFrame(self, self.reset, self.saveData, self.destroy)
+        buttonFrame.saveButton.configure(text="Calculate")
+        buttonFrame.pack(expand=False, fill="both", side="bottom")
+
+        self.reset()
+
+    def reset(self):
+        self.numSamplesVar.set(500)
+        self.levelVar.set(95)
+        self.methodVar.set(list(noiseMethods)[0])
+
+    def saveData(self):
+        self.numSamples = self.numSamplesVar.get()
+        if self.numSamples < 2:
+            raise ValueError("At least 2 synthetic datasets are needed.")
+        self.level = self.levelVar.get() / 100
+        if not 0 < self.level < 1:
+            raise ValueError("The confidence level must be between 0 and 100%.")
+        self.method = noiseMethods[self.methodVar.get()]
+
+        self.saved = True
+        self.destroy()
+
+
+class BootstrapResultsPopup(tk.Toplevel):
+    def __init__(self, result, level, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title("Confidence intervals")
+
+        frame = ttk.Frame(self, padding=padding)
+        frame.pack(expand=True, fill="both")
+
+        numSamples = len(result.logSamples)
+        ttk.Label(
+            frame,
+            text=f"{level:.1%} confidence intervals from {numSamples} refits:",
+        ).pack(fill="x", pady=padding)
+
+        columns = ["Variable", "Value", "Lower", "Upper"]
+        intervalsTreeview = ttk.Treeview(
+            frame, columns=columns, show="headings", height=len(result.variableNames)
+        )
+        for column in columns:
+            intervalsTreeview.heading(column, text=column)
+            intervalsTreeview.column(column, width=100, anchor="e")
+        for name, value, (lower, upper) in zip(
+            result.variableNames, result.bestFit, confidenceIntervals(result, level)
+        ):
+            intervalsTreeview.insert(
+                "", "end", values=[name, f"{value:.4g}", f"{lower:.4g}", f"{upper:.4g}"]
+            )
+        intervalsTreeview.pack(expand=True, fill="both")
+
+        if len(result.variableNames) > 1:
+            ttk.Label(frame, text="Correlations between log values:").pack(
+                fill="x", pady=padding
+            )
+            columns = [""] + result.variableNames
+            correlationsTreeview = ttk.Treeview(
+                frame,
+                columns=columns,
+                show="headings",
+                height=len(result.variableNames),
+            )
+            for column in columns:
+                correlationsTreeview.heading(column, text=column)
+                correlationsTreeview.column(column, width=80, anchor="e")
+            for name, row in zip(result.variableNames, correlationMatrix(result)):
+                correlationsTreeview.insert(
+                    "", "end", values=[name] + [f"{value:.3f}" for value in row]
+                )
+            correlationsTreeview.pack(expand=True, fill="both")
+
+        ttk.Button(
+            frame, text="Close", command=self.destroy, style="Outline.TButton"
+        ).pack(pady=padding)
@@ -1 +1,7 @@
-from musketeer import __main__  # noqa: F401
+import multiprocessing
+
+# Worker processes used for multi-start fitting run this script too, so they need to be
+# intercepted before the interface is started.
+multiprocessing.freeze_support()
+
+from musketeer import __main__  # noqa: E402, F401
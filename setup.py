@@ -45,7 +45,7 @@ setuptools.setup(
         "Topic :: Scientific/Engineering :: Chemistry",
     ],
     url="https://github.com/daniilS/Musketeer",
-    packages=["musketeer"],
+    packages=["musketeer", "musketeer.core"],
     include_package_data=True,
     install_requires=[
         "matplotlib >= 3.9.0",